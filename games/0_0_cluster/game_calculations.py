@@ -56,7 +56,8 @@ class GameCalculations(Executables):
                     ]
 
                     for positions in cluster:
-                        board[positions[0]][positions[1]].explode = True
+                        board[positions[0]][positions[1]] = board[positions[0]][positions[1]].mutable()
+                        board[positions[0]][positions[1]].assign_attribute({"explode": True})
                         if {
                             "reel": positions[0],
                             "row": positions[1],
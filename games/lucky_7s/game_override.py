@@ -29,7 +29,7 @@ class GameStateOverride(GameExecutables):
         multiplier_value = 1
         if self.gametype == self.config.freegame_type:
             multiplier_value = get_random_outcome(
-                self.get_current_distribution_conditions()["mult_values"][self.gametype]
+                self.get_current_distribution_conditions()["mult_values"][self.gametype], rng=self.rng
             )
         symbol.assign_attribute({"multiplier": multiplier_value})
 
@@ -71,11 +71,11 @@ class GameStateOverride(GameExecutables):
 
         # Spin inner wheel (multiplier)
         multiplier_wheel = wheels.get("multiplier_wheel", {1: 1})
-        self.wheel_multiplier = get_random_outcome(multiplier_wheel)
+        self.wheel_multiplier = get_random_outcome(multiplier_wheel, rng=self.rng)
 
         # Spin outer wheel (spins)
         spin_wheel = wheels.get("spin_wheel", {7: 1})
-        self.wheel_spins = get_random_outcome(spin_wheel)
+        self.wheel_spins = get_random_outcome(spin_wheel, rng=self.rng)
 
         return self.wheel_multiplier, self.wheel_spins
 
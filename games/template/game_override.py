@@ -20,9 +20,9 @@ class GameStateOverride(GameExecutables):
 
     def assign_mult_property(self, symbol):
         multiplier_value = get_random_outcome(
-            self.get_current_distribution_conditions()["mult_values"][self.gametype]
+            self.get_current_distribution_conditions()["mult_values"][self.gametype], rng=self.rng
         )
-        symbol.multiplier = multiplier_value
+        symbol.assign_attribute({"multiplier": multiplier_value})
 
     def check_game_repeat(self):
         if self.repeat == False:
@@ -1,60 +1,100 @@
 """Handles generating game-boards from reelstrips"""
 
-import random
 from typing import List
+import numpy as np
 from src.state.state import GeneralGameState
-from src.calculations.statistics import get_random_outcome
+from src.calculations.statistics import get_random_outcome, get_sampler
+from src.calculations.reelstrip import CompiledReelstrip, BoardWindow
+from src.calculations.compact_board import CompactBoard
+from src.calculations.symbol import Symbol, get_attribute_bit
 from src.events.events import reveal_event
 
 
 class Board(GeneralGameState):
     """Handles generation of a game board and symbols"""
 
-    def create_board_reelstrips(self) -> None:
-        """Randomly selects stopping positions from a reelstrip."""
-        if self.config.include_padding:
-            top_symbols = []
-            bottom_symbols = []
-        self.refresh_special_syms()
-        self.reelstrip_id = get_random_outcome(
-            self.get_current_distribution_conditions()["reel_weights"][self.gametype]
-        )
-        self.reelstrip = self.config.reels[self.reelstrip_id]
-        anticipation = [0] * self.config.num_reels
+    def get_compiled_reelstrip(self, reelstrip_id: str) -> CompiledReelstrip:
+        """Integer-encoded reelstrip, compiled on first use (and again if the config reelstrip is replaced)."""
+        compiled = self.compiled_reels.get(reelstrip_id)
+        if compiled is None or compiled.source is not self.config.reels[reelstrip_id]:
+            compiled = CompiledReelstrip(self.config.reels[reelstrip_id], self.symbol_storage)
+            self.compiled_reels[reelstrip_id] = compiled
+        return compiled
+
+    def get_board_window(self) -> BoardWindow:
+        """Cell layout gathered from the reelstrips for the current board shape."""
+        window = self.board_window
+        if (
+            window is None
+            or window.num_rows != list(self.config.num_rows)
+            or window.include_padding != self.config.include_padding
+        ):
+            window = BoardWindow(self.config.num_rows, self.config.include_padding)
+            self.board_window = window
+        return window
+
+    def populate_board(self, reel_positions: list) -> tuple:
+        """
+        Gather symbol ids for all board and padding cells in one indexing operation and create the symbols.
+        Returns the board, top/bottom padding symbols and the first reel with enough scatters for anticipation.
+        """
+        window = self.get_board_window()
+        symbol_ids = self.get_compiled_reelstrip(self.reelstrip_id).gather(reel_positions, window)
+        shared_by_id = self.symbol_storage.shared_by_id
+        special_symbol_functions = self.special_symbol_functions
+        symbols = []
+        for symbol_id in symbol_ids:
+            sym = shared_by_id[symbol_id]
+            if sym is None:
+                raise ValueError(f"unregistered symbol id {symbol_id}")
+            if sym.defn.name in special_symbol_functions:
+                sym = Symbol(sym.defn)
+                for func in special_symbol_functions[sym.defn.name]:
+                    func(sym)
+            symbols.append(sym)
+
         board = [[]] * self.config.num_reels
-        for i in range(self.config.num_reels):
-            board[i] = [0] * self.config.num_rows[i]
-        reel_positions = [random.randrange(0, len(self.reelstrip[reel])) for reel in range(self.config.num_reels)]
-        padding_positions = [0] * self.config.num_reels
+        top_symbols, bottom_symbols = [], []
         first_scatter_reel = -1
         for reel in range(self.config.num_reels):
-            reel_pos = reel_positions[reel]
+            start, end = window.reel_slices[reel]
             if self.config.include_padding:
-                top_symbols.append(
-                    self.create_symbol(self.reelstrip[reel][(reel_pos - 1) % len(self.reelstrip[reel])])
-                )
-                bottom_symbols.append(
-                    self.create_symbol(
-                        self.reelstrip[reel][(reel_pos + len(board[reel])) % len(self.reelstrip[reel])]
-                    )
-                )
-            for row in range(self.config.num_rows[reel]):
-                sym_id = self.reelstrip[reel][(reel_pos + row) % len(self.reelstrip[reel])]
-                sym = self.create_symbol(sym_id)
-                board[reel][row] = sym
+                top_symbols.append(symbols[start])
+                bottom_symbols.append(symbols[start + 1])
+                start += 2
+            board[reel] = symbols[start:end]
+            for row, sym in enumerate(board[reel]):
                 if sym.defn.special:
                     for special_symbol in self.special_syms_on_board:
                         for s in self.config.special_symbols[special_symbol]:
-                            if board[reel][row].name == s:
+                            if sym.name == s:
                                 self.special_syms_on_board[special_symbol] += [{"reel": reel, "row": row}]
                                 if (
-                                    board[reel][row].check_attribute("scatter")
+                                    sym.mask & get_attribute_bit("scatter")
                                     and len(self.special_syms_on_board[special_symbol])
                                     >= self.config.anticipation_triggers[self.gametype]
                                     and first_scatter_reel == -1
                                 ):
                                     first_scatter_reel = reel + 1
-            padding_positions[reel] = (reel_positions[reel] + len(board[reel]) + 1) % len(self.reelstrip[reel])
+        return board, top_symbols, bottom_symbols, first_scatter_reel
+
+    def create_board_reelstrips(self, reelstrip_id: str = None, reel_positions: list = None) -> None:
+        """Randomly selects stopping positions from a reelstrip (unless the reelstrip and positions are given)."""
+        self.refresh_special_syms()
+        if reelstrip_id is None:
+            reelstrip_id = get_random_outcome(
+                self.get_current_distribution_conditions()["reel_weights"][self.gametype], rng=self.rng
+            )
+        self.reelstrip_id = reelstrip_id
+        self.reelstrip = self.config.reels[self.reelstrip_id]
+        anticipation = [0] * self.config.num_reels
+        reel_lengths = self.get_compiled_reelstrip(self.reelstrip_id).reel_lengths[: self.config.num_reels]
+        if reel_positions is None:
+            reel_positions = self.rng.randranges(reel_lengths)
+        board, top_symbols, bottom_symbols, first_scatter_reel = self.populate_board(reel_positions)
+        padding_positions = [
+            (reel_positions[reel] + len(board[reel]) + 1) % reel_lengths[reel] for reel in range(self.config.num_reels)
+        ]
 
         if first_scatter_reel > -1 and first_scatter_reel != self.config.num_reels:
             count = 1
@@ -75,57 +115,68 @@ class Board(GeneralGameState):
             self.top_symbols = top_symbols
             self.bottom_symbols = bottom_symbols
 
-    def force_board_from_reelstrips(self, reelstrip_id: str, force_stop_positions: List[List]) -> None:
-        """Creates a gameboard from specified stopping positions."""
-        if self.config.include_padding:
-            top_symbols = []
-            bottom_symbols = []
-        self.refresh_special_syms()
-        self.reelstrip_id = reelstrip_id
-        self.reelstrip = self.config.reels[self.reelstrip_id]
-        anticipation = [0] * self.config.num_reels
-        board = [[]] * self.config.num_reels
-        for i in range(self.config.num_reels):
-            board[i] = [0] * self.config.num_rows[i]
-
+    def draw_boards(self, n: int, gametype: str = None) -> tuple:
+        """
+        Draw n independent boards as symbol ids, without creating symbols or changing the gamestate board.
+        Reelstrips are selected from the current distribution's reel_weights for the gametype (default: current).
+        Returns (boards, reel_stops, reelstrip_ids): an (n, num_reels, max(num_rows)) int array of symbol ids
+        (see SymbolStorage.symbol_names, rows beyond num_rows[reel] are -1), the (n, num_reels) stop
+        positions and the reelstrip id of each board. With the legacy rng the draws are made in the same order
+        as repeated calls to create_board_reelstrips().
+        """
+        reel_weights = self.get_current_distribution_conditions()["reel_weights"][gametype or self.gametype]
+        num_reels = self.config.num_reels
+        boards = np.empty((n, num_reels, max(self.config.num_rows)), dtype=np.int32)
+        reel_stops = np.empty((n, num_reels), dtype=np.int64)
+        if self.rng.mode == "legacy":
+            reelstrip_ids = []
+            for idx in range(n):
+                reelstrip_id = get_random_outcome(reel_weights, rng=self.rng)
+                reel_lengths = self.get_compiled_reelstrip(reelstrip_id).reel_lengths[:num_reels]
+                reel_stops[idx] = self.rng.randranges(reel_lengths)
+                reelstrip_ids.append(reelstrip_id)
+        else:
+            reelstrip_ids = get_sampler(reel_weights).sample(n, self.rng)
+        id_array = np.array(reelstrip_ids, dtype=object)
+        for reelstrip_id in dict.fromkeys(reelstrip_ids):
+            compiled = self.get_compiled_reelstrip(reelstrip_id)
+            selected = np.flatnonzero(id_array == reelstrip_id)
+            if self.rng.mode != "legacy":
+                reel_stops[selected] = self.rng.randranges_batch(compiled.reel_lengths[:num_reels], len(selected))
+            boards[selected] = compiled.gather_boards(reel_stops[selected], self.config.num_rows)
+        return boards, reel_stops, reelstrip_ids
+
+    def draw_forced_reel_positions(self, reelstrip_id: str, force_stop_positions: dict) -> list:
+        """Place each forced stop on a random board row and draw the remaining reels' stops."""
+        reelstrip = self.config.reels[reelstrip_id]
         reel_positions = [None] * self.config.num_reels
         for r, s in force_stop_positions.items():
-            reel_positions[r] = s - random.randint(0, self.config.num_rows[r] - 1)
+            reel_positions[r] = s - self.rng.randint(0, self.config.num_rows[r] - 1)
         for r, _ in enumerate(reel_positions):
             if reel_positions[r] is None:
-                reel_positions[r] = random.randrange(0, len(self.reelstrip[r]))
+                reel_positions[r] = self.rng.randrange(0, len(reelstrip[r]))
+        return reel_positions
 
-        padding_positions = [0] * self.config.num_reels
-        first_scatter_reel = -1
-        for reel in range(self.config.num_reels):
-            reel_pos = reel_positions[reel]
-            if self.config.include_padding:
-                top_symbols.append(
-                    self.create_symbol(self.reelstrip[reel][(reel_pos - 1) % len(self.reelstrip[reel])])
-                )
-                bottom_symbols.append(
-                    self.create_symbol(
-                        self.reelstrip[reel][(reel_pos + len(board[reel])) % len(self.reelstrip[reel])]
-                    )
-                )
-            for row in range(self.config.num_rows[reel]):
-                sym_id = self.reelstrip[reel][(reel_pos + row) % len(self.reelstrip[reel])]
-                sym = self.create_symbol(sym_id)
-                board[reel][row] = sym
+    def force_board_from_reelstrips(
+        self, reelstrip_id: str, force_stop_positions: List[List], reel_positions: list = None
+    ) -> None:
+        """
+        Creates a gameboard from specified stopping positions.
+        reel_positions are drawn with draw_forced_reel_positions() if not given.
+        """
+        self.refresh_special_syms()
+        self.reelstrip_id = reelstrip_id
+        self.reelstrip = self.config.reels[self.reelstrip_id]
+        anticipation = [0] * self.config.num_reels
 
-                if sym.defn.special:
-                    for special_symbol in self.special_syms_on_board:
-                        for s in self.config.special_symbols[special_symbol]:
-                            if board[reel][row].name == s:
-                                self.special_syms_on_board[special_symbol] += [{"reel": reel, "row": row}]
-                                if (
-                                    board[reel][row].check_attribute("scatter")
-                                    and len(self.special_syms_on_board[special_symbol])
-                                    >= self.config.anticipation_triggers[self.gametype]
-                                    and first_scatter_reel == -1
-                                ):
-                                    first_scatter_reel = reel + 1
-                padding_positions[reel] = (reel_positions[reel] + len(board[reel]) + 1) % len(self.reelstrip[reel])
+        if reel_positions is None:
+            reel_positions = self.draw_forced_reel_positions(reelstrip_id, force_stop_positions)
+
+        board, top_symbols, bottom_symbols, first_scatter_reel = self.populate_board(reel_positions)
+        padding_positions = [
+            (reel_positions[reel] + len(board[reel]) + 1) % len(self.reelstrip[reel])
+            for reel in range(self.config.num_reels)
+        ]
 
         if first_scatter_reel > -1 and first_scatter_reel <= self.config.num_reels:
             count = 1
@@ -149,6 +200,30 @@ class Board(GeneralGameState):
 
         return sym
 
+    def get_reel_symbol(self, name: str):
+        """
+        Symbol landing from a reelstrip. Symbols without special functions are the shared immutable instance,
+        replace it with symbol.mutable() before changing attributes.
+        """
+        if name in self.special_symbol_functions:
+            return self.create_symbol(name)
+        return self.symbol_storage.get_shared_symbol(name)
+
+    def create_symbol_from_id(self, symbol_id: int):
+        """Create a symbol from its integer id (as stored in compiled reelstrips)."""
+        sym = self.symbol_storage.create_symbol_from_id(symbol_id)
+        if sym.defn.name in self.special_symbol_functions:
+            for func in self.special_symbol_functions[sym.defn.name]:
+                func(sym)
+
+        return sym
+
+    def get_compact_board(self) -> CompactBoard:
+        """Flat array copy of the current board (see CompactBoard), accepted by all win evaluators."""
+        if isinstance(self.board, CompactBoard):
+            return self.board
+        return CompactBoard.from_symbols(self.board, self.symbol_storage)
+
     def refresh_special_syms(self) -> None:
         """Reset recorded speical symbols on board."""
         self.special_syms_on_board = {}
@@ -158,11 +233,13 @@ class Board(GeneralGameState):
     def get_special_symbols_on_board(self) -> None:
         """Scans board for any active special symbols."""
         self.refresh_special_syms()
+        special_bits = [(specialType, get_attribute_bit(specialType)) for specialType in self.special_syms_on_board]
         for reel, _ in enumerate(self.board):
             for row, _ in enumerate(self.board[reel]):
                 if self.board[reel][row].defn.special:
-                    for specialType in list(self.special_syms_on_board.keys()):
-                        if self.board[reel][row].check_attribute(specialType):
+                    mask = self.board[reel][row].mask
+                    for specialType, bit in special_bits:
+                        if mask & bit:
                             self.special_syms_on_board[specialType].append({"reel": reel, "row": row})
 
     def transpose_board_string(self, board_string: List[List[str]]) -> List[List[str]]:
@@ -196,16 +273,20 @@ class Board(GeneralGameState):
             self.get_current_distribution_conditions()["force_freegame"]
             and self.gametype == self.config.basegame_type
         ):
-            num_scatters = get_random_outcome(self.get_current_distribution_conditions()["scatter_triggers"])
+            num_scatters = get_random_outcome(
+                self.get_current_distribution_conditions()["scatter_triggers"], rng=self.rng
+            )
             self.force_special_board(trigger_symbol, num_scatters)
         elif (
             not (self.get_current_distribution_conditions()["force_freegame"])
             and self.gametype == self.config.basegame_type
         ):
-            self.create_board_reelstrips()
-            while self.count_special_symbols(trigger_symbol) >= min(
-                self.config.freespin_triggers[self.gametype].keys()
-            ):
+            trigger_count = min(self.config.freespin_triggers[self.gametype].keys())
+            if self.rng.mode != "legacy":
+                self.create_board_below(trigger_symbol, trigger_count)
+            else:
+                self.create_board_reelstrips()
+            while self.count_special_symbols(trigger_symbol) >= trigger_count:
                 self.create_board_reelstrips()
         else:
             self.create_board_reelstrips()
@@ -226,61 +307,132 @@ class Board(GeneralGameState):
         will not be able to guarantee an exact number of target symbols or actually random
         reel positions. I.e. Ensure the reels do not have stacked scatter symbols.
         """
+        self.check_force_possible(force_criteria, num_force_syms)
+        if (
+            self.rng.mode != "legacy"
+            and self.force_exact_layout(force_criteria, num_force_syms)
+            and self.check_force_count(force_criteria, num_force_syms)
+        ):
+            return
         while True:
-            self._force_special_board(force_criteria, num_force_syms)
-            if (
-                force_criteria in self.config.special_symbols
-                and self.count_special_symbols(force_criteria) == num_force_syms
-            ):
-                break
-            elif (
-                not (force_criteria in self.config.special_symbols)
-                and self.count_symbols_on_board(force_criteria) == num_force_syms
-            ):
+            if not self._force_special_board(force_criteria, num_force_syms):
+                continue
+            if self.check_force_count(force_criteria, num_force_syms):
                 break
 
-    def _force_special_board(self, force_criteria: str, num_force_syms: int) -> None:
+    def check_force_count(self, force_criteria: str, num_force_syms: int) -> bool:
+        """The board shows the forced number of special (or name specific) symbols."""
+        if force_criteria in self.config.special_symbols:
+            return self.count_special_symbols(force_criteria) == num_force_syms
+        return self.count_symbols_on_board(force_criteria) == num_force_syms
+
+    def get_conditional_reel_weights(self, condition: str, target_symbol: str, count: int) -> dict:
+        """
+        Current reel_weights scaled by the probability that each reelstrip produces an accepted board.
+        condition "below": fewer than count target symbols, keyed on reelstrip id.
+        condition "exact": the _force_special_board layouts showing exactly count targets, keyed on
+        (reelstrip id, forced reels). None if a reelstrip has fewer reels containing the target than count.
+        """
+        reel_weights = self.get_current_distribution_conditions()["reel_weights"][self.gametype]
+        key = (id(reel_weights), condition, target_symbol, count)
+        cached = self.conditional_reel_weights.get(key)
+        if cached is not None and cached[0] is reel_weights:
+            return cached[1]
+
+        weights = {}
+        for reelstrip_id, weight in reel_weights.items():
+            if weight <= 0:
+                continue
+            stop_index = self.get_reel_stop_index(reelstrip_id, target_symbol)
+            if condition == "below":
+                prob = stop_index.get_below_probability(count)
+                if prob > 0:
+                    weights[reelstrip_id] = weight * prob
+            else:
+                layout_weights = stop_index.get_layout_weights(count)
+                if layout_weights is None:
+                    weights = None
+                    break
+                for forced, prob in layout_weights.items():
+                    weights[(reelstrip_id, forced)] = weight * prob
+        if weights is not None and len(weights) == 0:
+            raise ValueError(f"No reelstrip in {list(reel_weights)} can show {condition} {count} '{target_symbol}'.")
+        self.conditional_reel_weights[key] = (reel_weights, weights)
+        return weights
+
+    def create_board_below(self, target_symbol: str, max_count: int) -> None:
+        """
+        Draw a board showing fewer than max_count target symbols in a single pass.
+        Boards follow the same distribution as redrawing create_board_reelstrips() until the condition is met.
+        """
+        reelstrip_id = get_random_outcome(
+            self.get_conditional_reel_weights("below", target_symbol, max_count), rng=self.rng
+        )
+        reel_positions = self.get_reel_stop_index(reelstrip_id, target_symbol).sample_below(max_count, self.rng)
+        self.create_board_reelstrips(reelstrip_id, reel_positions)
+
+    def force_exact_layout(self, force_criteria: str, num_force_syms: int) -> bool:
+        """
+        Draw a board from the layouts accepted by the _force_special_board loop in a single pass.
+        Returns False (without drawing) if some reelstrip has too few reels containing the target symbol.
+        """
+        layout_weights = self.get_conditional_reel_weights("exact", force_criteria, num_force_syms)
+        if layout_weights is None:
+            return False
+        reelstrip_id, forced = get_random_outcome(layout_weights, rng=self.rng)
+        reel_positions, force_stop_positions = self.get_reel_stop_index(
+            reelstrip_id, force_criteria
+        ).sample_forced_layout(forced, self.rng)
+        self.force_board_from_reelstrips(reelstrip_id, force_stop_positions, reel_positions)
+        return True
+
+    def check_force_possible(self, force_criteria: str, num_force_syms: int) -> None:
+        """Raise if no selectable reelstrip can show the requested number of symbols, which would never terminate."""
+        reel_weights = self.get_current_distribution_conditions()["reel_weights"][self.gametype]
+        if not any(
+            self.get_reel_stop_index(reelstrip_id, force_criteria).max_count >= num_force_syms
+            for reelstrip_id, weight in reel_weights.items()
+            if weight > 0
+        ):
+            raise ValueError(
+                f"No reelstrip in {list(reel_weights)} can show {num_force_syms} '{force_criteria}' symbols."
+            )
+
+    def _force_special_board(self, force_criteria: str, num_force_syms: int) -> bool:
         """
-        Helper function for forcing special (or name specific) symbols
+        Helper function for forcing special (or name specific) symbols.
+        Outside of the legacy rng mode, layouts which show too many target symbols (stacked or on unforced reels)
+        are rejected from the reelstrip index before any symbols are created, returning False.
         """
         reelstrip_id = get_random_outcome(
-            self.get_current_distribution_conditions()["reel_weights"][self.gametype]
+            self.get_current_distribution_conditions()["reel_weights"][self.gametype], rng=self.rng
         )
-        reelstops = self.get_syms_on_reel(reelstrip_id, force_criteria)
+        stop_index = self.get_reel_stop_index(reelstrip_id, force_criteria)
+        reelstops = stop_index.stops
 
-        sym_prob = []
-        for x in range(self.config.num_reels):
-            sym_prob.append(len(reelstops[x]) / len(self.config.reels[reelstrip_id][x]))
+        sym_prob = list(stop_index.probabilities)
         force_stop_positions = {}
         possible_reels = [i for i in range(self.config.num_reels) if sym_prob[i] > 0]
         possible_probs = [p for p in sym_prob if p > 0]
 
         while len(force_stop_positions) != num_force_syms and len(possible_reels) > 0:
-            chosen_reel = random.choices(possible_reels, possible_probs)[0]
-            chosen_stop = random.choice(reelstops[chosen_reel])
+            chosen_reel = self.rng.choices(possible_reels, possible_probs)[0]
+            chosen_stop = self.rng.choice(reelstops[chosen_reel])
             sym_prob[chosen_reel] = 0
             force_stop_positions[int(chosen_reel)] = int(chosen_stop)
             possible_reels = [i for i in range(self.config.num_reels) if sym_prob[i] > 0]
             possible_probs = [p for p in sym_prob if p > 0]
 
         force_stop_positions = dict(sorted(force_stop_positions.items(), key=lambda x: x[0]))
-        self.force_board_from_reelstrips(reelstrip_id, force_stop_positions)
+        reel_positions = self.draw_forced_reel_positions(reelstrip_id, force_stop_positions)
+        if self.rng.mode != "legacy" and stop_index.count_on_board(reel_positions) > num_force_syms:
+            return False
+        self.force_board_from_reelstrips(reelstrip_id, force_stop_positions, reel_positions)
+        return True
 
     def get_syms_on_reel(self, reel_id: str, target_symbol: str) -> List[List]:
-        """Return reelstop positions for a specific symbol name."""
-        reel = self.config.reels[reel_id]
-        reelstop_positions = [[] for _ in range(self.config.num_reels)]
-        for r in range(self.config.num_reels):
-            for s in range(len(reel[r])):
-                if (
-                    target_symbol in self.config.special_symbols
-                    and reel[r][s] in self.config.special_symbols[target_symbol]
-                ):
-                    reelstop_positions[r].append(s)
-                elif reel[r][s] == target_symbol:
-                    reelstop_positions[r].append(s)
-
-        return reelstop_positions
+        """Return reelstop positions for a specific symbol name (or special symbol type)."""
+        return [list(stops) for stops in self.get_reel_stop_index(reel_id, target_symbol).stops]
 
     def count_special_symbols(self, special_sym_criteria: str) -> int:
         "Returns integer number of active symbols of any 'special' kind."
@@ -316,7 +468,7 @@ class Board(GeneralGameState):
 
         assert len(free_positions) >= additional_count, "not enough free place for additional symbols"
 
-        new_positions = random.choices(free_positions, additional_count)[0]
-        random.shuffle(new_positions)
+        new_positions = self.rng.choices(free_positions, additional_count)[0]
+        self.rng.shuffle(new_positions)
         for np in new_positions:
             self.board[np[0]][np[1]] = self.create_symbol(symbol_name)
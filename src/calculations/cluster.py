@@ -1,10 +1,13 @@
 from collections import defaultdict
+import numpy as np
 from abc import ABC
 from typing import List, Dict
-from src.calculations.board import Board
-from src.calculations.symbol import Symbol
+from src.calculations.symbol import Symbol, get_attribute_bit
+from src.calculations.compact_board import CompactBoard, is_compact
 from src.config.config import Config
+from src.config.paytable import get_compiled_paytable
 from src.wins.multiplier_strategy import apply_mult
+from src.wins.win_record import WinRecord, get_summary
 
 
 class Cluster:
@@ -24,88 +27,196 @@ class Cluster:
 
         return (reel_to_overlay, row_to_overlay)
 
+    adjacency_tables = {}
+
     @staticmethod
-    def get_neighbours(board: list[list[Symbol]], reel: int, row: int, local_checked: list) -> list:
-        """All neighbouring symbols within board range."""
-        neighbours = []
-        if reel > 0:
-            if (reel - 1, row) not in local_checked:
-                neighbours += [(reel - 1, row)]
-                local_checked += [(reel - 1, row)]
-        if reel < len(board) - 1:
-            if (reel + 1, row) not in local_checked:
-                neighbours += [(reel + 1, row)]
-                local_checked += [(reel + 1, row)]
-        if row > 0:
-            if (reel, row - 1) not in local_checked:
-                neighbours += [(reel, row - 1)]
-                local_checked += [(reel, row - 1)]
-        if row < len(board[reel]) - 1:
-            if (reel, row + 1) not in local_checked:
-                neighbours += [(reel, row + 1)]
-                local_checked += [(reel, row + 1)]
-        return neighbours
+    def get_adjacency(num_rows: tuple) -> tuple:
+        """
+        Neighbours of each board cell for a board shape, cached per shape. Cells are numbered reel by reel
+        and neighbours are listed in the order left, right, up, down.
+        """
+        if num_rows not in Cluster.adjacency_tables:
+            offsets = [0]
+            for rows in num_rows:
+                offsets.append(offsets[-1] + rows)
+            adjacency = []
+            for reel, rows in enumerate(num_rows):
+                for row in range(rows):
+                    neighbours = []
+                    if reel > 0 and row < num_rows[reel - 1]:
+                        neighbours.append(offsets[reel - 1] + row)
+                    if reel < len(num_rows) - 1 and row < num_rows[reel + 1]:
+                        neighbours.append(offsets[reel + 1] + row)
+                    if row > 0:
+                        neighbours.append(offsets[reel] + row - 1)
+                    if row < rows - 1:
+                        neighbours.append(offsets[reel] + row + 1)
+                    adjacency.append(tuple(neighbours))
+            cells = tuple((reel, row) for reel, rows in enumerate(num_rows) for row in range(rows))
+            Cluster.adjacency_tables[num_rows] = (tuple(adjacency), cells)
+        return Cluster.adjacency_tables[num_rows]
 
     @staticmethod
     def in_cluster(board: list[list[Symbol]], reel: int, row: int, og_symbol: str, wild_key: str = "wild") -> bool:
         """Checks if a symbol (including wilds) match cluster type."""
-        if board[reel][row].check_attribute(wild_key) or og_symbol == board[reel][row].name:
+        if board[reel][row].mask & get_attribute_bit(wild_key) or og_symbol == board[reel][row].name:
             return True
 
-    @staticmethod
-    def check_all_neighbours(
-        board: Board,
-        already_checked: list,
-        local_checked: list,
-        potential_cluster: list,
-        reel,
-        row,
-        og_symbol: str,
-        wild_key: str = "wild",
-    ):
-        """Recursively check neighbours for like-symbols."""
-        neighbours = Cluster.get_neighbours(board, reel, row, local_checked)
-        for reel_, row_ in neighbours:
-            if Cluster.in_cluster(board, reel_, row_, og_symbol, wild_key):
-                potential_cluster += [(reel_, row_)]
-                already_checked += [(reel_, row_)]
-                Cluster.check_all_neighbours(
-                    board,
-                    already_checked,
-                    local_checked,
-                    potential_cluster,
-                    reel_,
-                    row_,
-                    og_symbol,
-                    wild_key,
-                )
-
     @staticmethod
     def get_clusters(board: list[list[Symbol]], wild_key: str = "wild") -> dict:
-        """Return all symbol clusters of size >= 1."""
-        already_checked = []
+        """
+        Return all symbol clusters of size >= 1.
+        Every non-wild symbol not already in a cluster starts a depth-first search over the adjacency table,
+        using an explicit stack. Wilds join every cluster they touch. Positions are listed in the order
+        they are reached, the neighbours of each cell being claimed when the cell is reached.
+        A CompactBoard is read from its symbol ids and masks.
+        """
+        wild_bit = get_attribute_bit(wild_key)
+        if is_compact(board):
+            adjacency, cells = Cluster.get_adjacency(tuple(board.num_rows))
+            names = board.get_names()
+            is_wild = [bool(mask & wild_bit) for mask in board.get_mask().tolist()]
+        else:
+            adjacency, cells = Cluster.get_adjacency(tuple(len(reel) for reel in board))
+            symbols = [sym for reel in board for sym in reel]
+            names = [sym.name for sym in symbols]
+            is_wild = [bool(sym.mask & wild_bit) for sym in symbols]
+        already_checked = is_wild[:]
         clusters = defaultdict(list)
-        for reel, _ in enumerate(board):
-            for row, _ in enumerate(board[reel]):
-                if (reel, row) not in already_checked and not (board[reel][row].check_attribute(wild_key)):
-                    potential_cluster = [(reel, row)]
-                    already_checked += [(reel, row)]
-                    local_checked = [(reel, row)]
-                    symbol = board[reel][row].name
-                    Cluster.check_all_neighbours(
-                        board,
-                        already_checked,
-                        local_checked,
-                        potential_cluster,
-                        reel,
-                        row,
-                        symbol,
-                        wild_key,
-                    )
-                    clusters[symbol].append(potential_cluster)
+        for cell, symbol in enumerate(names):
+            if already_checked[cell]:
+                continue
+            already_checked[cell] = True
+            potential_cluster = [cells[cell]]
+            local_checked = {cell}
+            stack = [iter(Cluster.claim_neighbours(adjacency[cell], local_checked))]
+            while stack:
+                for neighbour in stack[-1]:
+                    if is_wild[neighbour] or names[neighbour] == symbol:
+                        potential_cluster.append(cells[neighbour])
+                        already_checked[neighbour] = True
+                        stack.append(iter(Cluster.claim_neighbours(adjacency[neighbour], local_checked)))
+                        break
+                else:
+                    stack.pop()
+            clusters[symbol].append(potential_cluster)
 
         return clusters
 
+    @staticmethod
+    def claim_neighbours(neighbours: tuple, local_checked: set) -> list:
+        """Neighbours not yet checked by the current search, marked as checked."""
+        unchecked = [cell for cell in neighbours if cell not in local_checked]
+        local_checked.update(unchecked)
+        return unchecked
+
+    @staticmethod
+    def label_components_batch(mask: np.ndarray) -> np.ndarray:
+        """
+        Connected components (4-neighbour) of an (n, reels, rows) boolean array.
+        Each True cell is labelled with the largest flat cell index + 1 in its component, 0 elsewhere.
+        Labels are propagated between neighbours until no board changes.
+        """
+        num_cells = mask.shape[1] * mask.shape[2]
+        labels = np.where(mask, np.arange(1, num_cells + 1).reshape(mask.shape[1:]), 0)
+        active = np.flatnonzero(mask.reshape(len(mask), -1).any(axis=1))
+        while len(active) > 0:
+            current, current_mask = labels[active], mask[active]
+            spread = current.copy()
+            np.maximum(spread[:, 1:, :], current[:, :-1, :], out=spread[:, 1:, :])
+            np.maximum(spread[:, :-1, :], current[:, 1:, :], out=spread[:, :-1, :])
+            np.maximum(spread[:, :, 1:], current[:, :, :-1], out=spread[:, :, 1:])
+            np.maximum(spread[:, :, :-1], current[:, :, 1:], out=spread[:, :, :-1])
+            spread[~current_mask] = 0
+            changed = (spread != current).reshape(len(active), -1).any(axis=1)
+            labels[active] = spread
+            active = active[changed]
+        return labels
+
+    @staticmethod
+    def get_clusters_batch(
+        config: Config,
+        symbol_storage: object,
+        boards: np.ndarray,
+        multipliers: np.ndarray = None,
+        global_multiplier: int = 1,
+        wild_key: str = "wild",
+    ) -> dict:
+        """
+        Cluster sizes and pays of many boards at once, without creating symbols or win data.
+        boards is an (n, reels, rows) array of symbol ids (see Board.draw_boards(), -1 cells are empty).
+        Clusters follow get_clusters(): the connected cells of one symbol, with wilds joining every cluster
+        they touch. Pays follow evaluate_clusters(), using the optional (n, reels, rows) array of symbol
+        multipliers (NaN or <= 0 if unset). Returns:
+            "symbols": evaluated symbol names (all registered non-wild symbols)
+            "cluster_counts": (n, symbols, cells + 1) number of clusters of each size
+            "symbol_wins": (n, symbols) pay per symbol
+            "total_win": (n,) pay per board
+        """
+        boards = np.asarray(boards)
+        num_boards, num_cells = len(boards), boards.shape[1] * boards.shape[2]
+        wild_ids = [
+            symbol_storage.symbol_ids[name]
+            for name in config.special_symbols.get(wild_key, [])
+            if name in symbol_storage.symbol_ids
+        ]
+        symbols = [
+            name
+            for name, defn in zip(symbol_storage.symbol_names, symbol_storage.defs_by_id)
+            if defn is not None and not defn.flag_mask & get_attribute_bit(wild_key)
+        ]
+        is_wild = np.isin(boards, wild_ids)
+        if multipliers is None:
+            cell_mult = np.zeros(num_boards * num_cells)
+        else:
+            cell_mult = np.nan_to_num(np.asarray(multipliers, dtype=float), nan=0.0).reshape(-1).clip(0)
+
+        label_keys = (np.arange(num_boards)[:, None] * (num_cells + 1)).reshape(num_boards, 1, 1)
+        cluster_counts = np.zeros((num_boards, len(symbols), num_cells + 1), dtype=np.int64)
+        symbol_wins = np.zeros((num_boards, len(symbols)))
+        pay_table = get_compiled_paytable(config).get_pays(symbols, num_cells)
+        for symbol_idx, name in enumerate(symbols):
+            is_symbol = boards == symbol_storage.symbol_ids[name]
+            labels = Cluster.label_components_batch(is_symbol | is_wild)
+            keys = (labels + label_keys).reshape(-1)
+            in_cluster = labels.reshape(-1) > 0
+            sizes = np.bincount(keys[in_cluster], minlength=num_boards * (num_cells + 1))
+            seeded = np.bincount(keys[is_symbol.reshape(-1)], minlength=len(sizes)) > 0
+            cluster_keys = np.flatnonzero(seeded)
+            cluster_sizes = sizes[cluster_keys]
+            cluster_boards = cluster_keys // (num_cells + 1)
+            cluster_counts[:, symbol_idx, :] = np.bincount(
+                cluster_boards * (num_cells + 1) + cluster_sizes, minlength=num_boards * (num_cells + 1)
+            ).reshape(num_boards, num_cells + 1)
+
+            pays = pay_table[symbol_idx, cluster_sizes]
+            mults = np.bincount(keys[in_cluster], weights=cell_mult[in_cluster], minlength=len(sizes))[cluster_keys]
+            symbol_wins[:, symbol_idx] = np.bincount(
+                cluster_boards, weights=pays * np.maximum(mults, 1) * global_multiplier, minlength=num_boards
+            )
+
+        return {
+            "symbols": symbols,
+            "cluster_counts": cluster_counts,
+            "symbol_wins": symbol_wins,
+            "total_win": symbol_wins.sum(axis=1),
+        }
+
+    @staticmethod
+    def get_cluster_win_details(cluster: list, global_multiplier: int, cluster_mult: int, sym_win: float) -> dict:
+        """Positions and meta keys of a cluster win, built when the win is first read."""
+        json_positions = [{"reel": p[0], "row": p[1]} for p in cluster]
+        central_pos = Cluster.get_central_cluster_position(json_positions)
+        return {
+            "positions": json_positions,
+            "meta": {
+                "globalMult": global_multiplier,
+                "clusterMult": cluster_mult,
+                "winWithoutMult": sym_win,
+                "overlay": {"reel": central_pos[0], "row": central_pos[1]},
+            },
+        }
+
     @staticmethod
     def evaluate_clusters(
         config: Config,
@@ -115,47 +226,50 @@ class Cluster:
         multiplier_key: str = "multiplier",
         return_data: dict = {"totalWin": 0, "wins": []},
     ) -> type:
-        """Determine payout amount from cluster, including symbol multiplier and global multiplier value."""
-        exploding_symbols = []
+        """
+        Determine payout amount from cluster, including symbol multiplier and global multiplier value.
+        A CompactBoard is read from its multiplier array and has its explode array set.
+        """
         total_win = 0
+        paytable = get_compiled_paytable(config)
+        compact = is_compact(board) and multiplier_key in CompactBoard.array_attributes
+        if compact:
+            values = board.split_reels(board.get_values(multiplier_key))
         for sym in clusters:
             for cluster in clusters[sym]:
                 syms_in_cluster = len(cluster)
-                if (syms_in_cluster, sym) in config.paytable:
+                sym_win = paytable.get(syms_in_cluster, sym)
+                if sym_win is not None:
                     cluster_mult = 0
                     for positions in cluster:
-                        if board[positions[0]][positions[1]].check_attribute(multiplier_key):
+                        if compact:
+                            value = values[positions[0]][positions[1]]
+                            if value is not None and int(value) > 0:
+                                cluster_mult += value
+                        elif board[positions[0]][positions[1]].check_attribute(multiplier_key):
                             if int(board[positions[0]][positions[1]].get_attribute(multiplier_key)) > 0:
                                 cluster_mult += board[positions[0]][positions[1]].get_attribute(multiplier_key)
                     cluster_mult = max(cluster_mult, 1)
-                    sym_win = config.paytable[(syms_in_cluster, sym)]
                     symwin_mult = sym_win * cluster_mult * global_multiplier
                     total_win += symwin_mult
-                    json_positions = [{"reel": p[0], "row": p[1]} for p in cluster]
-
-                    central_pos = Cluster.get_central_cluster_position(json_positions)
                     return_data["wins"] += [
-                        {
-                            "symbol": sym,
-                            "clusterSize": syms_in_cluster,
-                            "win": symwin_mult,
-                            "positions": json_positions,
-                            "meta": {
-                                "globalMult": global_multiplier,
-                                "clusterMult": cluster_mult,
-                                "winWithoutMult": sym_win,
-                                "overlay": {"reel": central_pos[0], "row": central_pos[1]},
-                            },
-                        }
+                        WinRecord(
+                            {"symbol": sym, "clusterSize": syms_in_cluster, "win": symwin_mult},
+                            Cluster.get_cluster_win_details,
+                            cluster,
+                            global_multiplier,
+                            cluster_mult,
+                            sym_win,
+                            summary={"globalMult": global_multiplier, "clusterMult": cluster_mult},
+                        )
                     ]
 
-                    for positions in cluster:
-                        board[positions[0]][positions[1]].explode = True
-                        if {
-                            "reel": positions[0],
-                            "row": positions[1],
-                        } not in exploding_symbols:
-                            exploding_symbols.append({"reel": positions[0], "row": positions[1]})
+                    if compact:
+                        board.set_explode([board.cell_index(reel, row) for reel, row in cluster])
+                    else:
+                        for positions in cluster:
+                            board[positions[0]][positions[1]] = board[positions[0]][positions[1]].mutable()
+                            board[positions[0]][positions[1]].assign_attribute({"explode": True})
 
         return board, return_data, total_win
 
@@ -194,7 +308,7 @@ class Cluster:
                 {
                     "kind": win["clusterSize"],
                     "symbol": win["symbol"],
-                    "mult": int(win["meta"]["globalMult"] + win["meta"]["clusterMult"]),
+                    "mult": int(get_summary(win, "globalMult") + get_summary(win, "clusterMult")),
                     "gametype": gamestate.gametype,
                 }
             )
@@ -0,0 +1,238 @@
+"""Flat array-backed board representation."""
+
+import math
+import numpy as np
+from src.calculations.symbol import Symbol, get_attribute_bit
+
+
+def is_compact(board: object) -> bool:
+    """Whether a board is a CompactBoard whose nested view has not been built, so its arrays can be read directly."""
+    return isinstance(board, CompactBoard) and board._view is None
+
+
+def get_flag_masks(symbol_storage: object) -> np.ndarray:
+    """Special flag mask of every symbol id (0 for unregistered ids), rebuilt when the storage numbers new names."""
+    flag_masks = getattr(symbol_storage, "flag_masks", None)
+    if flag_masks is None or len(flag_masks) != len(symbol_storage.defs_by_id):
+        flag_masks = np.array(
+            [0 if defn is None else defn.flag_mask for defn in symbol_storage.defs_by_id], dtype=np.int64
+        )
+        symbol_storage.flag_masks = flag_masks
+    return flag_masks
+
+
+def get_default_values(symbol_storage: object, attribute: str) -> np.ndarray:
+    """
+    Value of an array attribute on a new symbol of every id (see Symbol.assign_default_attribute), NaN where
+    unset or for unregistered ids. Rebuilt when the storage numbers new names.
+    """
+    default_values = getattr(symbol_storage, "default_values", None)
+    if default_values is None:
+        default_values = symbol_storage.default_values = {}
+    values = default_values.get(attribute)
+    if values is None or len(values) != len(symbol_storage.shared_by_id):
+        values = np.array(
+            [
+                np.nan if sym is None or getattr(sym, attribute) is None else getattr(sym, attribute)
+                for sym in symbol_storage.shared_by_id
+            ],
+            dtype=float,
+        )
+        default_values[attribute] = values
+    return values
+
+
+def restore_number(value: float):
+    """Attribute value stored in a float array: None if unset, int if integral."""
+    if math.isnan(value):
+        return None
+    return int(value) if float(value).is_integer() else float(value)
+
+
+class CompactBoard:
+    """
+    Board stored as flat, reel-major arrays: integer symbol ids (see SymbolStorage.get_symbol_id) and parallel
+    multiplier/prize/explode arrays. Unset multipliers and prizes are NaN. Multipliers and prizes which are not
+    given take the defaults of the symbol definitions (i.e. 1 for symbols with the multiplier special flag).
+    The win evaluators read the arrays directly (see is_compact). The nested list[list[Symbol]] view used by
+    game code and events is built lazily on first access (board[reel][row], iteration).
+    Once the view exists it holds the board state, and the arrays are re-read from it when requested.
+    """
+
+    array_attributes = ("multiplier", "prize")
+
+    def __init__(
+        self,
+        symbol_storage: object,
+        num_rows: list,
+        ids: np.ndarray,
+        multiplier: np.ndarray = None,
+        prize: np.ndarray = None,
+        explode: np.ndarray = None,
+    ):
+        self.symbol_storage = symbol_storage
+        self.set_shape(num_rows)
+        num_cells = self.offsets[-1]
+        self._ids = np.asarray(ids, dtype=np.int32).reshape(num_cells)
+        if multiplier is None:
+            self._multiplier = get_default_values(symbol_storage, "multiplier")[self._ids]
+        else:
+            self._multiplier = np.asarray(multiplier, dtype=float)
+        if prize is None:
+            self._prize = get_default_values(symbol_storage, "prize")[self._ids]
+        else:
+            self._prize = np.asarray(prize, dtype=float)
+        self._explode = np.zeros(num_cells, dtype=bool) if explode is None else np.asarray(explode, dtype=bool)
+        self._view = None
+
+    @classmethod
+    def from_symbols(cls, board: list, symbol_storage: object) -> "CompactBoard":
+        """Compact copy of a nested list[list[Symbol]] board."""
+        symbols = [sym for reel in board for sym in reel]
+        return cls(
+            symbol_storage,
+            [len(reel) for reel in board],
+            [symbol_storage.get_symbol_id(sym.name) for sym in symbols],
+            [np.nan if sym.multiplier is None else sym.multiplier for sym in symbols],
+            [np.nan if sym.prize is None else sym.prize for sym in symbols],
+            [sym.explode for sym in symbols],
+        )
+
+    @classmethod
+    def from_ids(cls, board_ids: np.ndarray, num_rows: list, symbol_storage: object) -> "CompactBoard":
+        """
+        Board from a (reels, max(num_rows)) array of symbol ids, as returned by Board.draw_boards().
+        Special symbol functions are not applied, cells take the default multipliers and prizes of their symbols.
+        """
+        return cls(
+            symbol_storage, num_rows, np.concatenate([board_ids[reel, :rows] for reel, rows in enumerate(num_rows)])
+        )
+
+    def set_shape(self, num_rows: list) -> None:
+        """Reel offsets and per-cell reel/row indexes for a board shape."""
+        self.num_rows = list(num_rows)
+        self.offsets = [0]
+        for rows in self.num_rows:
+            self.offsets.append(self.offsets[-1] + rows)
+        self.cell_reel = np.repeat(np.arange(len(self.num_rows)), self.num_rows)
+        self.cell_row = np.arange(self.offsets[-1]) - np.repeat(self.offsets[:-1], self.num_rows)
+
+    def cell_index(self, reel: int, row: int) -> int:
+        """Position of a board cell in the flat arrays."""
+        return self.offsets[reel] + row
+
+    def get_positions(self, cells: list) -> list:
+        """{"reel", "row"} dictionaries of flat cell indexes, in the format used by win data and events."""
+        return [{"reel": int(self.cell_reel[cell]), "row": int(self.cell_row[cell])} for cell in cells]
+
+    @property
+    def ids(self) -> np.ndarray:
+        """Symbol id of every cell."""
+        self.sync_from_view()
+        return self._ids
+
+    @property
+    def multiplier(self) -> np.ndarray:
+        """Multiplier of every cell (NaN if not set)."""
+        self.sync_from_view()
+        return self._multiplier
+
+    @property
+    def prize(self) -> np.ndarray:
+        """Prize of every cell (NaN if not set)."""
+        self.sync_from_view()
+        return self._prize
+
+    @property
+    def explode(self) -> np.ndarray:
+        """Explode flag of every cell."""
+        self.sync_from_view()
+        return self._explode
+
+    def get_mask(self) -> np.ndarray:
+        """Attribute bitmask of every cell (see Symbol.mask)."""
+        mask = get_flag_masks(self.symbol_storage)[self.ids]
+        # as on Symbol, zero values do not set their bit
+        mask[~np.isnan(self._multiplier) & (self._multiplier != 0)] |= get_attribute_bit("multiplier")
+        mask[~np.isnan(self._prize) & (self._prize != 0)] |= get_attribute_bit("prize")
+        mask[self._explode] |= get_attribute_bit("explode")
+        return mask
+
+    def get_names(self) -> list:
+        """Symbol name of every cell."""
+        symbol_names = self.symbol_storage.symbol_names
+        return [symbol_names[symbol_id] for symbol_id in self.ids.tolist()]
+
+    def get_values(self, attribute: str) -> list:
+        """Value of an array attribute (see array_attributes) for every cell, None where unset, as on Symbol."""
+        return [restore_number(value) for value in getattr(self, attribute).tolist()]
+
+    def split_reels(self, cells: list) -> list:
+        """Per-cell list split into one list per reel, indexed [reel][row] like the nested board."""
+        return [cells[start:end] for start, end in zip(self.offsets[:-1], self.offsets[1:])]
+
+    def set_explode(self, cells: list) -> None:
+        """Mark cells as exploding, on the nested view if it has been built."""
+        if self._view is None:
+            self._explode[list(cells)] = True
+            return
+        for cell in cells:
+            reel, row = int(self.cell_reel[cell]), int(self.cell_row[cell])
+            self._view[reel][row] = self._view[reel][row].mutable()
+            self._view[reel][row].explode = True
+
+    def sync_from_view(self) -> None:
+        """Re-read the arrays from the nested view, if it has been built (and possibly modified)."""
+        if self._view is None:
+            return
+        symbols = [sym for reel in self._view for sym in reel]
+        if [len(reel) for reel in self._view] != self.num_rows:
+            self.set_shape([len(reel) for reel in self._view])
+        self._ids = np.array([self.symbol_storage.get_symbol_id(sym.name) for sym in symbols], dtype=np.int32)
+        self._multiplier = np.array([np.nan if sym.multiplier is None else sym.multiplier for sym in symbols])
+        self._prize = np.array([np.nan if sym.prize is None else sym.prize for sym in symbols])
+        self._explode = np.array([sym.explode for sym in symbols], dtype=bool)
+
+    def as_nested(self) -> list:
+        """
+        Nested list[list[Symbol]] view, built on first use.
+        Cells without their own attributes use the shared symbol instances (see SharedSymbol).
+        """
+        if self._view is None:
+            shared_by_id = self.symbol_storage.shared_by_id
+            symbols = []
+            for cell, symbol_id in enumerate(self._ids.tolist()):
+                sym = shared_by_id[symbol_id]
+                if sym is None:
+                    raise ValueError(f"unregistered symbol id {symbol_id}")
+                multiplier, prize = self._multiplier[cell], self._prize[cell]
+                if (
+                    self._explode[cell]
+                    or (np.isnan(multiplier) != (sym.multiplier is None))
+                    or (not np.isnan(multiplier) and multiplier != sym.multiplier)
+                    or (np.isnan(prize) != (sym.prize is None))
+                    or (not np.isnan(prize) and prize != sym.prize)
+                ):
+                    sym = Symbol(sym.defn)
+                    sym.assign_attribute(
+                        {
+                            "multiplier": restore_number(multiplier),
+                            "prize": restore_number(prize),
+                            "explode": bool(self._explode[cell]),
+                        }
+                    )
+                symbols.append(sym)
+            self._view = [symbols[start:end] for start, end in zip(self.offsets[:-1], self.offsets[1:])]
+        return self._view
+
+    def __len__(self) -> int:
+        return len(self.num_rows)
+
+    def __getitem__(self, reel: int) -> list:
+        return self.as_nested()[reel]
+
+    def __setitem__(self, reel: int, symbols: list) -> None:
+        self.as_nested()[reel] = symbols
+
+    def __iter__(self):
+        return iter(self.as_nested())
@@ -1,8 +1,12 @@
 """Evaluates and records winds for lines games."""
 
-from src.calculations.symbol import Symbol
+import numpy as np
+from src.calculations.symbol import Symbol, get_attribute_bit
+from src.calculations.compact_board import is_compact
 from src.config.config import Config
+from src.config.paytable import get_compiled_paytable
 from src.wins.multiplier_strategy import apply_mult
+from src.wins.win_record import WinRecord, get_summary
 from src.events.events import (
     win_info_event,
     set_win_event,
@@ -14,16 +18,121 @@ class Lines:
     """Collection of functions to handle line-win games."""
 
     @staticmethod
-    def line_win_info(symbol: str, kind: int, win: float, positions: list, meta_data: dict) -> dict:
-        """Construct line-win event key."""
+    def line_win_info(
+        symbol: str,
+        kind: int,
+        win: float,
+        line: list,
+        line_index: int,
+        applied_mult: int,
+        win_without_mult: float,
+        global_multiplier: int,
+    ) -> WinRecord:
+        """Construct line-win event key, the positions and meta keys are built when first read."""
+        return WinRecord(
+            {"symbol": symbol, "kind": kind, "win": win},
+            Lines.get_line_win_details,
+            kind,
+            line,
+            line_index,
+            applied_mult,
+            win_without_mult,
+            global_multiplier,
+            summary={"positionCount": kind, "multiplier": applied_mult},
+        )
+
+    @staticmethod
+    def get_line_win_details(
+        kind: int, line: list, line_index: int, applied_mult: int, win_without_mult: float, global_multiplier: int
+    ) -> dict:
+        """Positions and meta keys of a line win."""
+        return {
+            "positions": [{"reel": idx, "row": line[idx]} for idx in range(kind)],
+            "meta": {
+                "lineIndex": line_index,
+                "multiplier": applied_mult,
+                "winWithoutMult": win_without_mult,
+                "globalMult": int(global_multiplier),
+                "lineMultiplier": int(applied_mult / global_multiplier),
+            },
+        }
+
+    @staticmethod
+    def get_payline_matrix(config: Config) -> tuple:
+        """
+        config.paylines compiled to a (lines, reels) array of rows, with the matching list of line indexes.
+        Cached on the config and rebuilt if config.paylines is replaced.
+        """
+        compiled = getattr(config, "compiled_paylines", None)
+        if compiled is None or compiled[0] is not config.paylines:
+            line_indexes = list(config.paylines.keys())
+            matrix = np.array([config.paylines[line_index] for line_index in line_indexes], dtype=np.int64)
+            compiled = (config.paylines, line_indexes, matrix.reshape(len(line_indexes), -1))
+            config.compiled_paylines = compiled
+        return compiled[1:]
+
+    @staticmethod
+    def get_line_kinds(config: Config, board_ids: np.ndarray, is_wild: np.ndarray, wild_sym: str = "W") -> dict:
+        """
+        Evaluate every payline of many boards at once.
+        board_ids is an (n, reels, rows) array of compiled paytable symbol ids (-1 for symbols which never pay),
+        and is_wild the matching boolean array of wild cells. Along each line, the wild prefix is paid as
+        wild_sym, and the first non-wild symbol is paid for its run including any wilds.
+        Returns (n, lines) arrays: "wild_matches", "symbol" (first non-wild id, -1 for wild-only lines),
+        "kind" (run length of symbol), "wild_win" and "base_win".
+        """
+        paytable = get_compiled_paytable(config)
+        _, payline_matrix = Lines.get_payline_matrix(config)
+        num_reels = payline_matrix.shape[1]
+        reels = np.arange(num_reels)
+        line_ids = board_ids[:, reels, payline_matrix]
+        line_wild = is_wild[:, reels, payline_matrix]
+
+        wild_matches = np.where(line_wild.all(axis=2), num_reels, line_wild.argmin(axis=2))
+        first_non_wild = np.take_along_axis(line_ids, wild_matches.clip(max=num_reels - 1)[..., None], axis=2)[..., 0]
+        first_non_wild = np.where(wild_matches < num_reels, first_non_wild, -1)
+        matching = line_wild | (line_ids == first_non_wild[..., None])
+        kind = np.where(matching.all(axis=2), num_reels, matching.argmin(axis=2))
+        kind = np.where(first_non_wild >= 0, kind, 0)
+
+        pays = paytable.get_padded_pays(num_reels)
         return {
-            "symbol": symbol,
+            "wild_matches": wild_matches,
+            "symbol": first_non_wild,
             "kind": kind,
-            "win": win,
-            "positions": positions,
-            "meta": meta_data,
+            "wild_win": pays[paytable.symbol_ids.get(wild_sym, -1), wild_matches],
+            "base_win": pays[first_non_wild, kind],
         }
 
+    @staticmethod
+    def get_lines_batch(
+        config: Config,
+        symbol_storage: object,
+        boards: np.ndarray,
+        wild_key: str = "wild",
+        wild_sym: str = "W",
+        global_multiplier: int = 1,
+    ) -> dict:
+        """
+        Line pays of many boards at once, without creating symbols or win data.
+        boards is an (n, reels, rows) array of SymbolStorage ids (see Board.draw_boards(), -1 cells are empty).
+        Pays follow get_lines() without symbol multipliers. Returns the get_line_kinds() arrays, with "symbol"
+        as compiled paytable ids, plus "line_win" (n, lines) and "total_win" (n,).
+        """
+        paytable = get_compiled_paytable(config)
+        wild_bit = get_attribute_bit(wild_key)
+        id_map = np.array(
+            [paytable.symbol_ids.get(name, -1) for name in symbol_storage.symbol_names] + [-1], dtype=np.int64
+        )
+        wild_map = np.array(
+            [defn is not None and bool(defn.flag_mask & wild_bit) for defn in symbol_storage.defs_by_id] + [False]
+        )
+        boards = np.asarray(boards)
+        line_kinds = Lines.get_line_kinds(config, id_map[boards], wild_map[boards], wild_sym)
+        line_win = np.maximum(line_kinds["wild_win"], line_kinds["base_win"]) * global_multiplier
+        line_kinds.update({"line_win": line_win, "total_win": line_win.sum(axis=1)})
+        return line_kinds
+
     @staticmethod
     def get_lines(
         board: list[list[Symbol]],
@@ -33,92 +142,75 @@ class Lines:
         multiplier_method: str = "symbol",
         global_multiplier: int = 1,
     ):
-        """More efficient lines calculation"""
+        """
+        More efficient lines calculation.
+        Symbol names and wild flags are read once per board cell, from the symbol ids and masks of a CompactBoard.
+        """
         return_data = {
             "totalWin": 0,
             "wins": [],
         }
 
+        wild_bit = get_attribute_bit(wild_key)
+        paytable = get_compiled_paytable(config)
+        if is_compact(board):
+            names = board.split_reels(board.get_names())
+            is_wild = board.split_reels([bool(mask & wild_bit) for mask in board.get_mask().tolist()])
+        else:
+            names = [[sym.name for sym in reel] for reel in board]
+            is_wild = [[bool(sym.mask & wild_bit) for sym in reel] for reel in board]
         for line_index in config.paylines.keys():
             line = config.paylines[line_index]
-            first_sym = board[0][line[0]]
-            finished_wild_win = False if first_sym.check_attribute(wild_key) else True
-            first_non_wild = first_sym if finished_wild_win else None
-            potential_line = [first_sym]
+            finished_wild_win = not is_wild[0][line[0]]
+            first_non_wild = names[0][line[0]] if finished_wild_win else None
 
             wild_matches = 0 * (finished_wild_win) + 1 * (not (finished_wild_win))
             matches = 1 * (finished_wild_win) + 0 * (not (finished_wild_win))
             base_win, wild_win = 0, 0
 
             for reel in range(1, len(line)):
-                sym = board[reel][line[reel]]
+                name, wild = names[reel][line[reel]], is_wild[reel][line[reel]]
                 if finished_wild_win:
-                    if sym.name == first_non_wild.name or sym.check_attribute(wild_key):
+                    if name == first_non_wild or wild:
                         matches += 1
                     else:
                         break
                 else:
-                    if sym.check_attribute(wild_key) and first_non_wild is None:
+                    if wild and first_non_wild is None:
                         wild_matches += 1
                     elif first_non_wild is None:
-                        first_non_wild = sym
+                        first_non_wild = name
                         matches += 1
                         finished_wild_win = True
                     else:
                         break
-                potential_line.append(sym)
 
-            if (wild_matches, wild_sym) in config.paytable:
-                wild_win = config.paytable[(wild_matches, wild_sym)]
+            wild_win = paytable.get(wild_matches, wild_sym) or wild_win
             if first_non_wild is not None:
-                if (wild_matches + matches, first_non_wild.name) in config.paytable:
-                    base_win = config.paytable[(wild_matches + matches, first_non_wild.name)]
+                base_win = paytable.get(wild_matches + matches, first_non_wild) or base_win
 
             if base_win > 0 or wild_win > 0:
                 if wild_win > base_win:
-                    positions = [{"reel": idx, "row": line[idx]} for idx in range(0, wild_matches)]
-                    line_win, applied_mult = apply_mult(
-                        board,
-                        multiplier_method,
-                        global_multiplier=global_multiplier,
-                        win_amount=wild_win,
-                        positions=positions,
-                    )
-                    win_dict = Lines.line_win_info(
-                        potential_line[0].name,
-                        wild_matches,
-                        line_win,
-                        positions,
-                        {
-                            "lineIndex": line_index,
-                            "multiplier": applied_mult,
-                            "winWithoutMult": wild_win,
-                            "globalMult": int(global_multiplier),
-                            "lineMultiplier": int(applied_mult / global_multiplier),
-                        },
-                    )
+                    symbol, kind, win_without_mult = names[0][line[0]], wild_matches, wild_win
                 else:
-                    positions = [{"reel": idx, "row": line[idx]} for idx in range(0, matches + wild_matches)]
-                    line_win, applied_mult = apply_mult(
-                        board,
-                        multiplier_method,
-                        global_multiplier=global_multiplier,
-                        win_amount=base_win,
-                        positions=positions,
-                    )
-                    win_dict = Lines.line_win_info(
-                        first_non_wild.name,
-                        matches + wild_matches,
-                        line_win,
-                        positions,
-                        {
-                            "lineIndex": line_index,
-                            "multiplier": applied_mult,
-                            "winWithoutMult": base_win,
-                            "globalMult": int(global_multiplier),
-                            "lineMultiplier": int(applied_mult / global_multiplier),
-                        },
-                    )
+                    symbol, kind, win_without_mult = first_non_wild, matches + wild_matches, base_win
+                line_win, applied_mult = apply_mult(
+                    board,
+                    multiplier_method,
+                    global_multiplier=global_multiplier,
+                    win_amount=win_without_mult,
+                    positions=list(enumerate(line[:kind])),
+                )
+                win_dict = Lines.line_win_info(
+                    symbol,
+                    kind,
+                    line_win,
+                    line,
+                    line_index,
+                    applied_mult,
+                    win_without_mult,
+                    global_multiplier,
+                )
 
                 return_data["totalWin"] += line_win
                 return_data["wins"].append(win_dict)
@@ -143,4 +235,6 @@ class Lines:
             gamestate.record({"kind": kind, "symbol": symbol, "mult": mult, "gametype": gametype})
 
         for win in gamestate.win_data["wins"]:
-            record_line(len(win["positions"]), win["symbol"], win["meta"]["multiplier"], gamestate.gametype)
+            record_line(
+                get_summary(win, "positionCount"), win["symbol"], get_summary(win, "multiplier"), gamestate.gametype
+            )
@@ -0,0 +1,229 @@
+"""Integer-encoded reelstrips used for board generation."""
+
+from bisect import bisect
+import numpy as np
+
+
+class CompiledReelstrip:
+    """
+    Reelstrip symbols encoded as integer symbol ids (see SymbolStorage.get_symbol_id).
+    All reels are stored in a single flat array, reel r occupying symbols[offsets[r] : offsets[r] + lengths[r]].
+    """
+
+    def __init__(self, reelstrip: list, symbol_storage: object):
+        self.source = reelstrip
+        self.num_reels = len(reelstrip)
+        self.lengths = np.array([len(reel) for reel in reelstrip], dtype=np.int64)
+        self.offsets = np.zeros(self.num_reels, dtype=np.int64)
+        self.offsets[1:] = np.cumsum(self.lengths)[:-1]
+        self.symbols = np.array(
+            [symbol_storage.get_symbol_id(name) for reel in reelstrip for name in reel], dtype=np.int32
+        )
+        self.reel_lengths = self.lengths.tolist()
+        self.window_layout = None
+
+    def gather(self, reel_positions: list, window: "BoardWindow") -> list:
+        """Symbol ids of every cell in the window for the given reel stops, in window order."""
+        cell_starts, cell_lengths = self.get_window_layout(window)
+        stops = np.asarray(reel_positions, dtype=np.int64)[window.cell_reel]
+        return self.symbols[cell_starts + (stops + window.cell_offset) % cell_lengths].tolist()
+
+    def gather_boards(self, reel_stops: np.ndarray, num_rows: list) -> np.ndarray:
+        """
+        Symbol ids of the visible board for each row of an (n, reels) array of reel stops.
+        Returns an (n, reels, max(num_rows)) array; rows beyond num_rows[reel] are filled with -1.
+        """
+        num_rows = np.asarray(num_rows, dtype=np.int64)
+        rows = np.arange(num_rows.max(), dtype=np.int64)
+        reels = np.arange(len(num_rows))
+        positions = (reel_stops[:, :, None] + rows) % self.lengths[reels][:, None]
+        boards = self.symbols[self.offsets[reels][:, None] + positions]
+        boards[:, rows[None, :] >= num_rows[:, None]] = -1
+        return boards
+
+    def get_window_layout(self, window: "BoardWindow") -> tuple:
+        """Per-cell reel offsets and lengths for a board window, cached per window."""
+        if self.window_layout is None or self.window_layout[0] is not window:
+            self.window_layout = (window, self.offsets[window.cell_reel], self.lengths[window.cell_reel])
+        return self.window_layout[1:]
+
+
+class BoardWindow:
+    """
+    Cells read from the reelstrip for a board shape. For each reel the padding symbol above the board
+    and the padding symbol below are listed first (if used), followed by the board rows. This is the order
+    symbols have always been created in, which matters when special symbol functions draw random values.
+    """
+
+    def __init__(self, num_rows: list, include_padding: bool):
+        self.num_rows = list(num_rows)
+        self.include_padding = include_padding
+        cell_reel, cell_offset, self.reel_slices = [], [], []
+        for reel, rows in enumerate(self.num_rows):
+            offsets = ([-1, rows] if include_padding else []) + list(range(rows))
+            self.reel_slices.append((len(cell_offset), len(cell_offset) + len(offsets)))
+            cell_reel += [reel] * len(offsets)
+            cell_offset += offsets
+        self.cell_reel = np.array(cell_reel, dtype=np.int64)
+        self.cell_offset = np.array(cell_offset, dtype=np.int64)
+
+
+class ReelStopIndex:
+    """
+    Stop positions of a target symbol (a symbol name or a config.special_symbols key) on each reel of a reelstrip,
+    with the number of targets visible in the window starting at every stop. Windows showing more than one
+    target (stacked symbols) are listed in stacked_windows.
+    """
+
+    def __init__(self, reelstrip: list, target_names: set, num_rows: list):
+        self.source = reelstrip
+        self.num_rows = list(num_rows)
+        self.stops, self.probabilities, self.window_counts, self.stacked_windows = [], [], [], []
+        self.reel_lengths, self.windows_by_count, self.single_target_stops = [], [], []
+        for reel, rows in enumerate(self.num_rows):
+            strip = reelstrip[reel]
+            is_target = np.array([name in target_names for name in strip], dtype=np.int64)
+            counts = np.zeros(len(strip), dtype=np.int64)
+            for row in range(rows):
+                counts += np.roll(is_target, -row)
+            self.stops.append(np.flatnonzero(is_target).tolist())
+            self.probabilities.append(len(self.stops[-1]) / len(strip))
+            self.window_counts.append(counts)
+            self.stacked_windows.append(np.flatnonzero(counts > 1).tolist())
+            self.reel_lengths.append(len(strip))
+            windows = {}
+            for position, count in enumerate(counts.tolist()):
+                windows.setdefault(count, []).append(position)
+            self.windows_by_count.append(dict(sorted(windows.items())))
+            single_target_stops = {}
+            for position in windows.get(1, []):
+                for row in range(rows):
+                    if is_target[(position + row) % len(strip)]:
+                        single_target_stops[position] = (position + row) % len(strip)
+            self.single_target_stops.append(single_target_stops)
+        self.max_count = sum(int(counts.max()) if len(counts) > 0 else 0 for counts in self.window_counts)
+        self.count_lists = [counts.tolist() for counts in self.window_counts]
+        self.count_tables = {}
+        self.position_weights = {}
+        self.layout_weights = {}
+
+    def count_on_board(self, reel_positions: list) -> int:
+        """Number of targets visible on the board for the given reel stops."""
+        return sum(int(counts[position % len(counts)]) for counts, position in zip(self.window_counts, reel_positions))
+
+    def get_count_table(self, max_count: int) -> list:
+        """
+        table[reel][m] is the number of stop combinations of reels reel..end showing fewer than m targets,
+        for m in 0..max_count (exact integers).
+        """
+        if max_count not in self.count_tables:
+            table = [[1 if m > 0 else 0 for m in range(max_count + 1)]]
+            for windows in reversed(self.windows_by_count):
+                following = table[0]
+                table.insert(
+                    0,
+                    [
+                        sum(len(positions) * following[m - count] for count, positions in windows.items() if count < m)
+                        for m in range(max_count + 1)
+                    ],
+                )
+            self.count_tables[max_count] = table
+        return self.count_tables[max_count]
+
+    def get_position_weights(self, max_count: int) -> list:
+        """
+        weights[reel][m] is the cumulative number of completions of the board over the stops of a reel,
+        given that fewer than m targets may still show on reels reel..end.
+        """
+        if max_count not in self.position_weights:
+            table = self.get_count_table(max_count)
+            weights = []
+            for reel, counts in enumerate(self.window_counts):
+                following = np.array(table[reel + 1] + [0], dtype=np.float64)
+                remaining = np.arange(max_count + 1)[:, None] - counts[None, :]
+                weights.append(np.cumsum(np.where(remaining > 0, following[remaining.clip(0)], 0.0), axis=1).tolist())
+            self.position_weights[max_count] = weights
+        return self.position_weights[max_count]
+
+    def get_below_probability(self, max_count: int) -> float:
+        """Probability that uniformly drawn stops show fewer than max_count targets."""
+        total = 1
+        for length in self.reel_lengths:
+            total *= length
+        return self.get_count_table(max_count)[0][max_count] / total
+
+    def sample_below(self, max_count: int, rng: object) -> list:
+        """
+        Reel stops drawn uniformly from the layouts showing fewer than max_count targets.
+        Each reel's stop is drawn from its exact conditional distribution given the reels before it
+        (weighted by the number of completions of the remaining reels), so no layouts are rejected.
+        """
+        weights = self.get_position_weights(max_count)
+        remaining = max_count
+        reel_positions = []
+        for reel, reel_weights in enumerate(weights):
+            cumulative = reel_weights[remaining]
+            if cumulative[-1] <= 0:
+                raise RuntimeError(f"No layout with fewer than {max_count} targets")
+            position = bisect(cumulative, rng.random() * cumulative[-1])
+            reel_positions.append(position)
+            remaining -= self.count_lists[reel][position]
+        return reel_positions
+
+    def get_layout_weights(self, num_targets: int) -> dict:
+        """
+        Acceptance weight of each set of forced reels for Board._force_special_board with num_targets targets,
+        or None if fewer reels than num_targets contain the target.
+        Reels are chosen one at a time with probability proportional to their target density, the target is
+        placed on a uniformly chosen row, the other reels are drawn uniformly and the layout is accepted when
+        exactly num_targets targets show. A set of forced reels is accepted with weight:
+            P(choosing the set, in any order) * prod(forced: P(window shows one target))
+            * prod(others: P(window shows no targets))
+        """
+        if num_targets in self.layout_weights:
+            return self.layout_weights[num_targets]
+        possible = [reel for reel, prob in enumerate(self.probabilities) if prob > 0]
+        if len(possible) < num_targets:
+            self.layout_weights[num_targets] = None
+            return None
+        total_prob = sum(self.probabilities[reel] for reel in possible)
+        order_prob = {(): 1.0}
+        for size in range(num_targets):
+            next_prob = {}
+            for chosen, prob in order_prob.items():
+                remaining = total_prob - sum(self.probabilities[reel] for reel in chosen)
+                for reel in possible:
+                    if reel in chosen:
+                        continue
+                    key = tuple(sorted(chosen + (reel,)))
+                    next_prob[key] = next_prob.get(key, 0.0) + prob * self.probabilities[reel] / remaining
+            order_prob = next_prob
+
+        weights = {}
+        for forced, prob in order_prob.items():
+            for reel, windows in enumerate(self.windows_by_count):
+                if reel in forced:
+                    prob *= len(windows.get(1, [])) / (len(self.stops[reel]) * self.num_rows[reel])
+                else:
+                    prob *= len(windows.get(0, [])) / self.reel_lengths[reel]
+            if prob > 0:
+                weights[forced] = prob
+        self.layout_weights[num_targets] = weights
+        return weights
+
+    def sample_forced_layout(self, forced: tuple, rng: object) -> tuple:
+        """
+        Reel stops showing exactly one target on each forced reel and none elsewhere, uniform over such layouts.
+        Returns (reel_positions, force_stop_positions). Forced positions are given as the target stop minus
+        its board row, as drawn by Board.draw_forced_reel_positions.
+        """
+        reel_positions, force_stop_positions = [], {}
+        for reel, windows in enumerate(self.windows_by_count):
+            if reel in forced:
+                position = windows[1][int(rng.random() * len(windows[1]))]
+                stop = self.single_target_stops[reel][position]
+                force_stop_positions[reel] = stop
+                reel_positions.append(stop - (stop - position) % self.reel_lengths[reel])
+            else:
+                reel_positions.append(windows[0][int(rng.random() * len(windows[0]))])
+        return reel_positions, force_stop_positions
@@ -0,0 +1,133 @@
+"""Random number generators owned by the gamestate."""
+
+import random
+from bisect import bisect
+from itertools import accumulate
+import numpy as np
+
+RNG_MODES = ("legacy", "stream")
+
+
+class LegacyRandom:
+    """
+    Draws from the global python `random` module, reseeded for every simulation.
+    Reproduces books generated before the gamestate owned its RNG, including game code which still
+    calls the `random` module directly.
+    """
+
+    mode = "legacy"
+
+    def seed(self, seed: int) -> None:
+        """Reseed the global random module."""
+        random.seed(seed)
+
+    def random(self) -> float:
+        """Float in [0, 1)."""
+        return random.random()
+
+    def uniform(self, a: float, b: float) -> float:
+        """Float in [a, b]."""
+        return random.uniform(a, b)
+
+    def randrange(self, start: int, stop: int = None) -> int:
+        """Integer in [start, stop), or [0, start) if stop is not given."""
+        return random.randrange(start, stop)
+
+    def randint(self, a: int, b: int) -> int:
+        """Integer in [a, b]."""
+        return random.randint(a, b)
+
+    def randranges(self, stops: list) -> list:
+        """One integer in [0, stop) for each stop, drawn in order."""
+        return [random.randrange(0, stop) for stop in stops]
+
+    def randranges_batch(self, stops: list, n: int) -> np.ndarray:
+        """(n, len(stops)) array of integers in [0, stop) per column, drawn row by row."""
+        return np.array([self.randranges(stops) for _ in range(n)], dtype=np.int64).reshape(n, len(stops))
+
+    def choice(self, seq: list):
+        """Uniformly selected element of a non-empty sequence."""
+        return random.choice(seq)
+
+    def choices(self, population: list, weights: list = None, k: int = 1) -> list:
+        """k weighted selections with replacement."""
+        return random.choices(population, weights, k=k)
+
+    def shuffle(self, x: list) -> None:
+        """Shuffle a list in place."""
+        random.shuffle(x)
+
+
+class StreamRandom:
+    """
+    Independent PCG64 stream per simulation, keyed on (base_seed, seed).
+    Every simulation can be regenerated in isolation, without depending on draws made by other
+    simulations or by code sharing the global `random` module.
+    """
+
+    mode = "stream"
+
+    def __init__(self, base_seed: int = 0):
+        self.base_seed = base_seed
+        self.generator = np.random.Generator(np.random.PCG64(np.random.SeedSequence([base_seed, 0])))
+
+    def seed(self, seed: int) -> None:
+        """Start the stream belonging to a simulation seed."""
+        self.generator = np.random.Generator(np.random.PCG64(np.random.SeedSequence([self.base_seed, seed])))
+
+    def random(self) -> float:
+        """Float in [0, 1)."""
+        return float(self.generator.random())
+
+    def uniform(self, a: float, b: float) -> float:
+        """Float in [a, b)."""
+        return a + (b - a) * float(self.generator.random())
+
+    def randrange(self, start: int, stop: int = None) -> int:
+        """Integer in [start, stop), or [0, start) if stop is not given."""
+        if stop is None:
+            start, stop = 0, start
+        if stop <= start:
+            raise ValueError(f"empty range for randrange({start}, {stop})")
+        return int(self.generator.integers(start, stop))
+
+    def randint(self, a: int, b: int) -> int:
+        """Integer in [a, b]."""
+        return self.randrange(a, b + 1)
+
+    def randranges(self, stops: list) -> list:
+        """One integer in [0, stop) for each stop, drawn in a single call."""
+        return self.generator.integers(0, stops).tolist()
+
+    def randranges_batch(self, stops: list, n: int) -> np.ndarray:
+        """(n, len(stops)) array of integers in [0, stop) per column, drawn in a single call."""
+        return self.generator.integers(0, stops, size=(n, len(stops)), dtype=np.int64)
+
+    def choice(self, seq: list):
+        """Uniformly selected element of a non-empty sequence."""
+        if len(seq) == 0:
+            raise IndexError("Cannot choose from an empty sequence")
+        return seq[int(self.generator.integers(0, len(seq)))]
+
+    def choices(self, population: list, weights: list = None, k: int = 1) -> list:
+        """k weighted selections with replacement."""
+        if weights is None:
+            return [population[idx] for idx in self.generator.integers(0, len(population), size=k)]
+        cum_weights = list(accumulate(weights))
+        total = cum_weights[-1]
+        return [population[bisect(cum_weights, roll * total)] for roll in self.generator.random(size=k)]
+
+    def shuffle(self, x: list) -> None:
+        """Shuffle a list in place."""
+        for idx in range(len(x) - 1, 0, -1):
+            swap = int(self.generator.integers(0, idx + 1))
+            x[idx], x[swap] = x[swap], x[idx]
+
+
+def make_rng(mode: str = "legacy", base_seed: int = 0):
+    """Construct the gamestate RNG for the configured mode."""
+    if mode == "legacy":
+        return LegacyRandom()
+    if mode == "stream":
+        return StreamRandom(base_seed)
+    raise ValueError(f"Unknown rng mode '{mode}', expected one of {RNG_MODES}.")
@@ -3,7 +3,10 @@
 from typing import List, Dict
 from collections import defaultdict
 from src.config.config import Config
-from src.calculations.symbol import Symbol
+from src.config.paytable import get_compiled_paytable
+from src.calculations.symbol import Symbol, get_attribute_bit
+from src.calculations.compact_board import CompactBoard, is_compact
+from src.wins.win_record import WinRecord, get_summary
 
 
 class Scatter:
@@ -13,12 +16,15 @@ class Scatter:
     def get_central_scatter_position(
         rows_for_overlay: List, winning_positions: List[Dict], max_reels: int, max_rows: int
     ) -> tuple:
-        """Return position on screen to display win amount."""
+        """
+        Return position on screen to display win amount.
+        Positions are {"reel", "row"} dictionaries or (reel, row) pairs.
+        """
         closest_to_middle = 100
         reel_to_overlay = 0
         row_to_overlay = 0
         for pos in winning_positions:
-            reel, row = pos["reel"], pos["row"]
+            reel, row = (pos["reel"], pos["row"]) if isinstance(pos, dict) else pos
             dist_from_middle = (reel - max_reels / 2) ** 2 + (row - max_rows / 2) ** 2
             if (
                 dist_from_middle < closest_to_middle
@@ -31,6 +37,24 @@ class Scatter:
 
         return (reel_to_overlay, row_to_overlay)
 
+    @staticmethod
+    def get_scatter_win_details(
+        cells: list, global_multiplier: int, symbol_mult: int, pay: float, overlay_position: tuple
+    ) -> dict:
+        """Positions and meta keys of a scatter win, built when the win is first read."""
+        return {
+            "positions": [{"reel": reel, "row": row} for reel, row in cells],
+            "meta": {
+                "globalMult": global_multiplier,
+                "clusterMult": symbol_mult,
+                "winWithoutMult": pay,
+                "overlay": {
+                    "reel": overlay_position[0],
+                    "row": overlay_position[1],
+                },
+            },
+        }
+
     @staticmethod
     def get_scatterpay_wins(
         config: Config,
@@ -39,54 +63,70 @@ class Scatter:
         multiplier_key: str = "multiplier",
         global_multiplier: int = 1,
     ) -> dict:
-        """Return win data for all paying symbols"""
+        """
+        Return win data for all paying symbols.
+        A CompactBoard is read from its symbol ids, masks and multiplier array, and has its explode array set.
+        """
         return_data = {
             "totalWin": 0,
             "wins": [],
         }
+        paytable = get_compiled_paytable(config)
+        compact = is_compact(board) and multiplier_key in CompactBoard.array_attributes
+        if compact:
+            multiplier_bit = get_attribute_bit(multiplier_key)
+            names = board.split_reels(board.get_names())
+            has_mult = board.split_reels([bool(mask & multiplier_bit) for mask in board.get_mask().tolist()])
+            mult_values = board.split_reels(board.get_values(multiplier_key))
+        else:
+            names = [[symbol.name for symbol in reel] for reel in board]
         rows_for_overlay = []
         symbols_on_board = defaultdict(list)
         wild_positions = []
         total_win = 0.0
-        for reel_idx, reel in enumerate(board):
-            for row_idx, symbol in enumerate(reel):
-                if symbol.name not in config.special_symbols[wild_key]:
-                    symbols_on_board[symbol.name].append({"reel": reel_idx, "row": row_idx})
+        for reel_idx, reel in enumerate(names):
+            for row_idx, name in enumerate(reel):
+                if name not in config.special_symbols[wild_key]:
+                    symbols_on_board[name].append((reel_idx, row_idx))
                 else:
-                    wild_positions.append({"reel": reel_idx, "row": row_idx})
+                    wild_positions.append((reel_idx, row_idx))
 
         # Update all symbol positions with wilds, as this symbol is shared
         for sym in symbols_on_board:
             if len(wild_positions) > 0:
                 symbols_on_board[sym].extend(wild_positions)
             win_size = len(symbols_on_board[sym])
-            if (win_size, sym) in config.paytable:
+            pay = paytable.get(win_size, sym)
+            if pay is not None:
                 symbol_mult = 0
-                for p in symbols_on_board[sym]:
-                    if board[p["reel"]][p["row"]].check_attribute(multiplier_key):
-                        symbol_mult += board[p["reel"]][p["row"]].get_attribute(multiplier_key)
+                if compact:
+                    for reel, row in symbols_on_board[sym]:
+                        if has_mult[reel][row]:
+                            symbol_mult += mult_values[reel][row]
+                    board.set_explode([board.cell_index(reel, row) for reel, row in symbols_on_board[sym]])
+                else:
+                    for reel, row in symbols_on_board[sym]:
+                        if board[reel][row].check_attribute(multiplier_key):
+                            symbol_mult += board[reel][row].get_attribute(multiplier_key)
 
-                    board[p["reel"]][p["row"]].explode = True
+                        board[reel][row] = board[reel][row].mutable()
+                        board[reel][row].assign_attribute({"explode": True})
 
                 symbol_mult = max(symbol_mult, 1)
                 overlay_position = Scatter.get_central_scatter_position(
-                    rows_for_overlay, symbols_on_board[sym], len(board), len(board[0])
+                    rows_for_overlay, symbols_on_board[sym], len(names), len(names[0])
                 )
                 rows_for_overlay.append(overlay_position[1])
-                symbol_win_data = {
-                    "symbol": sym,
-                    "win": config.paytable[(win_size, sym)] * global_multiplier * symbol_mult,
-                    "positions": symbols_on_board[sym],
-                    "meta": {
-                        "globalMult": global_multiplier,
-                        "clusterMult": symbol_mult,
-                        "winWithoutMult": config.paytable[(win_size, sym)],
-                        "overlay": {
-                            "reel": overlay_position[0],
-                            "row": overlay_position[1],
-                        },
-                    },
-                }
+                symbol_win_data = WinRecord(
+                    {"symbol": sym, "win": pay * global_multiplier * symbol_mult},
+                    Scatter.get_scatter_win_details,
+                    symbols_on_board[sym],
+                    global_multiplier,
+                    symbol_mult,
+                    pay,
+                    overlay_position,
+                    summary={"positionCount": win_size, "globalMult": global_multiplier, "clusterMult": symbol_mult},
+                )
                 total_win += symbol_win_data["win"]
                 return_data["wins"].append(symbol_win_data)
 
@@ -100,9 +140,9 @@ class Scatter:
         for win in gamestate.win_data["wins"]:
             gamestate.record(
                 {
-                    "kind": len(win["positions"]),
+                    "kind": get_summary(win, "positionCount"),
                     "symbol": win["symbol"],
-                    "totalMult": int(win["meta"]["globalMult"] + win["meta"]["clusterMult"]),
+                    "totalMult": int(get_summary(win, "globalMult") + get_summary(win, "clusterMult")),
                     "gametype": gamestate.gametype,
                 }
             )
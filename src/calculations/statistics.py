@@ -1,20 +1,120 @@
 import random
+from bisect import bisect_left
+from collections import OrderedDict
 from typing import Union
+import numpy as np
 
 
-def get_random_outcome(distribution: dict, totalWeight: float = None) -> Union[float, int]:
-    """Returns a value from a distibution passed as a dictionary: {value : weight, ...}"""
+class AliasSampler:
+    """
+    Compiled sampler for a {value: weight} distribution.
+    Draws are O(1) using Vose's alias tables. For the legacy rng (and the global random module) the
+    cumulative weights are searched with bisect instead, which reproduces the linear walk of
+    get_random_outcome() draw-for-draw.
+    """
+
+    def __init__(self, distribution: dict):
+        self.distribution = distribution
+        self.values = list(distribution.keys())
+        self.size = len(self.values)
+        self.cumulative = []
+        cumulative = 0.0
+        for weight in distribution.values():
+            cumulative += weight
+            self.cumulative.append(cumulative)
+        self.total = sum(distribution.values())
+        self.build_alias_tables()
+
+    def build_alias_tables(self) -> None:
+        """Construct probability and alias tables (Vose's method)."""
+        n = self.size
+        self.prob = [0.0] * n
+        self.alias = list(range(n))
+        if n == 0 or self.total <= 0:
+            return
+        scaled = [weight * n / self.total for weight in self.distribution.values()]
+        small = [idx for idx, p in enumerate(scaled) if p < 1.0]
+        large = [idx for idx, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.prob[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] = (scaled[more] + scaled[less]) - 1.0
+            if scaled[more] < 1.0:
+                small.append(more)
+            else:
+                large.append(more)
+        for idx in large + small:
+            self.prob[idx] = 1.0
+
+    def draw_exact(self, rng: object, total_weight: float = None) -> Union[float, int]:
+        """Inverse-cdf draw, identical to walking the distribution in order."""
+        roll = rng.uniform(0, self.total if total_weight is None else total_weight)
+        idx = bisect_left(self.cumulative, roll)
+        if idx == self.size:
+            raise RuntimeError("error drawing item from distribution")
+        return self.values[idx]
+
+    def draw(self, rng: object = None) -> Union[float, int]:
+        """Single draw from the distribution."""
+        rng = rng if rng is not None else random
+        if getattr(rng, "mode", "legacy") == "legacy":
+            return self.draw_exact(rng)
+        scaled = rng.random() * self.size
+        idx = int(scaled)
+        return self.values[idx] if scaled - idx < self.prob[idx] else self.values[self.alias[idx]]
+
+    def sample(self, n: int, rng: object = None) -> list:
+        """n independent draws, vectorised when the rng exposes a numpy generator."""
+        rng = rng if rng is not None else random
+        generator = getattr(rng, "generator", None)
+        if generator is None or getattr(rng, "mode", "legacy") == "legacy":
+            return [self.draw(rng) for _ in range(n)]
+        scaled = generator.random(n) * self.size
+        idx = scaled.astype(np.int64)
+        use_alias = (scaled - idx) >= np.asarray(self.prob)[idx]
+        chosen = np.where(use_alias, np.asarray(self.alias)[idx], idx)
+        return [self.values[i] for i in chosen]
+
+
+SAMPLER_CACHE = OrderedDict()
+SAMPLER_CACHE_SIZE = 1024
+
+
+def get_sampler(distribution: dict) -> AliasSampler:
+    """
+    Return the cached sampler for a distribution dict, building it on first use.
+    Samplers are keyed on the dict object itself, so the conditions dicts held by each Distribution
+    are only compiled once. Distributions modified in place must call clear_sampler_cache().
+    """
+    key = id(distribution)
+    sampler = SAMPLER_CACHE.get(key)
+    if sampler is not None and sampler.distribution is distribution and sampler.size == len(distribution):
+        SAMPLER_CACHE.move_to_end(key)
+        return sampler
+    sampler = AliasSampler(distribution)
+    SAMPLER_CACHE[key] = sampler
+    if len(SAMPLER_CACHE) > SAMPLER_CACHE_SIZE:
+        SAMPLER_CACHE.popitem(last=False)
+    return sampler
+
+
+def clear_sampler_cache() -> None:
+    """Discard all compiled samplers."""
+    SAMPLER_CACHE.clear()
+
+
+def get_random_outcome(distribution: dict, totalWeight: float = None, rng: object = None) -> Union[float, int]:
+    """
+    Returns a value from a distibution passed as a dictionary: {value : weight, ...}
+    Draws from the gamestate rng if provided (gamestate.rng), otherwise from the global random module.
+    The distribution is compiled once into an AliasSampler, see get_sampler().
+    """
     assert isinstance(distribution, dict), "distribution must be of type: dict "
-    if totalWeight is None:
-        totalWeight = sum(distribution.values())
-    roll = random.uniform(0, totalWeight)
-    cumulative = 0.0
-    for value, weight in distribution.items():
-        cumulative += weight
-        if cumulative >= roll:
-            return value
-
-    return Exception("error drawing item from distribution")
+    sampler = get_sampler(distribution)
+    if totalWeight is not None and totalWeight != sampler.total:
+        return sampler.draw_exact(rng if rng is not None else random, totalWeight)
+    return sampler.draw(rng)
 
 
 def get_mean_std_median(dist: dict) -> tuple[float, float, float]:
@@ -1,18 +1,45 @@
 """Handle symbol classes and initial generation."""
 
+# Bit assigned to each symbol attribute and special flag name. Symbol.mask holds the special flags of the
+# symbol and its set attributes, so evaluators can test them with a single bitwise AND.
+ATTRIBUTE_BITS = {}
+
+# Symbol attributes kept in sync with Symbol.mask on every assignment
+MASKED_ATTRIBUTES = ("explode", "locked", "scatter", "wild", "has_multiplier", "multiplier", "has_prize", "prize")
+
+
+def get_attribute_bit(name: str) -> int:
+    """Bit representing an attribute or special flag name, registered on first use."""
+    bit = ATTRIBUTE_BITS.get(name)
+    if bit is None:
+        bit = 1 << len(ATTRIBUTE_BITS)
+        ATTRIBUTE_BITS[name] = bit
+    return bit
+
+
+def get_attribute_mask(*names: str) -> int:
+    """Combined bits of several attribute or special flag names."""
+    mask = 0
+    for name in names:
+        mask |= get_attribute_bit(name)
+    return mask
+
 
 class SymbolDefinition:
     """Define symbol class object structure."""
 
     __slots__ = (
+        "id",
         "name",
         "special",
         "is_paying",
         "paytable",
         "special_flags",
+        "flag_mask",
     )
 
-    def __init__(self, name, config, paytable):
+    def __init__(self, name, config, paytable, symbol_id=-1):
+        self.id = symbol_id
         self.name = name
 
         self.special_flags = set()
@@ -21,6 +48,7 @@ class SymbolDefinition:
                 self.special_flags.add(prop)
 
         self.special = bool(self.special_flags)
+        self.flag_mask = get_attribute_mask(*self.special_flags)
 
         if paytable:
             self.is_paying = True
@@ -31,28 +59,34 @@ class SymbolDefinition:
 
 
 class Symbol:
-    """Symbol attributes must exist is __slots__ list."""
+    """
+    Symbol attributes must exist is __slots__ list.
+    The MASKED_ATTRIBUTES (explode, wild, multiplier, ...) are properties stored in the matching underscored slot,
+    which update the mask whether they are assigned directly or through assign_attribute().
+    """
 
     __slots__ = (
         "defn",
-        "explode",
-        "locked",
-        "scatter",
-        "wild",
-        "has_multiplier",
-        "multiplier",
-        "has_prize",
-        "prize",
+        "mask",
+        "_explode",
+        "_locked",
+        "_scatter",
+        "_wild",
+        "_has_multiplier",
+        "_multiplier",
+        "_has_prize",
+        "_prize",
     )
 
     def __init__(self, defn: SymbolDefinition):
         self.defn = defn
-        self.explode = False
-        self.locked = False
-        self.wild = False
-        self.scatter = False
-        self.multiplier = None
-        self.prize = None
+        self.mask = defn.flag_mask
+        self._explode = False
+        self._locked = False
+        self._wild = False
+        self._scatter = False
+        self._multiplier = None
+        self._prize = None
         self.assign_default_attribute()
 
     @property
@@ -82,14 +116,16 @@ class Symbol:
 
     def check_attribute(self, *attrs):
         """Check if symbol attribute exists/is set."""
+        mask = self.mask
         for a in attrs:
-            val = getattr(self, a, None)
-            if val not in (None, False):
-                return True
-            if a in self.defn.special_flags:
+            if mask & ATTRIBUTE_BITS.get(a, 0):
                 return True
         return False
 
+    def has_attributes(self, mask: int) -> bool:
+        """Check any of the attributes in a mask built with get_attribute_mask()."""
+        return bool(self.mask & mask)
+
     def get_attribute(self, attr):
         """Get attribute value (must exist)."""
         return getattr(self, attr)
@@ -104,15 +140,73 @@ class Symbol:
         for attr in self.defn.special_flags:
             match attr:
                 case "scatter":
-                    self.scatter = True
+                    self._scatter = True
                 case "wild":
-                    self.wild = True
+                    self._wild = True
                 case "multiplier":
-                    self.has_multiplier = True
-                    self.multiplier = 1
+                    self._has_multiplier = True
+                    self._multiplier = 1
+                    self.mask |= get_attribute_bit("has_multiplier")
                 case "prize":
-                    self.has_prize = True
-                    self.prize = 0
+                    self._has_prize = True
+                    self._prize = 0
+                    self.mask |= get_attribute_bit("has_prize")
+
+    def mutable(self):
+        """Instance which can be modified in place (this symbol, unless it is a shared SharedSymbol)."""
+        return self
+
+
+def masked_attribute(name: str) -> property:
+    """Property reading the underscored slot of an attribute, and setting or clearing its mask bit on assignment."""
+    slot = getattr(Symbol, "_" + name)
+    bit = get_attribute_bit(name)
+
+    def set_attribute(self, value):
+        slot.__set__(self, value)
+        if value not in (None, False):
+            self.mask |= bit
+        elif not bit & self.defn.flag_mask:
+            self.mask &= ~bit
+
+    return property(slot.__get__, set_attribute, doc=f"{name} attribute, mirrored in Symbol.mask.")
+
+
+# register the assignable attributes ahead of the special flags defined by each game
+for _name in MASKED_ATTRIBUTES:
+    setattr(Symbol, _name, masked_attribute(_name))
+del _name
+
+
+class SharedSymbol(Symbol):
+    """
+    Immutable symbol instance shared by every board position holding a symbol without special functions.
+    Positions which need to change an attribute (i.e. explode) are replaced with symbol.mutable() first.
+    """
+
+    __slots__ = ("frozen",)
+
+    def __init__(self, defn: SymbolDefinition):
+        super().__init__(defn)
+        object.__setattr__(self, "frozen", True)
+
+    def __setattr__(self, attr, value):
+        if getattr(self, "frozen", False):
+            raise AttributeError(
+                f"Symbol '{self.defn.name}' is shared between board positions, "
+                f"replace it with symbol.mutable() before assigning '{attr}'"
+            )
+        object.__setattr__(self, attr, value)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def mutable(self):
+        """New unshared symbol with the same (default) attributes."""
+        return Symbol(self.defn)
 
 
 class SymbolStorage:
@@ -124,13 +218,34 @@ class SymbolStorage:
         for (kind, sym), val in config.paytable.items():
             paytable_by_symbol.setdefault(sym, []).append({str(kind): val})
 
+        # integer ids are assigned in sorted name order, so they are stable between runs
         self.symbol_defs = {}
-        for name in all_symbols:
+        self.symbol_names = sorted(all_symbols)
+        self.symbol_ids = {}
+        self.defs_by_id = []
+        self.shared_by_id = []
+        for symbol_id, name in enumerate(self.symbol_names):
             self.symbol_defs[name] = SymbolDefinition(
                 name=name,
                 config=config,
                 paytable=paytable_by_symbol.get(name),
+                symbol_id=symbol_id,
             )
+            self.symbol_ids[name] = symbol_id
+            self.defs_by_id.append(self.symbol_defs[name])
+            self.shared_by_id.append(SharedSymbol(self.symbol_defs[name]))
+
+    def get_symbol_id(self, name: str) -> int:
+        """
+        Integer id of a symbol name.
+        Unregistered names (i.e. on a reelstrip) are given an id without a definition.
+        """
+        if name not in self.symbol_ids:
+            self.symbol_ids[name] = len(self.symbol_names)
+            self.symbol_names.append(name)
+            self.defs_by_id.append(None)
+            self.shared_by_id.append(None)
+        return self.symbol_ids[name]
 
     def create_symbol(self, name: str):
         """Create a new instance of symbol class."""
@@ -138,3 +253,17 @@ class SymbolStorage:
             return Symbol(self.symbol_defs[name])
         except KeyError:
             raise ValueError(f"Symbol '{name}' is not registered")
+
+    def get_shared_symbol(self, name: str) -> SharedSymbol:
+        """Shared immutable instance of a symbol."""
+        symbol_id = self.symbol_ids.get(name)
+        if symbol_id is None or self.shared_by_id[symbol_id] is None:
+            raise ValueError(f"Symbol '{name}' is not registered")
+        return self.shared_by_id[symbol_id]
+
+    def create_symbol_from_id(self, symbol_id: int):
+        """Create a new instance of symbol class from an integer symbol id."""
+        defn = self.defs_by_id[symbol_id]
+        if defn is None:
+            raise ValueError(f"Symbol '{self.symbol_names[symbol_id]}' is not registered")
+        return Symbol(defn)
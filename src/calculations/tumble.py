@@ -1,6 +1,7 @@
 from copy import copy
 from src.events.events import set_win_event, set_total_event
 from src.calculations.board import Board
+from src.calculations.compact_board import CompactBoard
 
 
 class Tumble(Board):
@@ -8,6 +9,8 @@ class Tumble(Board):
 
     def tumble_board(self) -> None:
         """Remove winning symbols from the active gameboard."""
+        if isinstance(self.board, CompactBoard):
+            self.board = self.board.as_nested()
         self.board_before_tumble = copy(self.board)
         static_board = copy(self.board)
         self.new_symbols_from_tumble = [[] for _ in range(len(static_board))]
@@ -25,7 +28,7 @@ class Tumble(Board):
                     insert_sym = self.top_symbols[reel]
                 else:
                     nme = self.reelstrip[reel][(reel_pos) % len(self.reelstrip[reel])]
-                    insert_sym = self.create_symbol(nme)
+                    insert_sym = self.get_reel_symbol(nme)
                     self.new_symbols_from_tumble[reel].insert(0, insert_sym)
                 copy_reel.insert(0, insert_sym)
 
@@ -41,7 +44,7 @@ class Tumble(Board):
                 padding_name = str(
                     self.reelstrip[reel][(self.reel_positions[reel] - 1) % len(self.reelstrip[reel])]
                 )
-                self.top_symbols[reel] = self.create_symbol(padding_name)
+                self.top_symbols[reel] = self.get_reel_symbol(padding_name)
                 self.new_symbols_from_tumble[reel].insert(0, self.top_symbols[reel])
 
         self.board = static_board
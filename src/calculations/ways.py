@@ -1,9 +1,12 @@
 """Ways wins executables/calculations."""
 
 from collections import defaultdict
-from src.calculations.symbol import Symbol
+from src.calculations.symbol import Symbol, get_attribute_bit
+from src.calculations.compact_board import CompactBoard, is_compact
 from src.config.config import Config
+from src.config.paytable import get_compiled_paytable
 from src.wins.multiplier_strategy import apply_mult
+from src.wins.win_record import WinRecord, get_summary
 from src.events.events import (
     win_info_event,
     set_win_event,
@@ -23,28 +26,43 @@ class Ways:
         multiplier_key: str = "multiplier",
         multiplier_strategy: str = "symbol",
     ):
-        """Ways calculation with possibility for global multiplier application."""
+        """
+        Ways calculation with possibility for global multiplier application.
+        A CompactBoard is read from its symbol ids, masks and multiplier array.
+        """
         return_data = {
             "totalWin": 0,
             "wins": [],
         }
         assert multiplier_strategy in ["symbol", "board", "global"]
+        paytable = get_compiled_paytable(config)
+        if is_compact(board) and multiplier_key in CompactBoard.array_attributes:
+            multiplier_bit = get_attribute_bit(multiplier_key)
+            names = board.split_reels(board.get_names())
+            has_mult = board.split_reels([bool(mask & multiplier_bit) for mask in board.get_mask().tolist()])
+            mult_values = board.split_reels(board.get_values(multiplier_key))
+        else:
+            names = [[sym.name for sym in reel] for reel in board]
+            has_mult = [[sym.check_attribute(multiplier_key) for sym in reel] for reel in board]
+            mult_values = [
+                [sym.get_attribute(multiplier_key) if has else None for sym, has in zip(reel, has_reel)]
+                for reel, has_reel in zip(board, has_mult)
+            ]
         board_mult_count = 0
         potential_wins = defaultdict()
-        wilds = [[] for _ in range(len(board))]
-        for reel, _ in enumerate(board):
-            for row, _ in enumerate(board[reel]):
-                sym = board[reel][row]
-                if reel == 0 and sym.name not in potential_wins:
-                    potential_wins[sym.name] = [[] for _ in range(len(board))]
-                    potential_wins[sym.name][0] = [{"reel": reel, "row": row}]
-                elif sym.name in potential_wins:
-                    potential_wins[sym.name][reel].append({"reel": reel, "row": row})
-
-                if sym.name in config.special_symbols[wild_key]:
+        wilds = [[] for _ in range(len(names))]
+        for reel, _ in enumerate(names):
+            for row, name in enumerate(names[reel]):
+                if reel == 0 and name not in potential_wins:
+                    potential_wins[name] = [[] for _ in range(len(names))]
+                    potential_wins[name][0] = [{"reel": reel, "row": row}]
+                elif name in potential_wins:
+                    potential_wins[name][reel].append({"reel": reel, "row": row})
+
+                if name in config.special_symbols[wild_key]:
                     wilds[reel].append({"reel": reel, "row": row})
-                    if board[reel][row].check_attribute(multiplier_key):
-                        wilds[reel][-1][multiplier_key] = board[reel][row].get_attribute(multiplier_key)
+                    if has_mult[reel][row]:
+                        wilds[reel][-1][multiplier_key] = mult_values[reel][row]
 
         for symbol in potential_wins:
             kind, ways, cumulative_sym_mult = (0, 1, 0)
@@ -55,7 +73,7 @@ class Ways:
                     # Note that here multipliers on subsequent reels multiply (not add, like in lines games)
                     symbols_have_mult = False
                     for s in potential_wins[symbol][reel]:
-                        if board[s["reel"]][s["row"]].check_attribute(multiplier_key):
+                        if has_mult[s["reel"]][s["row"]]:
                             symbols_have_mult = True
 
                     if symbols_have_mult is False:
@@ -63,26 +81,18 @@ class Ways:
                     else:
                         reel_sym_count = 0
                         for s in potential_wins[symbol][reel]:
-                            if (
-                                board[s["reel"]][s["row"]].check_attribute(multiplier_key)
-                                and multiplier_strategy == "symbol"
-                            ):
-                                reel_sym_count += board[s["reel"]][s["row"]].get_attribute(multiplier_key)
+                            if has_mult[s["reel"]][s["row"]] and multiplier_strategy == "symbol":
+                                reel_sym_count += mult_values[s["reel"]][s["row"]]
                             else:
                                 reel_sym_count += 1
-                                if (
-                                    board[s["reel"]][s["row"]].check_attribute(multiplier_key)
-                                    and multiplier_strategy == "board"
-                                ):
-                                    gm = board[s["reel"]][s["row"]].get_attribute(multiplier_key)
+                                if has_mult[s["reel"]][s["row"]] and multiplier_strategy == "board":
+                                    gm = mult_values[s["reel"]][s["row"]]
                                     board_mult_count += gm * (gm > 1)
 
                     if len(wilds[reel]) > 0:
                         for sym in wilds[reel]:
-                            if board[sym["reel"]][sym["row"]].check_attribute(
-                                multiplier_key
-                            ) and multiplier_strategy in ["board", "symbol"]:
-                                wild_mult_val = board[sym["reel"]][sym["row"]].get_attribute(multiplier_key)
+                            if has_mult[sym["reel"]][sym["row"]] and multiplier_strategy in ["board", "symbol"]:
+                                wild_mult_val = mult_values[sym["reel"]][sym["row"]]
                                 cumulative_sym_mult += wild_mult_val * (wild_mult_val > 1)
                                 if multiplier_strategy == "board":
                                     reel_sym_count += 1
@@ -105,15 +115,9 @@ class Ways:
                 case "symbol":
                     win_multiplier = 1
 
-            if (kind, symbol) in config.paytable:
-                positions = []
-                for reel in range(kind):
-                    for pos in potential_wins[symbol][reel]:
-                        positions += [pos]
-                    for pos in wilds[reel]:
-                        positions += [pos]
-
-                win = round(config.paytable[kind, symbol] * ways, 2)
+            pay = paytable.get(kind, symbol)
+            if pay is not None:
+                win = round(pay * ways, 2)
                 win_amt, multiplier = apply_mult(
                     board=board,
                     strategy="global",
@@ -124,23 +128,55 @@ class Ways:
                     assert win_amt == win
 
                 return_data["wins"] += [
-                    {
-                        "symbol": symbol,
-                        "kind": kind,
-                        "win": win_amt,
-                        "positions": positions,
-                        "meta": {
+                    WinRecord(
+                        {"symbol": symbol, "kind": kind, "win": win_amt},
+                        Ways.get_ways_win_details,
+                        potential_wins[symbol],
+                        wilds,
+                        kind,
+                        ways,
+                        multiplier,
+                        win,
+                        cumulative_sym_mult,
+                        summary={
+                            "positionCount": sum(
+                                len(potential_wins[symbol][reel]) + len(wilds[reel]) for reel in range(kind)
+                            ),
                             "ways": ways,
-                            "globalMult": multiplier,
-                            "winWithoutMult": win,
-                            "symbolMult": cumulative_sym_mult,
                         },
-                    }
+                    )
                 ]
                 return_data["totalWin"] += win_amt
 
         return return_data
 
+    @staticmethod
+    def get_ways_win_details(
+        symbol_positions: list,
+        wilds: list,
+        kind: int,
+        ways: int,
+        multiplier: int,
+        win: float,
+        cumulative_sym_mult: int,
+    ) -> dict:
+        """Positions and meta keys of a ways win, built when the win is first read."""
+        positions = []
+        for reel in range(kind):
+            for pos in symbol_positions[reel]:
+                positions += [pos]
+            for pos in wilds[reel]:
+                positions += [pos]
+        return {
+            "positions": positions,
+            "meta": {
+                "ways": ways,
+                "globalMult": multiplier,
+                "winWithoutMult": win,
+                "symbolMult": cumulative_sym_mult,
+            },
+        }
+
     @staticmethod
     def emit_wayswin_events(gamestate) -> None:
         """Transmit win events asociated with ways wins."""
@@ -156,9 +192,9 @@ class Ways:
         for win in gamestate.win_data["wins"]:
             gamestate.record(
                 {
-                    "kind": len(win["positions"]),
+                    "kind": get_summary(win, "positionCount"),
                     "symbol": win["symbol"],
-                    "ways": win["meta"]["ways"],
+                    "ways": get_summary(win, "ways"),
                     "gametype": gamestate.gametype,
                 }
             )
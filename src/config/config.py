@@ -2,6 +2,7 @@
 
 from src.config.betmode import BetMode
 from src.config.paths import PATH_TO_GAMES
+from src.config.paytable import CompiledPaytable, get_compiled_paytable
 import os
 
 
@@ -29,6 +30,7 @@ class Config:
         self.reels = 5
         self.row = 3
         self.paytable = {}  # Symbol information assumes ('kind','name) format
+        self.compiled_paytable = None  # dense copy of the paytable, see get_compiled_paytable()
         self.special_symbols = {None: []}
         self.special_sybol_names = set()
         self.paying_symbol_names = set()
@@ -50,6 +52,20 @@ class Config:
 
         self.write_event_list = True
 
+        # "legacy" reseeds the global random module for each simulation, "stream" uses an independent PCG64
+        # stream per simulation keyed on (rng_seed, simulation seed)
+        self.rng_mode = "legacy"
+        self.rng_seed = 0
+
+        # zstd settings used for temp book shards and the final compressed books
+        self.compression_level = 3
+        self.compression_threads = 0  # 0 compresses on the calling thread, -1 uses all available cores
+        self.compression_long_distance = False
+        # 0 selects the window from the level, > 27 requires readers to raise max_window_size
+        self.compression_window_log = 0
+        self.compression_dictionary = False  # train a dictionary on the first batch, shipped as books_<mode>.dict
+        self.compression_dictionary_size = 112640
+
         self.bet_modes = []
         self.opt_params = {None: None}
 
@@ -104,6 +120,10 @@ class Config:
             self.paying_symbol_names.add(tup[1])
         self.payingSymbolnames = list(self.paying_symbol_names)
 
+    def get_compiled_paytable(self) -> CompiledPaytable:
+        """Paytable compiled to a dense [symbol_id, kind] array, rebuilt if self.paytable is replaced."""
+        return get_compiled_paytable(self)
+
     def validate_reel_symbols(self, reel_strip: str) -> None:
         """Verify that all symbols on the reelstrip are valid."""
         uniqueSymbols = set()
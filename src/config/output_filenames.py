@@ -1,4 +1,5 @@
 import os
+import re
 from collections import defaultdict
 
 from src.config.paths import PATH_TO_GAMES
@@ -132,6 +133,34 @@ class OutputFiles:
 
         return os.path.join(self.temp_path, filename)
 
+    def get_temp_shards(self, betmode: str) -> list:
+        """Return (thread_index, repeat_count) for all temp book files of a betmode, ordered by simulation number."""
+        pattern = re.compile(rf"^books_{re.escape(betmode)}_(\d+)_(\d+)\.(?:jsonl\.zst|jsonl|json)$")
+        shards = set()
+        for filename in os.listdir(self.temp_path):
+            match = pattern.match(filename)
+            if match:
+                shards.add((int(match.group(1)), int(match.group(2))))
+        return sorted(shards, key=lambda shard: (shard[1], shard[0]))
+
+    def clear_temp_shards(self, betmode: str) -> None:
+        """Remove temp book, lookup and force files left over from a previous run of a betmode."""
+        self.check_folder_exists(self.temp_path)
+        pattern = re.compile(
+            rf"^(?:books|lookUpTable|lookUpTableSegmented|force)_{re.escape(betmode)}_\d+_\d+(?:\..+)?$"
+        )
+        for filename in os.listdir(self.temp_path):
+            if pattern.match(filename):
+                os.remove(os.path.join(self.temp_path, filename))
+
+    def get_checkpoint_name(self, betmode: str):
+        """Manifest of finished temp shards, used to resume interrupted runs."""
+        return os.path.join(self.temp_path, f"checkpoint_{betmode}.json")
+
+    def get_temp_criteria_name(self, betmode: str):
+        """Simulation-criteria allocation of a checkpointed run."""
+        return os.path.join(self.temp_path, f"criteria_{betmode}.json")
+
     def get_temp_lookup_name(self, betmode: str, thread_index: int, repeat_count: int):
         """Naming convention for temp lookup files."""
         return os.path.join(self.temp_path, f"lookUpTable_{betmode}_{thread_index}_{repeat_count}")
@@ -156,6 +185,10 @@ class OutputFiles:
             raise RuntimeError("Logic error in name generation.")
         return os.path.join(self.compressed_path if compress else self.book_path, filename)
 
+    def get_dictionary_name(self, betmode: str):
+        """zstd dictionary trained on the books of a betmode, published next to the compressed books."""
+        return os.path.join(self.compressed_path, f"books_{betmode}.dict")
+
     def get_final_lookup_name(self, betmode: str):
         """Final csv lookup table name."""
         return os.path.join(self.lookup_path, f"lookUpTable_{betmode}.csv")
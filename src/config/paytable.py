@@ -0,0 +1,71 @@
+"""Paytable compiled to a dense array indexed by symbol id and kind."""
+
+import numpy as np
+
+
+class CompiledPaytable:
+    """
+    config.paytable {(kind, name): pay} compiled once per paytable.
+    Symbols are numbered in sorted name order over the paytable and special symbols (symbol_ids). These are not
+    SymbolStorage ids: the storage also numbers names found only on reelstrips, so map storage ids by name
+    before indexing pays (as Lines.get_lines_batch does).
+    pays[symbol_id, kind] holds the pay as float64 (0 where the symbol does not pay), and pay_rows[name][kind]
+    the original value (None where the kind is not in the paytable), so scalar lookups return the same type
+    as the dictionary. Paytables with kinds other than non-negative integers are looked up in the dictionary.
+    """
+
+    def __init__(self, paytable: dict, special_symbols: dict = None):
+        self.source = paytable
+        names = {name for _, name in paytable}
+        for symbols in (special_symbols or {}).values():
+            names.update(symbols)
+        self.symbol_names = sorted(name for name in names if name is not None)
+        self.symbol_ids = {name: symbol_id for symbol_id, name in enumerate(self.symbol_names)}
+        self.dense = all(isinstance(kind, int) and kind >= 0 for kind, _ in paytable)
+        self.max_kind = max((kind for kind, _ in paytable), default=0) if self.dense else 0
+        self.pays = np.zeros((len(self.symbol_names), self.max_kind + 1), dtype=np.float64)
+        self.pay_rows = {}
+        self.padded_pays = {}
+        if self.dense:
+            for (kind, name), pay in paytable.items():
+                self.pays[self.symbol_ids[name], kind] = pay
+                self.pay_rows.setdefault(name, [None] * (self.max_kind + 1))[kind] = pay
+
+    def get(self, kind: int, name: str):
+        """Pay for kind symbols of a name, or None if the combination is not in the paytable."""
+        if not self.dense:
+            return self.source.get((kind, name))
+        row = self.pay_rows.get(name)
+        if row is None or not 0 <= kind <= self.max_kind:
+            return None
+        return row[kind]
+
+    def get_pays(self, symbol_names: list, max_kind: int) -> np.ndarray:
+        """(len(symbol_names), max_kind + 1) float64 pays, zero for kinds beyond the paytable."""
+        pays = np.zeros((len(symbol_names), max_kind + 1), dtype=np.float64)
+        for row, name in enumerate(symbol_names):
+            for kind in range(max_kind + 1):
+                pay = self.get(kind, name)
+                if pay is not None:
+                    pays[row, kind] = pay
+        return pays
+
+    def get_padded_pays(self, max_kind: int) -> np.ndarray:
+        """
+        pays with columns for kinds 0..max_kind and a final row of zeros, so symbols without an id (-1) do not pay.
+        Cached per max_kind.
+        """
+        if max_kind not in self.padded_pays:
+            padded = np.zeros((len(self.symbol_names) + 1, max_kind + 1), dtype=np.float64)
+            padded[:-1] = self.get_pays(self.symbol_names, max_kind)
+            self.padded_pays[max_kind] = padded
+        return self.padded_pays[max_kind]
+
+
+def get_compiled_paytable(config: object) -> CompiledPaytable:
+    """Compiled paytable of a config, built on first use and again if config.paytable is replaced."""
+    compiled = getattr(config, "compiled_paytable", None)
+    if compiled is None or compiled.source is not config.paytable:
+        compiled = CompiledPaytable(config.paytable, getattr(config, "special_symbols", {}))
+        config.compiled_paytable = compiled
+    return compiled
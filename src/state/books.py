@@ -35,3 +35,13 @@ class Book:
             "freeGameWins": self.freegame_wins,
         }
         return json_book
+
+    def to_summary(self):
+        "Return the payout information used for lookup tables, without events."
+        return {
+            "id": self.id,
+            "payoutMultiplier": int(round(self.payout_multiplier * 100, 0)),
+            "criteria": self.criteria,
+            "baseGameWins": self.basegame_wins,
+            "freeGameWins": self.freegame_wins,
+        }
@@ -0,0 +1,100 @@
+"""Track finished simulation shards so that interrupted book generation can be resumed."""
+
+import os
+import json
+from warnings import warn
+
+from src.write_data.write_data import get_sha_256
+
+
+class Checkpoint:
+    """
+    Manifest of all (betmode, thread, repeat) shards which have been fully written to the temp directory.
+    Each shard records its simulation range and the hash of every temp file it produced, a shard is only
+    skipped on resume if all of its files are still present and unchanged.
+    """
+
+    def __init__(self, output_files: object, betmode: str, run_params: dict):
+        self.output_files = output_files
+        self.betmode = betmode
+        self.run_params = run_params
+        self.path = output_files.get_checkpoint_name(betmode)
+        self.criteria_path = output_files.get_temp_criteria_name(betmode)
+        self.shards = {}
+
+    @staticmethod
+    def shard_key(thread_index: int, repeat_count: int) -> str:
+        """Manifest key for a temp shard."""
+        return f"{thread_index}_{repeat_count}"
+
+    def get_shard_files(self, thread_index: int, repeat_count: int) -> dict:
+        """All temp files written by a single run_sims() call."""
+        return {
+            "books": self.output_files.get_temp_multi_thread_name(
+                self.betmode, thread_index, repeat_count, self.run_params["compress"]
+            ),
+            "lookup": self.output_files.get_temp_lookup_name(self.betmode, thread_index, repeat_count),
+            "segmented": self.output_files.get_temp_segmented_name(self.betmode, thread_index, repeat_count),
+            "force": self.output_files.get_temp_force_name(self.betmode, thread_index, repeat_count),
+        }
+
+    def load(self) -> bool:
+        """
+        Load an existing manifest, returns False if none exists or if it was created with different run parameters.
+        """
+        if not (os.path.isfile(self.path) and os.path.isfile(self.criteria_path)):
+            return False
+        try:
+            with open(self.path, "r", encoding="UTF-8") as f:
+                manifest = json.load(f)
+        except json.JSONDecodeError:
+            warn(f"Checkpoint manifest {self.path} is corrupted, restarting {self.betmode} from scratch.")
+            return False
+        if manifest.get("run_params") != self.run_params:
+            warn(
+                f"Checkpoint for {self.betmode} was created with different run parameters:\n"
+                f"  checkpoint: {manifest.get('run_params')}\n  current: {self.run_params}\n"
+                "Restarting mode from scratch."
+            )
+            return False
+        self.shards = manifest["shards"]
+        return True
+
+    def save(self) -> None:
+        """Atomically write the manifest to the temp directory."""
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="UTF-8") as f:
+            json.dump({"run_params": self.run_params, "shards": self.shards}, f, indent=4)
+        os.replace(temp_path, self.path)
+
+    def save_criteria(self, criteria_assignment: list) -> None:
+        """Store the simulation-criteria allocation so a resumed run uses the exact same assignment."""
+        names = sorted(set(criteria_assignment))
+        index = {name: idx for idx, name in enumerate(names)}
+        with open(self.criteria_path, "w", encoding="UTF-8") as f:
+            json.dump({"names": names, "assignment": [index[c] for c in criteria_assignment]}, f)
+
+    def load_criteria(self) -> list:
+        """Return the simulation-criteria allocation stored by save_criteria()."""
+        with open(self.criteria_path, "r", encoding="UTF-8") as f:
+            stored = json.load(f)
+        return [stored["names"][idx] for idx in stored["assignment"]]
+
+    def record(self, thread_index: int, repeat_count: int, sim_range: tuple) -> None:
+        """Hash and record a finished shard."""
+        files = self.get_shard_files(thread_index, repeat_count)
+        self.shards[self.shard_key(thread_index, repeat_count)] = {
+            "sim_range": list(sim_range),
+            "hashes": {name: get_sha_256(path) for name, path in files.items()},
+        }
+        self.save()
+
+    def is_complete(self, thread_index: int, repeat_count: int, sim_range: tuple) -> bool:
+        """Check a shard finished in a previous run and its files are unchanged."""
+        shard = self.shards.get(self.shard_key(thread_index, repeat_count))
+        if shard is None or shard["sim_range"] != list(sim_range):
+            return False
+        for name, path in self.get_shard_files(thread_index, repeat_count).items():
+            if not os.path.isfile(path) or get_sha_256(path) != shard["hashes"][name]:
+                return False
+        return True
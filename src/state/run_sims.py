@@ -1,15 +1,25 @@
+import os
 import time
 import math
+import ast
+import json
 import random
 import hashlib
-from multiprocessing import Process, Manager
 import cProfile
 from warnings import warn
 import shutil
 import asyncio
-from typing import Dict
+from typing import Dict, List, Tuple
 
-from src.write_data.write_data import output_lookup_and_force_files
+from src.write_data.write_data import (
+    output_lookup_and_force_files,
+    get_zstd_compressor,
+    load_book_dictionary,
+    train_book_dictionary,
+    apply_book_dictionary,
+)
+from src.state.worker_pool import WorkerPool
+from src.state.checkpoint import Checkpoint
 
 
 def create_books(
@@ -20,13 +30,19 @@ def create_books(
     threads: int,
     compress: bool,
     profiling: bool,
+    resume: bool = False,
+    background_writer: bool = False,
+    book_merge: str = "concat",
 ):
-    """Main run-function for simulating game outcomes and outputting all files."""
+    """
+    Main run-function for simulating game outcomes and outputting all files.
+    resume=True continues an interrupted run from the checkpoint manifest in the temp directory,
+    only simulating shards which are missing or whose files no longer match their recorded hash.
+    background_writer=True overlaps book compression and temp file writes with simulation on each worker.
+    book_merge selects how compressed shards are combined ("concat" or "recompress"),
+    see output_lookup_and_force_files().
+    """
     for key, ns in num_sim_args.items():
-        if all([ns > 0, ns > batch_size * batch_size]):
-            assert (
-                ns % (threads * batch_size) == 0
-            ), "mode-sims/(batch * threads) must be divisible with no remainder"
         num_sim_args[key] = int(ns)
 
     if not compress and sum(num_sim_args.values()) > 1e4:
@@ -65,6 +81,8 @@ def create_books(
                 write_event_list=config.write_event_list,
                 profiling=profiling,
                 set_sim_amount=set_sim_amount,
+                resume=resume,
+                background_writer=background_writer,
             )
 
             output_lookup_and_force_files(
@@ -75,6 +93,7 @@ def create_books(
                 gamestate,
                 num_sims=nsims,
                 compress=compress,
+                book_merge=book_merge,
             )
     shutil.rmtree(gamestate.output_files.temp_path)
     print("\nFinished creating books in", time.time() - startTime, "seconds.\n")
@@ -106,16 +125,166 @@ def assign_sim_criteria(num_sims_criteria: Dict[str, int], sims: int) -> Dict[in
     return {i: sim_allocation[i] for i in range(min(sims, len(sim_allocation)))}
 
 
+def split_sim_range(start: int, end: int, chunk_size: int) -> List[Tuple[int, int]]:
+    """Split simulation numbers [start, end) into consecutive chunks of at most chunk_size."""
+    return [(chunk_start, min(chunk_start + chunk_size, end)) for chunk_start in range(start, end, chunk_size)]
+
+
+def partition_sims(num_sims: int, threads: int, batch_size: int, chunk_size: int = None) -> List[List[Tuple[int, int]]]:
+    """
+    Split simulation numbers [0, num_sims) into batches of at most threads * batch_size sims,
+    each batch being split into chunks of at most chunk_size sims. Any sim count, thread count and
+    batch size is accepted, the final batch and chunk are allowed to be ragged.
+    By default each thread receives roughly four chunks per batch (one chunk per batch for a single thread).
+    """
+    assert num_sims >= 0 and threads > 0 and batch_size > 0, "sims, threads and batch size must be positive"
+    batch_sims = threads * batch_size
+    if chunk_size is None:
+        per_thread = math.ceil(min(batch_sims, num_sims) / threads)
+        chunk_size = per_thread if threads == 1 else math.ceil(per_thread / 4)
+    chunk_size = max(int(chunk_size), 1)
+    return [
+        split_sim_range(batch_start, batch_end, chunk_size)
+        for batch_start, batch_end in split_sim_range(0, num_sims, batch_sims)
+    ]
+
+
 def string_to_int(s: str) -> int:
     "Convert criteria name to large integer value"
     h = hashlib.sha256(s.encode()).hexdigest()
     return int(h[:12], 16)
 
 
+def assign_criteria(gamestate: object, betmode: str, num_sims: int, set_sim_amount: bool) -> List[str]:
+    """Return the win criteria assigned to every simulation number, honouring fixed distribution amounts."""
+    if not set_sim_amount:
+        num_sims_criteria = get_sim_splits(gamestate, num_sims, betmode)
+        sim_criteria = assign_sim_criteria(num_sims_criteria, num_sims)
+        criteria_assignment = list(sim_criteria.values())
+    else:
+        for bm in gamestate.config.bet_modes:
+            if bm.get_name() == betmode:
+                dists = bm.get_distributions()
+                criteria_assignment = []
+                total_quota = 0.0
+                # populate fixed amount first
+                for d in dists:
+                    dist_criteria = d.get_criteria()
+                    if d.get_fixed_amt() is not None:
+                        criteria_assignment.extend([str(dist_criteria) for _ in range(d.get_fixed_amt())])
+                    else:
+                        total_quota += d.get_quota()
+                # populate remaining with quota
+                if len(criteria_assignment) < num_sims:
+                    quota_assignment = []
+                    quota_probs = []
+                    for d in dists:
+                        dist_criteria = d.get_criteria()
+                        if d.get_quota() is not None:
+                            quota_assignment.append(dist_criteria)
+                            quota_probs.append(d.get_quota())
+                            ncriteria = math.floor(
+                                max(1, (d.get_quota() / total_quota) * (num_sims - len(criteria_assignment)))
+                            )
+                            counter = 0
+                            while (len(criteria_assignment) < num_sims) and (counter < ncriteria):
+                                criteria_assignment.append(dist_criteria)
+                                counter += 1
+                    while len(criteria_assignment) < num_sims:
+                        criteria_assignment.append(random.choices(quota_assignment, quota_probs, k=1)[0])
+
+                    random.shuffle(criteria_assignment)
+                break
+
+    return criteria_assignment
+
+
+def get_simulation_seeds(criteria_assignment: List[str], set_sim_amount: bool) -> List[int]:
+    """Seed offsets for each simulation, fixed-amount modes are offset by criteria name."""
+    if not set_sim_amount:
+        return [i for i in range(len(criteria_assignment))]
+
+    unique_criteria = set(criteria_assignment)
+    criteria_offset = {}
+    criteria_counter = {}
+    for c in unique_criteria:
+        criteria_offset[c] = string_to_int(c)
+        criteria_counter[c] = 0
+    simulation_seeds = []
+    for c in criteria_assignment:
+        offset_val = criteria_offset[c] + criteria_counter[c]
+        criteria_counter[c] += 1
+        simulation_seeds.append(offset_val)
+
+    return simulation_seeds
+
+
+def restore_force_keys(gamestate: object, betmode: str, shards: List[Tuple[int, int]]) -> None:
+    """Add force keys recorded by shards restored from a checkpoint, which were not simulated in this run."""
+    for thread_index, repeat_count in shards:
+        force_file = gamestate.output_files.get_temp_force_name(betmode, thread_index, repeat_count)
+        with open(force_file, "r", encoding="UTF-8") as f:
+            recorded_events = ast.literal_eval(json.load(f))
+        for description in recorded_events:
+            for key, _ in description:
+                if key not in gamestate.get_betmode(betmode).get_force_keys():
+                    gamestate.get_betmode(betmode).add_force_key(key)
+
+
+def print_combined_rtp(gamestate: object, betmode: str, shard_results: List[dict]) -> None:
+    """Print the RTP of all shards simulated by worker processes in this run."""
+    num_sims = sum(result["num_sims"] for result in shard_results)
+    if num_sims == 0:
+        return
+    mode_cost = gamestate.get_betmode(betmode).get_cost()
+    total_wins, base_wins, free_wins = (
+        sum(result[key] for result in shard_results) for key in ("total_wins", "base_wins", "free_wins")
+    )
+    print(
+        betmode,
+        "finished",
+        num_sims,
+        "simulations with",
+        round(total_wins / (num_sims * mode_cost), 3),
+        "RTP.",
+        f"[baseGame: {round(base_wins / (num_sims * mode_cost), 3)}, "
+        f"freeGame: {round(free_wins / (num_sims * mode_cost), 3)}]",
+    )
+    lookup_stats = [result["lookup_stats"] for result in shard_results if "lookup_stats" in result]
+    if len(lookup_stats) > 0:
+        print(
+            betmode,
+            "betmode/distribution lookups served from the index:",
+            sum(stats["cached"] for stats in lookup_stats),
+            f"(index rebuilt {sum(stats['rebuilds'] for stats in lookup_stats)} times)",
+        )
+
+
+def prepare_book_dictionary(gamestate: object, betmode: str, checkpoint: Checkpoint, chunks: list) -> str:
+    """
+    Train the book dictionary on the first batch (unless a resumed run already has one) and recompress
+    the first batch shards with it, so every shard of the betmode shares the same dictionary.
+    Returns the dictionary path, or None if training was not possible.
+    """
+    dictionary_path = gamestate.output_files.get_dictionary_name(betmode)
+    shard_files = [checkpoint.get_shard_files(shard, 0)["books"] for shard in range(len(chunks))]
+    if not os.path.isfile(dictionary_path):
+        gamestate.output_files.check_folder_exists(os.path.dirname(dictionary_path))
+        if not train_book_dictionary(shard_files, dictionary_path, gamestate.config.compression_dictionary_size):
+            return None
+        print("Trained book dictionary", dictionary_path)
+
+    compressor = get_zstd_compressor(gamestate.config, load_book_dictionary(dictionary_path))
+    updated = apply_book_dictionary(shard_files, compressor)
+    for shard, sim_range in enumerate(chunks):
+        if checkpoint.get_shard_files(shard, 0)["books"] in updated:
+            checkpoint.record(shard, 0, sim_range)
+    return dictionary_path
+
+
 async def profile_and_visualize(
     game_id,
     gamestate,
-    all_betmode_configs,
     betmode,
     sim_allocation,
     threads,
@@ -125,11 +294,12 @@ async def profile_and_visualize(
     compress,
     write_event_list,
     simulation_seeds,
+    sim_range=None,
 ):
     """Create flame-graph, automatically opens output on localhost."""
     output_string = f"games/{game_id}/simulationProfile_{betmode}.prof"
     cProfile.runctx(
-        "gamestate.run_sims(all_betmode_configs, betmode, sim_allocation, threads, num_repeats, sims_per_thread, 0, repeat, compress, write_event_list, simulation_seeds)",
+        "gamestate.run_sims(betmode, sim_allocation, threads, num_repeats, sims_per_thread, 0, repeat, compress, write_event_list, simulation_seeds, sim_range)",
         globals(),
         locals(),
         output_string,
@@ -148,124 +318,142 @@ def run_multi_process_sims(
     write_event_list: bool = False,
     profiling: bool = False,
     set_sim_amount=False,
+    chunk_size: int = None,
+    resume: bool = False,
+    background_writer: bool = False,
 ):
-    """Setup multiprocessing manager for running all game-mode simulations."""
+    """
+    Run all game-mode simulations, reusing one pool of worker processes across batch repeats.
+    Each batch is split into chunks of chunk_size simulations (see partition_sims())
+    which idle workers pull from a shared queue, so threads holding slow criteria do not stall the batch.
+    Finished shards are recorded in a checkpoint manifest, with resume=True only shards missing
+    from a previous (interrupted) run with the same parameters are simulated.
+    With config.compression_dictionary, a zstd dictionary is trained on the first batch and used for all later shards.
+    """
     print("\nCreating books for", game_id, "in", betmode)
-    num_repeats = max(int(round(num_sims / threads / batching_size, 0)), 1)
-    sims_per_thread = int(num_sims / threads / num_repeats)
-    if not set_sim_amount:
-        num_sims_criteria = get_sim_splits(gamestate, num_sims, betmode)
-        sim_criteria = assign_sim_criteria(num_sims_criteria, num_sims)
-        simulation_seeds = [i for i in range(len(sim_criteria))]
-        criteria_assignment = list(sim_criteria.values())
+    if threads == 1 or profiling:
+        chunk_size = batching_size
+    batches = partition_sims(num_sims, threads, batching_size, chunk_size)
+    num_repeats = len(batches)
+    use_dictionary = compress and gamestate.config.compression_dictionary and not profiling
+    dictionary_path = None
+    checkpoint = Checkpoint(
+        gamestate.output_files,
+        betmode,
+        {
+            "num_sims": num_sims,
+            "threads": threads,
+            "batch_size": batching_size,
+            "chunk_size": chunk_size,
+            "compress": compress,
+            "dictionary": use_dictionary,
+        },
+    )
+    if resume and checkpoint.load():
+        criteria_assignment = checkpoint.load_criteria()
+        print("Resuming", betmode, "from checkpoint with", len(checkpoint.shards), "finished shards.")
     else:
-        for bm in gamestate.config.bet_modes:
-            if bm.get_name() == betmode:
-                dists = bm.get_distributions()
-                criteria_assignment, simulation_seeds = [], []
-                total_quota = 0.0
-                # populate fixed amount first
-                for d in dists:
-                    dist_criteria = d.get_criteria()
-                    if d.get_fixed_amt() is not None:
-                        criteria_assignment.extend([str(dist_criteria) for _ in range(d.get_fixed_amt())])
-                    else:
-                        total_quota += d.get_quota()
-                # populate remaining with quota
-                if len(criteria_assignment) < num_sims:
-                    quota_assignment = []
-                    quota_probs = []
-                    for d in dists:
-                        dist_criteria = d.get_criteria()
-                        if d.get_quota() is not None:
-                            quota_assignment.append(dist_criteria)
-                            quota_probs.append(d.get_quota())
-                            ncriteria = math.floor(
-                                max(1, (d.get_quota() / total_quota) * (num_sims - len(criteria_assignment)))
-                            )
-                            counter = 0
-                            while (len(criteria_assignment) < num_sims) and (counter < ncriteria):
-                                criteria_assignment.append(dist_criteria)
-                                counter += 1
-                    while len(criteria_assignment) < num_sims:
-                        criteria_assignment.append(random.choices(quota_assignment, quota_probs, k=1)[0])
+        gamestate.output_files.clear_temp_shards(betmode)
+        if os.path.isfile(gamestate.output_files.get_dictionary_name(betmode)):
+            os.remove(gamestate.output_files.get_dictionary_name(betmode))
+        criteria_assignment = assign_criteria(gamestate, betmode, num_sims, set_sim_amount)
+        checkpoint.save_criteria(criteria_assignment)
+        checkpoint.save()
+    simulation_seeds = get_simulation_seeds(criteria_assignment, set_sim_amount)
 
-                    random.shuffle(criteria_assignment)
-                break
+    pool, shard_results = None, []
+    if threads > 1 and not profiling:
+        pool = WorkerPool(
+            gamestate,
+            {
+                "betmode": betmode,
+                "sim_to_criteria": criteria_assignment,
+                "total_threads": threads,
+                "total_repeats": num_repeats,
+                "num_sims": batching_size,
+                "compress": compress,
+                "write_event_list": write_event_list,
+                "simulation_seeds": simulation_seeds,
+                "background_writer": background_writer,
+            },
+            threads,
+        )
 
-        unique_criteria = set(criteria_assignment)
-        criteria_offset = {}
-        criteria_counter = {}
-        for c in unique_criteria:
-            criteria_offset[c] = string_to_int(c)
-            criteria_counter[c] = 0
-        simulation_seeds = []
-        for c in criteria_assignment:
-            offset_val = criteria_offset[c] + criteria_counter[c]
-            criteria_counter[c] += 1
-            simulation_seeds.append(offset_val)
-
-    for repeat in range(num_repeats):
-        print("Batch", repeat + 1, "of", num_repeats)
-        processes = []
-        manager = Manager()
-        all_betmode_configs = manager.list()
-        if profiling:
-            asyncio.run(
-                profile_and_visualize(
-                    game_id=game_id,
-                    gamestate=gamestate,
-                    all_betmode_configs=all_betmode_configs,
+    resumed_shards = []
+    try:
+        for repeat, chunks in enumerate(batches):
+            print("Batch", repeat + 1, "of", num_repeats)
+            pending = []
+            for shard, sim_range in enumerate(chunks):
+                if checkpoint.is_complete(shard, repeat, sim_range):
+                    resumed_shards.append((shard, repeat))
+                else:
+                    pending.append((shard, sim_range))
+            if len(pending) == 0:
+                print("Batch", repeat + 1, "restored from checkpoint.")
+            elif profiling:
+                asyncio.run(
+                    profile_and_visualize(
+                        game_id=game_id,
+                        gamestate=gamestate,
+                        betmode=betmode,
+                        sim_allocation=criteria_assignment,
+                        threads=threads,
+                        num_repeats=num_repeats,
+                        sims_per_thread=batching_size,
+                        repeat=repeat,
+                        compress=compress,
+                        write_event_list=write_event_list,
+                        simulation_seeds=simulation_seeds,
+                        sim_range=chunks[0],
+                    )
+                )
+                checkpoint.record(0, repeat, chunks[0])
+            elif threads == 1:
+                gamestate.run_sims(
                     betmode=betmode,
-                    sim_allocation=criteria_assignment,
-                    threads=threads,
-                    num_repeats=num_repeats,
-                    sims_per_thread=sims_per_thread,
-                    repeat=repeat,
+                    sim_to_criteria=criteria_assignment,
+                    total_threads=threads,
+                    total_repeats=num_repeats,
+                    num_sims=batching_size,
+                    thread_index=0,
+                    repeat_count=repeat,
                     compress=compress,
                     write_event_list=write_event_list,
                     simulation_seeds=simulation_seeds,
+                    sim_range=chunks[0],
+                    background_writer=background_writer,
+                    dictionary_path=dictionary_path,
                 )
-            )
-        elif threads == 1:
-            gamestate.run_sims(
-                betmode_copy_list=all_betmode_configs,
-                betmode=betmode,
-                sim_to_criteria=criteria_assignment,
-                total_threads=threads,
-                total_repeats=num_repeats,
-                num_sims=sims_per_thread,
-                thread_index=0,
-                repeat_count=repeat,
-                compress=compress,
-                write_event_list=write_event_list,
-                simulation_seeds=simulation_seeds,
-            )
-        else:
-            for thread in range(threads):
-                process = Process(
-                    target=gamestate.run_sims,
-                    args=(
-                        all_betmode_configs,
-                        betmode,
-                        criteria_assignment,
-                        threads,
-                        num_repeats,
-                        sims_per_thread,
-                        thread,
-                        repeat,
-                        compress,
-                        write_event_list,
-                        simulation_seeds,
+                checkpoint.record(0, repeat, chunks[0])
+            else:
+                for shard, sim_range in pending:
+                    pool.submit(
+                        {
+                            "thread_index": shard,
+                            "repeat_count": repeat,
+                            "sim_range": sim_range,
+                            "dictionary_path": dictionary_path,
+                        }
+                    )
+                finished = pool.wait_for(
+                    len(pending),
+                    on_done=lambda shard, repeat_count: checkpoint.record(
+                        shard, repeat_count, batches[repeat_count][shard]
                     ),
                 )
-                print("Started thread", thread)
-                process.start()
-                processes += [process]
-            print("All threads are online.")
-            for process in processes:
-                process.join()
-            print("Finished joining threads.")
-            gamestate.combine(all_betmode_configs, betmode)
-            gamestate.get_betmode(betmode).lock_force_keys()
-            manager.shutdown()
+                shard_results.extend(result for _, _, result in finished)
+            if use_dictionary and repeat == 0:
+                dictionary_path = prepare_book_dictionary(gamestate, betmode, checkpoint, chunks)
+    except BaseException:
+        # workers block on the job queue, stop them on any failure or interrupt so the interpreter can exit
+        if pool is not None:
+            pool.terminate()
+        raise
+
+    restore_force_keys(gamestate, betmode, resumed_shards)
+    if pool is not None:
+        pool.close()
+        gamestate.combine([result["force_keys"] for result in shard_results], betmode)
+        gamestate.get_betmode(betmode).lock_force_keys()
+        print_combined_rtp(gamestate, betmode, shard_results)
@@ -1,19 +1,23 @@
 from copy import copy, deepcopy
 from abc import ABC, abstractmethod
 from warnings import warn
-import random
 
 # from src.config.config import BetMode
 from src.wins.win_manager import WinManager
 from src.calculations.symbol import SymbolStorage
+from src.calculations.rng import make_rng
+from src.calculations.reelstrip import ReelStopIndex
 from src.config.output_filenames import OutputFiles
 from src.state.books import Book
+from src.write_data.book_writer import BookWriter
 from src.write_data.write_data import (
     print_recorded_wins,
     make_lookup_tables,
-    write_json,
     make_lookup_pay_split,
     write_library_events,
+    get_zstd_compressor,
+    load_book_dictionary,
+    update_unique_events,
 )
 
 
@@ -25,11 +29,18 @@ class GeneralGameState(ABC):
         self.output_files = OutputFiles(self.config)
         self.win_manager = WinManager(self.config.basegame_type, self.config.freegame_type, config.wincap)
         self.library = {}
+        self.book_writer = None
+        self.library_events = {}
         self.recorded_events = {}
         self.special_symbol_functions = {}
         self.temp_wins = []
         self.create_symbol_map()
         self.assign_special_sym_function()
+        self.compiled_reels = {}
+        self.board_window = None
+        self.reel_stop_indexes = {}
+        self.conditional_reel_weights = {}
+        self.build_reel_stop_indexes()
         self.sim = 0
         self.criteria = ""
         self.book = Book(self.sim, self.criteria)
@@ -39,6 +50,7 @@ class GeneralGameState(ABC):
             "totalWin": 0,
             "wins": [],
         }
+        self.rng = make_rng(getattr(config, "rng_mode", "legacy"), getattr(config, "rng_seed", 0))
         self.reset_seed()
         self.reset_book()
         self.reset_fs_spin()
@@ -56,6 +68,27 @@ class GeneralGameState(ABC):
         all_symbols_list = list(all_symbols_list)
         self.symbol_storage = SymbolStorage(self.config, all_symbols_list)
 
+    def build_reel_stop_indexes(self) -> None:
+        """Index the stop positions of every special symbol type on every reelstrip."""
+        for reelstrip_id in getattr(self.config, "reels", {}):
+            for special_symbol in self.config.special_symbols:
+                self.get_reel_stop_index(reelstrip_id, special_symbol)
+
+    def get_reel_stop_index(self, reelstrip_id: str, target_symbol: str) -> ReelStopIndex:
+        """
+        Stop positions of a symbol name or special symbol type on a reelstrip.
+        Built on first use (and again if the config reelstrip is replaced).
+        """
+        key = (reelstrip_id, target_symbol)
+        index = self.reel_stop_indexes.get(key)
+        reelstrip = self.config.reels[reelstrip_id]
+        if index is None or index.source is not reelstrip:
+            target_names = set(self.config.special_symbols.get(target_symbol, [])) | {target_symbol}
+            num_rows = self.config.num_rows[: self.config.num_reels]
+            index = ReelStopIndex(reelstrip, target_names, num_rows)
+            self.reel_stop_indexes[key] = index
+        return index
+
     @abstractmethod
     def assign_special_sym_function(self):
         """ "Define custom symbol functions in game_override."""
@@ -87,9 +120,9 @@ class GeneralGameState(ABC):
     def reset_seed(self, sim: int = 0, seed_override=None) -> None:
         """Reset rng seed to simulation number for reproducibility."""
         if seed_override is not None:
-            random.seed(seed_override + 1)
+            self.rng.seed(seed_override + 1)
         else:
-            random.seed(sim + 1)
+            self.rng.seed(sim + 1)
         self.sim = sim
         self.repeat_count = 0
 
@@ -100,8 +133,66 @@ class GeneralGameState(ABC):
         self.gametype = self.config.freegame_type
         self.win_manager.reset_spin_win()
 
+    @property
+    def betmode(self) -> str:
+        """Name of the betmode being simulated."""
+        return self._betmode
+
+    @betmode.setter
+    def betmode(self, mode_name: str) -> None:
+        if mode_name != getattr(self, "_betmode", None):
+            self._betmode = mode_name
+            self.resolve_distribution()
+
+    @property
+    def criteria(self) -> str:
+        """Criteria of the distribution being simulated."""
+        return self._criteria
+
+    @criteria.setter
+    def criteria(self, criteria: str) -> None:
+        if criteria != getattr(self, "_criteria", None):
+            self._criteria = criteria
+            self.resolve_distribution()
+
+    def build_distribution_index(self) -> None:
+        """
+        Index config.bet_modes by name, and each betmode's distributions by criteria.
+        Built on first use and again if config.bet_modes is replaced. Call directly if it is modified in place.
+        """
+        self.indexed_bet_modes = self.config.bet_modes
+        self.betmode_index = {betmode.get_name(): betmode for betmode in self.config.bet_modes}
+        self.distribution_index = {}
+        for name, betmode in self.betmode_index.items():
+            distributions = {}
+            for distribution in betmode.get_distributions():
+                distributions.setdefault(distribution._criteria, distribution)
+            self.distribution_index[name] = distributions
+        self.lookup_stats = getattr(self, "lookup_stats", {"cached": 0, "rebuilds": 0})
+        self.lookup_stats["rebuilds"] += 1
+        self.resolve_distribution()
+
+    def resolve_distribution(self) -> None:
+        """
+        Cache the BetMode, Distribution and conditions for the current betmode and criteria from the index,
+        so the get_current_* lookups below are attribute reads.
+        """
+        if getattr(self, "indexed_bet_modes", None) is not self.config.bet_modes:
+            self.build_distribution_index()
+            return
+        betmode_name = getattr(self, "_betmode", None)
+        self.current_betmode = self.betmode_index.get(betmode_name)
+        self.current_distribution = self.distribution_index.get(betmode_name, {}).get(
+            getattr(self, "_criteria", None)
+        )
+        self.current_conditions = None if self.current_distribution is None else self.current_distribution._conditions
+
     def get_betmode(self, mode_name) -> object:
         """Return all current betmode information."""
+        betmode = self.betmode_index.get(mode_name)
+        if betmode is not None:
+            self.lookup_stats["cached"] += 1
+            return betmode
         for betmode in self.config.bet_modes:
             if betmode.get_name() == mode_name:
                 return betmode
@@ -109,24 +200,22 @@ class GeneralGameState(ABC):
 
     def get_current_betmode(self) -> object:
         """Get current betmode information."""
-        for betmode in self.config.bet_modes:
-            if betmode.get_name() == self.betmode:
-                return betmode
+        self.lookup_stats["cached"] += 1
+        return self.current_betmode
 
     def get_current_betmode_distributions(self) -> object:
         """Return current betmode criteria information."""
-        dist = self.get_current_betmode().get_distributions()
-        for c in dist:
-            if c._criteria == self.criteria:
-                return c
-        raise RuntimeError("Could not locate criteria distribution.")
+        if self.current_distribution is None:
+            raise RuntimeError("Could not locate criteria distribution.")
+        self.lookup_stats["cached"] += 1
+        return self.current_distribution
 
     def get_current_distribution_conditions(self) -> dict:
         """Return requirements for criteria setup/acceptance."""
-        for d in self.get_betmode(self.betmode).get_distributions():
-            if d._criteria == self.criteria:
-                return d._conditions
-        return RuntimeError("Could not locate betmode conditions")
+        if self.current_conditions is None:
+            return RuntimeError("Could not locate betmode conditions")
+        self.lookup_stats["cached"] += 1
+        return self.current_conditions
 
     def check_current_repeat_count(self, warn_after_count: int = 1000):
         """Alert user to high repeat count."""
@@ -154,19 +243,18 @@ class GeneralGameState(ABC):
             if keyValue[0] not in current_mode_force_keys:
                 self.get_current_betmode().add_force_key(keyValue[0])  # type:ignore
 
-    def combine(self, modes, betmode_name) -> None:
-        """Retrieve unique force record keys."""
-        for modeConfig in modes:
-            for betmode in modeConfig:
-                if betmode.get_name() == betmode_name:
-                    break
-            force_keys = betmode.get_force_keys()  # type:ignore
+    def combine(self, force_key_sets, betmode_name) -> None:
+        """Retrieve unique force record keys returned by each worker's run_sims()."""
+        for force_keys in force_key_sets:
             for key in force_keys:
                 if key not in self.get_betmode(betmode_name).get_force_keys():  # type:ignore
                     self.get_betmode(betmode_name).add_force_key(key)  # type:ignore
 
     def imprint_wins(self) -> None:
-        """Record all events to library if criteria conditions are satisfied."""
+        """
+        Record all events to library if criteria conditions are satisfied.
+        While run_sims() is streaming books to a shard, only the book summary is kept in the library.
+        """
         for temp_win_index in range(int(len(self.temp_wins) / 2)):
             description = tuple(sorted(self.temp_wins[2 * temp_win_index].items()))
             book_id = self.temp_wins[2 * temp_win_index + 1]
@@ -182,7 +270,14 @@ class GeneralGameState(ABC):
                     "bookIds": [book_id],
                 }
         self.temp_wins = []
-        self.library[self.sim + 1] = copy(self.book.to_json())
+        if self.book_writer is not None:
+            book = self.book.to_json()
+            self.book_writer.write(book)
+            if self.write_event_list:
+                update_unique_events(self.library_events, book)
+            self.library[self.sim + 1] = self.book.to_summary()
+        else:
+            self.library[self.sim + 1] = copy(self.book.to_json())
         self.win_manager.update_end_round_wins()
 
     def update_final_win(self) -> None:
@@ -234,7 +329,6 @@ class GeneralGameState(ABC):
 
     def run_sims(
         self,
-        betmode_copy_list,
         betmode,
         sim_to_criteria,
         total_threads,
@@ -245,8 +339,15 @@ class GeneralGameState(ABC):
         compress=True,
         write_event_list=True,
         simulation_seeds=[],
-    ) -> None:
-        """Assigns criteria and runs individual simulations. Results are stored in temporary file to be combined when all threads are finished."""
+        sim_range=None,
+        background_writer=False,
+        dictionary_path=None,
+    ) -> dict:
+        """Assigns criteria and runs individual simulations. Results are stored in temporary file to be combined when all threads are finished.
+        sim_range=(start, end) overrides the contiguous thread/repeat slice, allowing arbitrary chunks to be scheduled.
+        background_writer=True compresses and writes books on a separate thread while simulations continue.
+        dictionary_path points to a trained zstd dictionary used to compress the books.
+        Returns the betmode force keys and win totals, which is all the parent process needs from a worker."""
         mode_max_win = None
         for bm in self.config.bet_modes:
             if bm._name.lower() == betmode.lower():
@@ -255,19 +356,38 @@ class GeneralGameState(ABC):
 
         self.win_manager = WinManager(self.config.basegame_type, self.config.freegame_type, mode_max_win)
         self.library = {}
+        self.library_events = {}
         self.recorded_events = {}
+        self.write_event_list = write_event_list
         self.betmode = betmode
+        self.lookup_stats = {"cached": 0, "rebuilds": 0}
+        if sim_range is None:
+            sim_range = (
+                thread_index * num_sims + (total_threads * num_sims) * repeat_count,
+                (thread_index + 1) * num_sims + (total_threads * num_sims) * repeat_count,
+            )
+        num_sims = sim_range[1] - sim_range[0]
         self.num_sims = num_sims
-        for sim in range(
-            thread_index * num_sims + (total_threads * num_sims) * repeat_count,
-            (thread_index + 1) * num_sims + (total_threads * num_sims) * repeat_count,
-        ):
-            self.criteria = sim_to_criteria[sim]
-            self.run_spin(sim, simulation_seeds[sim])
+        book_writer = BookWriter(
+            self.output_files.get_temp_multi_thread_name(betmode, thread_index, repeat_count, compress),
+            regular_json=self.config.output_regular_json,
+            background=background_writer,
+            compressor=get_zstd_compressor(self.config, load_book_dictionary(dictionary_path)) if compress else None,
+        )
+        self.book_writer = book_writer
+        try:
+            for sim in range(sim_range[0], sim_range[1]):
+                self.criteria = sim_to_criteria[sim]
+                self.run_spin(sim, simulation_seeds[sim])
+        except BaseException:
+            book_writer.close()
+            raise
+        finally:
+            self.book_writer = None
         mode_cost = self.get_current_betmode().get_cost()
 
         print(
-            "Thread " + str(thread_index),
+            "Shard " + str(thread_index),
             "finished with",
             round(self.win_manager.total_cumulative_wins / (num_sims * mode_cost), 3),
             "RTP.",
@@ -275,16 +395,25 @@ class GeneralGameState(ABC):
             flush=True,
         )
 
-        write_json(
-            self,
-            self.output_files.get_temp_multi_thread_name(
-                betmode, thread_index, repeat_count, (compress) * True + (not compress) * False
-            ),
+        book_writer.submit(
+            print_recorded_wins, self, self.output_files.get_temp_force_name(betmode, thread_index, repeat_count)
+        )
+        book_writer.submit(
+            make_lookup_tables, self, self.output_files.get_temp_lookup_name(betmode, thread_index, repeat_count)
+        )
+        book_writer.submit(
+            make_lookup_pay_split, self, self.output_files.get_temp_segmented_name(betmode, thread_index, repeat_count)
         )
-        print_recorded_wins(self, self.output_files.get_temp_force_name(betmode, thread_index, repeat_count))
-        make_lookup_tables(self, self.output_files.get_temp_lookup_name(betmode, thread_index, repeat_count))
-        make_lookup_pay_split(self, self.output_files.get_temp_segmented_name(betmode, thread_index, repeat_count))
-
         if write_event_list:
-            write_library_events(self, list(self.library.values()), betmode)
-        betmode_copy_list.append(self.config.bet_modes)
+            book_writer.submit(write_library_events, self, [], betmode, self.library_events)
+        book_writer.close()
+        if background_writer:
+            print("Shard " + str(thread_index), "background writer:", book_writer.get_report(), flush=True)
+        return {
+            "force_keys": set(self.get_current_betmode().get_force_keys()),
+            "lookup_stats": dict(self.lookup_stats),
+            "num_sims": num_sims,
+            "total_wins": self.win_manager.total_cumulative_wins,
+            "base_wins": self.win_manager.cumulative_base_wins,
+            "free_wins": self.win_manager.cumulative_free_wins,
+        }
@@ -0,0 +1,85 @@
+"""Long-lived worker processes for running simulation batches."""
+
+import queue
+import traceback
+from multiprocessing import Process, Queue
+
+
+def worker_loop(gamestate: object, shared_args: dict, job_queue: Queue, done_queue: Queue) -> None:
+    """Run simulation jobs received over the job queue until a stop signal (None) arrives."""
+    while True:
+        job = job_queue.get()
+        if job is None:
+            break
+        try:
+            result = gamestate.run_sims(**shared_args, **job)
+            done_queue.put(("done", job["thread_index"], job["repeat_count"], result))
+        except Exception:
+            done_queue.put(("error", job["thread_index"], traceback.format_exc(), None))
+            break
+
+
+class WorkerPool:
+    """
+    Pool of simulation processes which receive the gamestate once per betmode.
+    shared_args (criteria and seed allocations, output options) are sent once when the workers start,
+    each job then only carries the remaining keyword arguments passed to gamestate.run_sims().
+    Workers send back only the (small) dict returned by run_sims() over the done queue.
+    """
+
+    def __init__(self, gamestate: object, shared_args: dict, threads: int):
+        self.job_queue = Queue()
+        self.done_queue = Queue()
+        self.processes = []
+        for thread in range(threads):
+            process = Process(
+                target=worker_loop,
+                args=(gamestate, shared_args, self.job_queue, self.done_queue),
+                daemon=True,
+            )
+            print("Started thread", thread)
+            process.start()
+            self.processes.append(process)
+        print("All threads are online.")
+
+    def submit(self, job: dict) -> None:
+        """Queue a simulation job for the next available worker."""
+        self.job_queue.put(job)
+
+    def wait_for(self, num_jobs: int, on_done: callable = None, poll_interval: float = 1.0) -> list:
+        """
+        Block until num_jobs have completed, returning their (thread_index, repeat_count, result) tuples.
+        on_done(thread_index, repeat_count) is called as soon as each job finishes.
+        """
+        finished = []
+        while len(finished) < num_jobs:
+            try:
+                status, thread_index, details, result = self.done_queue.get(timeout=poll_interval)
+            except queue.Empty:
+                if not all(p.is_alive() for p in self.processes):
+                    self.terminate()
+                    raise RuntimeError("Simulation worker exited unexpectedly.")
+                continue
+            if status == "error":
+                self.terminate()
+                raise RuntimeError(f"Simulation worker failed on thread {thread_index}:\n{details}")
+            finished.append((thread_index, details, result))
+            if on_done is not None:
+                on_done(thread_index, details)
+        return finished
+
+    def close(self) -> None:
+        """Send stop signals and join all workers."""
+        for _ in self.processes:
+            self.job_queue.put(None)
+        for process in self.processes:
+            process.join()
+        print("Finished joining threads.")
+
+    def terminate(self) -> None:
+        """Forcefully stop all workers after a failure."""
+        for process in self.processes:
+            if process.is_alive():
+                process.terminate()
+        for process in self.processes:
+            process.join()
@@ -3,6 +3,7 @@
 
 from typing import List, Dict
 from src.calculations.board import Board
+from src.calculations.compact_board import CompactBoard, is_compact, restore_number
 
 
 def apply_mult(
@@ -13,15 +14,18 @@ def apply_mult(
     positions: list = [],
     multiplier_key: str = "multiplier",
 ):
-    """Apply multiplier method to win_amount and winning symbol positions."""
+    """
+    Apply multiplier method to win_amount and winning symbol positions.
+    Positions are {"reel", "row"} dictionaries or (reel, row) pairs. Only the selected strategy is evaluated.
+    """
     strat = {
-        "global": apply_global_mult(win_amount, global_multiplier),
-        "symbol": apply_added_symbol_mult(board, win_amount, positions, multiplier_key=multiplier_key),
-        "combined": apply_combined_mult(
+        "global": lambda: apply_global_mult(win_amount, global_multiplier),
+        "symbol": lambda: apply_added_symbol_mult(board, win_amount, positions, multiplier_key=multiplier_key),
+        "combined": lambda: apply_combined_mult(
             board, win_amount, global_multiplier, positions, multiplier_key=multiplier_key
         ),
     }
-    return strat[strategy]
+    return strat[strategy]()
 
 
 def apply_global_mult(win_amount: float, global_multiplier: int) -> tuple:
@@ -32,12 +36,17 @@ def apply_global_mult(win_amount: float, global_multiplier: int) -> tuple:
 def apply_added_symbol_mult(board: Board, win_amount: float, positions: List[Dict], multiplier_key: str) -> tuple:
     """Get multiplier attribute from all winning positions"""
     symbol_multiplier = 0
-    for pos in positions:
-        if (
-            board[pos["reel"]][pos["row"]].check_attribute(multiplier_key)
-            and board[pos["reel"]][pos["row"]].get_attribute(multiplier_key) > 1
-        ):
-            symbol_multiplier += board[pos["reel"]][pos["row"]].get_attribute(multiplier_key)
+    cells = [(pos["reel"], pos["row"]) if isinstance(pos, dict) else pos for pos in positions]
+    if cells and is_compact(board) and multiplier_key in CompactBoard.array_attributes:
+        values = getattr(board, multiplier_key).tolist()
+        for reel, row in cells:
+            value = values[board.cell_index(reel, row)]
+            if value > 1:  # False for unset (NaN) values
+                symbol_multiplier += restore_number(value)
+    else:
+        for reel, row in cells:
+            if board[reel][row].check_attribute(multiplier_key) and board[reel][row].get_attribute(multiplier_key) > 1:
+                symbol_multiplier += board[reel][row].get_attribute(multiplier_key)
     return (round(win_amount * max(symbol_multiplier, 1), 2), max(symbol_multiplier, 1))
 
 
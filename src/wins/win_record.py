@@ -0,0 +1,65 @@
+"""Win entries whose JSON-ready details are built on first use."""
+
+from collections.abc import Mapping
+from copy import deepcopy
+
+
+class WinRecord(Mapping):
+    """
+    Single entry of an evaluator's win_data["wins"].
+    The cheap keys (symbol, kind, win, ...) are stored directly. The remaining keys (positions, meta, ...) are
+    returned by details(*args) the first time one of them is read, so wins which are only summed into
+    totalWin never build their position and meta dictionaries.
+    Copies (as made by win_info_event) are plain dictionaries with the keys in the same order.
+    summary holds the few detail values read by the force-file records (see get_summary), so recording a win
+    does not build its details either.
+    """
+
+    __slots__ = ("fields", "details", "args", "summary")
+
+    def __init__(self, fields: dict, details, *args, summary: dict = None):
+        self.fields = fields
+        self.details = details
+        self.args = args
+        self.summary = summary or {}
+
+    def materialize(self) -> dict:
+        """All keys of the win, building the details if they have not been read yet."""
+        if self.details is not None:
+            self.fields.update(self.details(*self.args))
+            self.details, self.args = None, ()
+        return self.fields
+
+    def __getitem__(self, key):
+        try:
+            return self.fields[key]
+        except KeyError:
+            return self.materialize()[key]
+
+    def __iter__(self):
+        return iter(self.materialize())
+
+    def __len__(self) -> int:
+        return len(self.materialize())
+
+    def __copy__(self) -> dict:
+        return dict(self.materialize())
+
+    def __deepcopy__(self, memo: dict) -> dict:
+        return deepcopy(self.materialize(), memo)
+
+    def __repr__(self) -> str:
+        return repr(self.materialize())
+
+
+def get_summary(win: Mapping, key: str):
+    """
+    Detail value of a win used by the record_*_wins functions: a meta key, or "positionCount" for the
+    number of positions. Read from WinRecord.summary when held there, otherwise from the full win.
+    """
+    summary = getattr(win, "summary", None)
+    if summary and key in summary:
+        return summary[key]
+    if key == "positionCount":
+        return len(win["positions"])
+    return win["meta"][key]
@@ -0,0 +1,131 @@
+"""Incrementally write simulation books to temporary shard files."""
+
+import json
+import time
+import queue
+import threading
+import zstandard as zstd
+
+
+class BookWriter:
+    """
+    Serialise (and compress) each book as soon as it is imprinted, rather than holding the
+    whole batch library in memory. Output format matches write_json():
+    .jsonl.zst/.jsonl files hold one book per line, .json files hold a single JSON list.
+
+    With background=True books are passed through a bounded queue to a writer thread, so zstd
+    compression and file writes overlap with simulation. Other file-writing functions can be
+    queued behind the books with submit().
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        regular_json: bool = False,
+        background: bool = False,
+        queue_size: int = 1000,
+        compressor: zstd.ZstdCompressor = None,
+    ):
+        self.filename = filename
+        self.compress = filename.endswith(".zst")
+        self.regular_json = regular_json and filename.endswith(".json")
+        self.books_written = 0
+        self.stats = {"bytes": 0, "write_time": 0.0, "queue_samples": 0, "queue_depth_total": 0, "max_queue_depth": 0}
+        if self.compress:
+            self.file = open(filename, "wb")
+            compressor = compressor if compressor is not None else zstd.ZstdCompressor()
+            self.stream = compressor.stream_writer(self.file, closefd=False)
+        else:
+            self.file = open(filename, "w", encoding="UTF-8")
+            self.stream = None
+            if self.regular_json:
+                self.file.write("[")
+
+        self.queue = None
+        self.thread = None
+        self.error = None
+        if background:
+            self.queue = queue.Queue(maxsize=queue_size)
+            self.thread = threading.Thread(target=self.run_background_writer, daemon=True)
+            self.thread.start()
+
+    def write(self, book: dict) -> None:
+        """Serialise a single book to the shard (or queue it for the writer thread)."""
+        if self.queue is None:
+            self.write_book(book)
+        else:
+            self.sample_queue_depth()
+            self.queue.put(("book", book))
+
+    def submit(self, func: callable, *args) -> None:
+        """Run func(*args) after all previously written books, on the writer thread if enabled."""
+        if self.queue is None:
+            func(*args)
+        else:
+            self.sample_queue_depth()
+            self.queue.put(("task", (func, args)))
+
+    def write_book(self, book: dict) -> None:
+        """Serialise and write a book to file."""
+        start_time = time.perf_counter()
+        book_string = json.dumps(book)
+        if self.compress:
+            book_bytes = (book_string + "\n").encode("UTF-8")
+            self.stream.write(book_bytes)
+            self.stats["bytes"] += len(book_bytes)
+        else:
+            if self.regular_json:
+                book_string = book_string if self.books_written == 0 else ", " + book_string
+            else:
+                book_string += "\n"
+            self.file.write(book_string)
+            self.stats["bytes"] += len(book_string)
+        self.books_written += 1
+        self.stats["write_time"] += time.perf_counter() - start_time
+
+    def sample_queue_depth(self) -> None:
+        """Track how far the writer thread is behind the simulation."""
+        depth = self.queue.qsize()
+        self.stats["queue_samples"] += 1
+        self.stats["queue_depth_total"] += depth
+        self.stats["max_queue_depth"] = max(self.stats["max_queue_depth"], depth)
+
+    def run_background_writer(self) -> None:
+        """Writer thread: consume books and tasks until a stop item is received."""
+        while True:
+            kind, item = self.queue.get()
+            if kind == "stop":
+                break
+            if self.error is not None:
+                continue  # keep draining so the simulation thread never blocks on a full queue
+            try:
+                if kind == "book":
+                    self.write_book(item)
+                else:
+                    func, args = item
+                    func(*args)
+            except Exception as err:
+                self.error = err
+
+    def close(self) -> None:
+        """Wait for queued books, flush remaining data and close the shard."""
+        if self.thread is not None:
+            self.queue.put(("stop", None))
+            self.thread.join()
+        if self.compress:
+            self.stream.close()
+        elif self.regular_json:
+            self.file.write("]")
+        self.file.close()
+        if self.error is not None:
+            raise RuntimeError(f"Background book writer failed for {self.filename}") from self.error
+
+    def get_report(self) -> str:
+        """Summary of writer throughput and queue depth."""
+        megabytes = self.stats["bytes"] / 1e6
+        throughput = megabytes / self.stats["write_time"] if self.stats["write_time"] > 0 else 0.0
+        mean_depth = self.stats["queue_depth_total"] / max(self.stats["queue_samples"], 1)
+        return (
+            f"{self.books_written} books, {round(megabytes, 2)} MB at {round(throughput, 1)} MB/s, "
+            f"queue depth mean {round(mean_depth, 1)} max {self.stats['max_queue_depth']}"
+        )
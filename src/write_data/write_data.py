@@ -3,6 +3,7 @@
 from collections import defaultdict
 from warnings import warn
 import shutil
+import io
 import os
 import hashlib
 import json
@@ -27,6 +28,72 @@ def get_sha_256(file_to_hash: str):
     return sha256_hexRep
 
 
+def get_zstd_compressor(config: object, dictionary: zstd.ZstdCompressionDict = None) -> zstd.ZstdCompressor:
+    """Construct a compressor from the compression settings in the game config."""
+    params = zstd.ZstdCompressionParameters.from_level(
+        config.compression_level,
+        threads=config.compression_threads,
+        enable_ldm=config.compression_long_distance,
+        window_log=config.compression_window_log,
+        write_dict_id=dictionary is not None,
+    )
+    return zstd.ZstdCompressor(dict_data=dictionary, compression_params=params)
+
+
+def load_book_dictionary(dictionary_path: str) -> zstd.ZstdCompressionDict:
+    """Load a trained book dictionary, returns None if no dictionary has been written."""
+    if dictionary_path is None or not os.path.isfile(dictionary_path):
+        return None
+    with open(dictionary_path, "rb") as f:
+        return zstd.ZstdCompressionDict(f.read())
+
+
+def train_book_dictionary(file_list: list, dictionary_path: str, dict_size: int = 112640) -> bool:
+    """
+    Train a zstd dictionary using individual books from compressed shards as samples.
+    Roughly 100x the dictionary size of sample data is used, spread evenly over the shards.
+    Returns False (and writes no dictionary) if there are too few books to train on.
+    """
+    samples = []
+    sample_budget = 100 * dict_size // max(len(file_list), 1)
+    for fname in file_list:
+        shard_bytes = 0
+        with open(fname, "rb") as f:
+            with zstd.ZstdDecompressor().stream_reader(f, read_across_frames=True) as reader:
+                for line in io.BufferedReader(reader):
+                    if shard_bytes >= sample_budget:
+                        break
+                    if line.strip():
+                        samples.append(line)
+                        shard_bytes += len(line)
+    try:
+        dictionary = zstd.train_dictionary(dict_size, samples)
+    except zstd.ZstdError as err:
+        warn(f"Could not train book dictionary from {len(samples)} books: {err}")
+        return False
+
+    temp_path = dictionary_path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(dictionary.as_bytes())
+    os.replace(temp_path, dictionary_path)
+    return True
+
+
+def apply_book_dictionary(file_list: list, compressor: zstd.ZstdCompressor) -> list:
+    """Recompress shards written before the dictionary was trained, returns the updated files."""
+    updated = []
+    for fname in file_list:
+        with open(fname, "rb") as f:
+            frame_header = f.read(18)
+        if zstd.get_frame_parameters(frame_header).dict_id != 0:
+            continue
+        temp_path = fname + ".tmp"
+        recompress_zstd_files([fname], temp_path, compressor)
+        os.replace(temp_path, fname)
+        updated.append(fname)
+    return updated
+
+
 def make_force_json(gamestate: object):
     """Construct force-file from recorded description keys."""
     folder_path = gamestate.config.force_path
@@ -103,18 +170,21 @@ def make_lookup_pay_split(gamestate: object, name: str):
     file.close()
 
 
-def write_library_events(gamestate: object, library: list, gametype: str):
-    """Write all unique events within a given mode - with one example application."""
-    unique_event = []
-    event_items = {}
+def update_unique_events(event_items: dict, book: dict) -> None:
+    """Store the first example of each event type within a book."""
+    for instance in book["events"]:
+        lib_event = instance["type"]
+        if lib_event not in event_items:
+            event_items[lib_event] = {key: instance[key] for key in instance.keys() if key != "index"}
+
+
+def write_library_events(gamestate: object, library: list, gametype: str, event_items: dict = None):
+    """Write all unique events within a given mode - with one example application.
+    event_items may hold examples which were already collected while books were streamed to file."""
+    if event_items is None:
+        event_items = {}
     for event in library:
-        for instance in event["events"]:
-            lib_event = instance["type"]
-            if lib_event not in unique_event:
-                unique_event.append(lib_event)
-                item_keys = instance.keys()
-                dict_details = {key: instance[key] for key in item_keys if key != "index"}
-                event_items[lib_event] = dict_details
+        update_unique_events(event_items, event)
     json_object = json.dumps(event_items, indent=4)
     with open(
         os.path.join(gamestate.output_files.config_path, f"event_config_{gametype}.json"),
@@ -132,30 +202,32 @@ def output_lookup_and_force_files(
     gamestate: object,
     num_sims: int = 1000000,
     compress: bool = True,
+    book_merge: str = "concat",
 ):
-    """Combine temporary lookup tables and force files into a single output."""
+    """
+    Combine temporary lookup tables and force files into a single output.
+    Temp shards are discovered from the temp directory (in simulation order), so the
+    thread, batch and simulation counts do not need to divide evenly.
+
+    Compressed books are merged according to book_merge:
+        "concat": shard frames are copied byte-for-byte into the final file (multi-frame zstd)
+        "recompress": shards are streamed through a single compressor using the config compression settings
+    """
     print("Saving books for ", game_id, "in", betmode)
-    num_repeats = max(int(round(num_sims / threads / batching_size, 0)), 1)
+    shards = gamestate.output_files.get_temp_shards(betmode)
     file_list = []
-    for repeat_index in range(num_repeats):
-        for thread in range(threads):
-            file_list.append(
-                gamestate.output_files.get_temp_multi_thread_name(betmode, thread, repeat_index, compress)
-            )
+    for thread, repeat_index in shards:
+        file_list.append(gamestate.output_files.get_temp_multi_thread_name(betmode, thread, repeat_index, compress))
 
     if compress:
-        temp_book_output_path = os.path.join(gamestate.output_files.book_path, "temp_book_output.json")
-        with open(temp_book_output_path, "w", encoding="UTF-8") as outfile:
-            for fname in file_list:
-                with open(fname, "rb") as infile:
-                    decompressed = zstd.ZstdDecompressor().decompress(infile.read())
-                    outfile.write(decompressed.decode("UTF-8"))
-
         final_out = gamestate.output_files.get_final_book_name(betmode, True)
-        with open(temp_book_output_path, "rb") as f_in, open(final_out, "wb") as f_out:
-            f_out.write(zstd.ZstdCompressor().compress(f_in.read()))
-
-        os.remove(temp_book_output_path)
+        if book_merge == "concat":
+            concat_zstd_files(file_list, final_out)
+        elif book_merge == "recompress":
+            dictionary = load_book_dictionary(gamestate.output_files.get_dictionary_name(betmode))
+            recompress_zstd_files(file_list, final_out, get_zstd_compressor(gamestate.config, dictionary), dictionary)
+        else:
+            raise ValueError(f"Unknown book merge mode '{book_merge}', expected 'concat' or 'recompress'.")
     else:
         with open(
             gamestate.output_files.get_final_book_name(betmode, False),
@@ -180,11 +252,8 @@ def output_lookup_and_force_files(
     print("Saving force files for", game_id, "in", betmode)
     force_results_dict = {}
     file_list = []
-    for repeat_index in range(num_repeats):
-        for thread in range(threads):
-            file_list.append(
-                gamestate.output_files.get_temp_force_name(betmode, thread, repeat_index),
-            )
+    for thread, repeat_index in shards:
+        file_list.append(gamestate.output_files.get_temp_force_name(betmode, thread, repeat_index))
 
     for filename in file_list:
         force_chunk = ast.literal_eval(json.load(open(filename, "r", encoding="UTF-8")))
@@ -227,14 +296,9 @@ def output_lookup_and_force_files(
     weights_plus_wins_file_list = []
     segmented_lut_file_list = []
     print("Saving LUTs for", game_id, "in", betmode)
-    for repeat_index in range(num_repeats):
-        for thread in range(threads):
-            weights_plus_wins_file_list += [
-                gamestate.output_files.get_temp_lookup_name(betmode, thread, repeat_index)
-            ]
-            segmented_lut_file_list += [
-                gamestate.output_files.get_temp_segmented_name(betmode, thread, repeat_index)
-            ]
+    for thread, repeat_index in shards:
+        weights_plus_wins_file_list += [gamestate.output_files.get_temp_lookup_name(betmode, thread, repeat_index)]
+        segmented_lut_file_list += [gamestate.output_files.get_temp_segmented_name(betmode, thread, repeat_index)]
 
     with open(
         gamestate.output_files.get_final_lookup_name(betmode),
@@ -261,13 +325,37 @@ def output_lookup_and_force_files(
                 outfile.write(infile.read())
 
 
+def concat_zstd_files(file_list: list, out_path: str) -> None:
+    """Join compressed shards without decompressing, the output holds one zstd frame per shard."""
+    with open(out_path, "wb") as outfile:
+        for fname in file_list:
+            with open(fname, "rb") as infile:
+                shutil.copyfileobj(infile, outfile)
+
+
+def recompress_zstd_files(
+    file_list: list,
+    out_path: str,
+    compressor: zstd.ZstdCompressor = None,
+    dictionary: zstd.ZstdCompressionDict = None,
+) -> None:
+    """Stream decompressed shards through a single compressor, producing one zstd frame."""
+    compressor = compressor if compressor is not None else zstd.ZstdCompressor()
+    decompressor = zstd.ZstdDecompressor(dict_data=dictionary)
+    with open(out_path, "wb") as outfile, compressor.stream_writer(outfile, closefd=False) as writer:
+        for fname in file_list:
+            with open(fname, "rb") as infile:
+                with decompressor.stream_reader(infile, read_across_frames=True) as reader:
+                    shutil.copyfileobj(reader, writer)
+
+
 def write_json(gamestate, filename: str):
     """Convert the list of dictionaries to a JSON-encoded string and compress it in chunks."""
     json_objects = [json.dumps(item) for item in gamestate.library.values()]
     combined_data = "\n".join(json_objects) + "\n"
 
     if filename.endswith(".zst"):
-        compressor = zstd.ZstdCompressor()
+        compressor = get_zstd_compressor(gamestate.config)
         compressed_data = compressor.compress(combined_data.encode("UTF-8"))
         with open(filename, "wb") as f:
             f.write(compressed_data)
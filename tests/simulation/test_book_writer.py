@@ -0,0 +1,53 @@
+"""Test incremental book shard writer."""
+
+import os
+import json
+import pytest
+import zstandard as zstd
+from src.write_data.book_writer import BookWriter
+
+BOOKS = [{"id": idx, "payoutMultiplier": idx * 10, "events": [{"index": 0}]} for idx in range(1, 51)]
+
+
+def write_books(filename, background, regular_json=False):
+    writer = BookWriter(filename, regular_json=regular_json, background=background, queue_size=4)
+    for book in BOOKS:
+        writer.write(book)
+    writer.close()
+    with open(filename, "rb") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("extension", ["jsonl", "jsonl.zst"])
+def test_background_matches_foreground(tmp_path, extension):
+    foreground = write_books(os.path.join(tmp_path, f"fg.{extension}"), background=False)
+    background = write_books(os.path.join(tmp_path, f"bg.{extension}"), background=True)
+    if extension.endswith(".zst"):
+        foreground = b"".join(zstd.ZstdDecompressor().read_to_iter(foreground))
+        background = b"".join(zstd.ZstdDecompressor().read_to_iter(background))
+    assert foreground == background
+    assert [json.loads(line) for line in background.decode("UTF-8").splitlines()] == BOOKS
+
+
+def test_regular_json(tmp_path):
+    output = write_books(os.path.join(tmp_path, "books.json"), background=True, regular_json=True)
+    assert json.loads(output) == BOOKS
+
+
+def test_submitted_tasks_run_after_books(tmp_path):
+    filename = os.path.join(tmp_path, "books.jsonl")
+    order = []
+    writer = BookWriter(filename, background=True)
+    for book in BOOKS:
+        writer.write(book)
+    writer.submit(lambda: order.append(writer.books_written))
+    writer.close()
+    assert order == [len(BOOKS)]
+
+
+def test_background_error_is_raised_on_close(tmp_path):
+    writer = BookWriter(os.path.join(tmp_path, "books.jsonl"), background=True)
+    writer.write({"unserialisable": object()})
+    writer.write(BOOKS[0])
+    with pytest.raises(RuntimeError):
+        writer.close()
@@ -0,0 +1,68 @@
+"""Test checkpoint manifest used to resume book generation."""
+
+import os
+import pytest
+from src.state.checkpoint import Checkpoint
+
+
+class TempOutputFiles:
+    """Minimal OutputFiles stand-in writing to a temporary directory."""
+
+    def __init__(self, path):
+        self.temp_path = str(path)
+
+    def get_checkpoint_name(self, betmode):
+        return os.path.join(self.temp_path, f"checkpoint_{betmode}.json")
+
+    def get_temp_criteria_name(self, betmode):
+        return os.path.join(self.temp_path, f"criteria_{betmode}.json")
+
+    def get_temp_multi_thread_name(self, betmode, thread_index, repeat_count, compress):
+        return os.path.join(self.temp_path, f"books_{betmode}_{thread_index}_{repeat_count}.jsonl")
+
+    def get_temp_lookup_name(self, betmode, thread_index, repeat_count):
+        return os.path.join(self.temp_path, f"lookUpTable_{betmode}_{thread_index}_{repeat_count}")
+
+    def get_temp_segmented_name(self, betmode, thread_index, repeat_count):
+        return os.path.join(self.temp_path, f"lookUpTableSegmented_{betmode}_{thread_index}_{repeat_count}")
+
+    def get_temp_force_name(self, betmode, thread_index, repeat_count):
+        return os.path.join(self.temp_path, f"force_{betmode}_{thread_index}_{repeat_count}.json")
+
+
+RUN_PARAMS = {"num_sims": 10, "threads": 2, "batch_size": 5, "chunk_size": None, "compress": False}
+
+
+@pytest.fixture(scope="function")
+def checkpoint(tmp_path):
+    cp = Checkpoint(TempOutputFiles(tmp_path), "base", dict(RUN_PARAMS))
+    for path in cp.get_shard_files(0, 0).values():
+        with open(path, "w", encoding="UTF-8") as f:
+            f.write("shard data")
+    return cp
+
+
+def test_record_and_resume(checkpoint):
+    checkpoint.save_criteria(["0", "basegame", "0"])
+    checkpoint.record(0, 0, (0, 5))
+
+    resumed = Checkpoint(checkpoint.output_files, "base", dict(RUN_PARAMS))
+    assert resumed.load()
+    assert resumed.load_criteria() == ["0", "basegame", "0"]
+    assert resumed.is_complete(0, 0, (0, 5))
+    assert not resumed.is_complete(1, 0, (5, 10))
+
+
+def test_modified_shard_is_not_complete(checkpoint):
+    checkpoint.save_criteria(["0"])
+    checkpoint.record(0, 0, (0, 5))
+    with open(checkpoint.get_shard_files(0, 0)["books"], "a", encoding="UTF-8") as f:
+        f.write("partial write")
+    assert not checkpoint.is_complete(0, 0, (0, 5))
+
+
+def test_changed_run_parameters(checkpoint):
+    checkpoint.save_criteria(["0"])
+    checkpoint.record(0, 0, (0, 5))
+    with pytest.warns(UserWarning):
+        assert not Checkpoint(checkpoint.output_files, "base", dict(RUN_PARAMS, threads=4)).load()
@@ -0,0 +1,76 @@
+"""Test cached betmode and distribution lookups."""
+
+import pytest
+from src.config.betmode import BetMode
+from src.config.distributions import Distribution
+from tests.win_calculations.game_test_config import GamestateTest
+
+
+class IndexConfig:
+    bet_modes = [
+        BetMode(
+            name=name,
+            cost=cost,
+            rtp=0.97,
+            max_win=5000,
+            auto_close_disabled=False,
+            is_feature=True,
+            is_buybonus=False,
+            distributions=[
+                Distribution(criteria="freegame", quota=0.1, conditions={"reel_weights": {"basegame": {"BR0": 1}}}),
+                Distribution(criteria="0", quota=0.9, conditions={"reel_weights": {"basegame": {"BR0": 2}}}),
+            ],
+        )
+        for name, cost in (("base", 1.0), ("bonus", 100.0))
+    ]
+
+
+@pytest.fixture(scope="function")
+def gamestate():
+    gs = GamestateTest(IndexConfig())
+    gs.betmode = "bonus"
+    gs.criteria = "0"
+    return gs
+
+
+def test_lookups_follow_switches(gamestate):
+    assert gamestate.get_current_betmode().get_cost() == 100.0
+    assert gamestate.get_current_betmode_distributions()._criteria == "0"
+    assert gamestate.get_current_distribution_conditions()["reel_weights"]["basegame"] == {"BR0": 2}
+
+    gamestate.criteria = "freegame"
+    assert gamestate.get_current_distribution_conditions()["reel_weights"]["basegame"] == {"BR0": 1}
+    gamestate.betmode = "base"
+    assert gamestate.get_current_betmode() is gamestate.get_betmode("base") is IndexConfig.bet_modes[0]
+    assert gamestate.get_current_betmode_distributions() is IndexConfig.bet_modes[0].get_distributions()[0]
+
+
+def test_lookup_stats(gamestate):
+    rebuilds = gamestate.lookup_stats["rebuilds"]
+    cached = gamestate.lookup_stats["cached"]
+    for _ in range(5):
+        gamestate.criteria = "0"
+        gamestate.get_current_distribution_conditions()
+    assert gamestate.lookup_stats["rebuilds"] == rebuilds
+    assert gamestate.lookup_stats["cached"] == cached + 5
+
+
+def test_switches_do_not_rebuild_index(gamestate):
+    rebuilds = gamestate.lookup_stats["rebuilds"]
+    for criteria in ("freegame", "0", "wincap", "0"):
+        gamestate.criteria = criteria
+    gamestate.betmode = "base"
+    assert gamestate.lookup_stats["rebuilds"] == rebuilds
+    assert gamestate.get_current_betmode_distributions() is IndexConfig.bet_modes[0].get_distributions()[1]
+
+    gamestate.config.bet_modes = IndexConfig.bet_modes[1:]
+    gamestate.criteria = "freegame"
+    assert gamestate.lookup_stats["rebuilds"] == rebuilds + 1
+    assert gamestate.get_current_betmode() is None
+    gamestate.config.bet_modes = IndexConfig.bet_modes
+
+
+def test_missing_criteria(gamestate):
+    gamestate.criteria = "wincap"
+    with pytest.raises(RuntimeError):
+        gamestate.get_current_betmode_distributions()
@@ -0,0 +1,71 @@
+"""Test combining compressed book shards."""
+
+import os
+import pytest
+import zstandard as zstd
+from src.write_data.write_data import (
+    concat_zstd_files,
+    recompress_zstd_files,
+    train_book_dictionary,
+    load_book_dictionary,
+    apply_book_dictionary,
+)
+
+SHARDS = [b'{"id": 1}\n{"id": 2}\n', b'{"id": 3}\n', b'{"id": 4}\n{"id": 5}\n']
+
+
+@pytest.fixture(scope="function")
+def shard_files(tmp_path):
+    file_list = []
+    for idx, data in enumerate(SHARDS):
+        path = os.path.join(tmp_path, f"books_base_{idx}_0.jsonl.zst")
+        with open(path, "wb") as f:
+            f.write(zstd.ZstdCompressor().compress(data))
+        file_list.append(path)
+    return file_list
+
+
+def read_all_frames(path):
+    with open(path, "rb") as f:
+        return zstd.ZstdDecompressor().stream_reader(f, read_across_frames=True).read()
+
+
+def test_concat(shard_files, tmp_path):
+    out_path = os.path.join(tmp_path, "books_base.jsonl.zst")
+    concat_zstd_files(shard_files, out_path)
+    assert read_all_frames(out_path) == b"".join(SHARDS)
+
+
+def test_recompress_single_frame(shard_files, tmp_path):
+    out_path = os.path.join(tmp_path, "books_base.jsonl.zst")
+    recompress_zstd_files(shard_files, out_path, zstd.ZstdCompressor(level=10, threads=2))
+    with open(out_path, "rb") as f:
+        assert b"".join(zstd.ZstdDecompressor().read_to_iter(f)) == b"".join(SHARDS)
+
+
+def test_dictionary_recompression(tmp_path):
+    books = [
+        f'{{"id": {idx}, "events": [{{"type": "reveal", "board": [[{{"name": "H{idx % 5}"}}]]}}]}}\n'.encode()
+        for idx in range(3000)
+    ]
+    shard_files = []
+    for idx in range(2):
+        path = os.path.join(tmp_path, f"books_base_{idx}_0.jsonl.zst")
+        with open(path, "wb") as f:
+            f.write(zstd.ZstdCompressor().compress(b"".join(books[idx::2])))
+        shard_files.append(path)
+
+    dictionary_path = os.path.join(tmp_path, "books_base.dict")
+    assert train_book_dictionary(shard_files, dictionary_path, dict_size=4096)
+    dictionary = load_book_dictionary(dictionary_path)
+    compressor = zstd.ZstdCompressor(
+        dict_data=dictionary, compression_params=zstd.ZstdCompressionParameters.from_level(3, write_dict_id=True)
+    )
+    assert apply_book_dictionary(shard_files, compressor) == shard_files
+    assert apply_book_dictionary(shard_files, compressor) == []
+
+    out_path = os.path.join(tmp_path, "books_base.jsonl.zst")
+    concat_zstd_files(shard_files, out_path)
+    with open(out_path, "rb") as f:
+        reader = zstd.ZstdDecompressor(dict_data=dictionary).stream_reader(f, read_across_frames=True)
+        assert reader.read() == b"".join(books[0::2] + books[1::2])
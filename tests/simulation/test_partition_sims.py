@@ -0,0 +1,28 @@
+"""Test splitting of simulation numbers into batches and chunks."""
+
+import pytest
+from src.state.run_sims import partition_sims
+
+
+@pytest.mark.parametrize(
+    "num_sims, threads, batch_size, chunk_size",
+    [(200, 2, 50, None), (251, 3, 40, None), (251, 4, 7, 3), (10, 16, 1000, None), (1, 1, 1, None)],
+)
+def test_partition_covers_all_sims(num_sims, threads, batch_size, chunk_size):
+    batches = partition_sims(num_sims, threads, batch_size, chunk_size)
+    flat = [sim for chunks in batches for start, end in chunks for sim in range(start, end)]
+    assert flat == list(range(num_sims))
+    for chunks in batches:
+        assert chunks[-1][1] - chunks[0][0] <= threads * batch_size
+        assert all(end > start for start, end in chunks)
+
+
+def test_ragged_final_batch():
+    batches = partition_sims(250, 2, 50, chunk_size=30)
+    assert len(batches) == 3
+    assert batches[-1] == [(200, 230), (230, 250)]
+
+
+def test_single_thread_single_chunk():
+    batches = partition_sims(200, 1, 50)
+    assert all(len(chunks) == 1 for chunks in batches)
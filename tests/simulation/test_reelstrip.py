@@ -0,0 +1,203 @@
+"""Test integer-encoded reelstrips and board gathering."""
+
+import copy
+import itertools
+import pytest
+import numpy as np
+from src.calculations.symbol import SymbolStorage, get_attribute_bit
+from src.calculations.reelstrip import CompiledReelstrip, BoardWindow, ReelStopIndex
+from src.calculations.rng import make_rng
+
+
+class ReelConfig:
+    paytable = {(3, "H1"): 5, (3, "L1"): 1}
+    special_symbols = {"wild": ["W"], "scatter": ["S"]}
+
+
+REELSTRIP = [
+    ["H1", "L1", "S", "W", "L1"],
+    ["L1", "L1", "H1"],
+    ["W", "S", "H1", "L1", "L1", "H1", "S"],
+]
+
+
+@pytest.fixture(scope="function")
+def storage():
+    return SymbolStorage(ReelConfig(), ["W", "S", "L1", "H1"])
+
+
+def naive_window(reelstrip, reel_positions, num_rows, include_padding):
+    cells = []
+    for reel, rows in enumerate(num_rows):
+        strip, pos = reelstrip[reel], reel_positions[reel]
+        offsets = ([-1, rows] if include_padding else []) + list(range(rows))
+        cells += [strip[(pos + offset) % len(strip)] for offset in offsets]
+    return cells
+
+
+def test_symbol_ids_sorted(storage):
+    assert storage.symbol_names == ["H1", "L1", "S", "W"]
+    assert [storage.symbol_defs[name].id for name in storage.symbol_names] == [0, 1, 2, 3]
+    assert storage.create_symbol_from_id(2).name == "S"
+
+
+@pytest.mark.parametrize("include_padding", [True, False])
+@pytest.mark.parametrize("reel_positions", [[0, 0, 0], [4, 2, 6], [-1, 5, -3]])
+def test_gather_matches_reelstrip(storage, include_padding, reel_positions):
+    num_rows = [3, 2, 4]
+    compiled = CompiledReelstrip(REELSTRIP, storage)
+    ids = compiled.gather(reel_positions, BoardWindow(num_rows, include_padding))
+    assert [storage.symbol_names[i] for i in ids] == naive_window(REELSTRIP, reel_positions, num_rows, include_padding)
+
+
+def test_unregistered_symbol(storage):
+    compiled = CompiledReelstrip([["H1", "X"]], storage)
+    ids = compiled.gather([1], BoardWindow([1], False))
+    with pytest.raises(ValueError):
+        storage.create_symbol_from_id(ids[0])
+
+
+def test_gather_boards_matches_gather(storage):
+    num_rows = [3, 2, 4]
+    compiled = CompiledReelstrip(REELSTRIP, storage)
+    reel_stops = np.array([[0, 0, 0], [4, 2, 6], [1, 1, 3]])
+    boards = compiled.gather_boards(reel_stops, num_rows)
+    assert boards.shape == (3, 3, 4)
+    window = BoardWindow(num_rows, False)
+    for board, stops in zip(boards, reel_stops):
+        expected = compiled.gather(stops.tolist(), window)
+        assert [x for reel in board for x in reel if x >= 0] == expected
+        assert (board[1, 2:] == -1).all() and (board[0, 3:] == -1).all()
+
+
+@pytest.mark.parametrize("mode", ["legacy", "stream"])
+def test_randranges_batch(mode):
+    rng = make_rng(mode, base_seed=1)
+    rng.seed(4)
+    stops = rng.randranges_batch([5, 3, 7], 1000)
+    assert stops.shape == (1000, 3)
+    assert (stops >= 0).all() and (stops < np.array([5, 3, 7])).all()
+    assert [len(np.unique(stops[:, reel])) for reel in range(3)] == [5, 3, 7]
+
+
+def test_shared_symbol_copy_on_write(storage):
+    shared = storage.get_shared_symbol("H1")
+    assert shared is storage.get_shared_symbol("H1")
+    assert storage.get_shared_symbol("S").check_attribute("scatter")
+    with pytest.raises(AttributeError):
+        shared.explode = True
+    board = [[shared, shared]]
+    board[0][1] = board[0][1].mutable()
+    board[0][1].explode = True
+    assert not board[0][0].explode and board[0][1].explode
+    assert board[0][1].mutable() is board[0][1]
+    assert copy.deepcopy(board)[0][0] is shared
+
+
+def test_reel_stop_index():
+    index = ReelStopIndex(REELSTRIP, {"S", "W"}, [2, 2, 2])
+    assert index.stops == [[2, 3], [], [0, 1, 6]]
+    assert index.probabilities == [2 / 5, 0.0, 3 / 7]
+    assert index.window_counts[0].tolist() == [0, 1, 2, 1, 0]
+    assert index.stacked_windows == [[2], [], [0, 6]]
+    assert index.max_count == 4
+    assert index.count_on_board([2, 0, -1]) == 4
+    assert index.count_on_board([4, 1, 3]) == 0
+
+
+def brute_force_layouts(index):
+    """Probability of each accepted layout of the original force loop, enumerating every random choice."""
+    num_reels = len(index.reel_lengths)
+
+    def orderings(chosen, prob, num_targets):
+        if len(chosen) == num_targets:
+            yield chosen, prob
+            return
+        possible = [r for r in range(num_reels) if index.probabilities[r] > 0 and r not in chosen]
+        total = sum(index.probabilities[r] for r in possible)
+        for r in possible:
+            yield from orderings(chosen + [r], prob * index.probabilities[r] / total, num_targets)
+
+    def layouts(num_targets):
+        for chosen, prob in orderings([], 1.0, num_targets):
+            options = []
+            for reel in range(num_reels):
+                length = index.reel_lengths[reel]
+                if reel in chosen:
+                    rows = index.num_rows[reel]
+                    weight = 1 / (len(index.stops[reel]) * rows)
+                    options.append([((s - off) % length, weight) for s in index.stops[reel] for off in range(rows)])
+                else:
+                    options.append([(pos, 1 / length) for pos in range(length)])
+            yield prob, options
+
+    return layouts
+
+
+@pytest.mark.parametrize("num_targets", [0, 1, 2])
+def test_forced_layout_weights_match_rejection(num_targets):
+    index = ReelStopIndex(REELSTRIP, {"S", "W"}, [2, 1, 2])
+    expected = {}
+    for prob, options in brute_force_layouts(index)(num_targets):
+        for combo in itertools.product(*options):
+            positions = tuple(pos for pos, _ in combo)
+            if index.count_on_board(positions) == num_targets:
+                weight = prob * np.prod([w for _, w in combo])
+                expected[positions] = expected.get(positions, 0.0) + weight
+
+    weights = index.get_layout_weights(num_targets)
+    actual = {}
+    for forced, weight in weights.items():
+        windows = [index.windows_by_count[r][1 if r in forced else 0] for r in range(3)]
+        for positions in itertools.product(*windows):
+            actual[positions] = weight / np.prod([len(w) for w in windows])
+    assert set(actual) == set(expected)
+    expected_total, actual_total = sum(expected.values()), sum(actual.values())
+    assert expected_total == pytest.approx(actual_total)
+    for positions, prob in expected.items():
+        assert actual[positions] / actual_total == pytest.approx(prob / expected_total)
+
+
+@pytest.mark.parametrize("max_count", [1, 2, 3])
+def test_sample_below(max_count):
+    index = ReelStopIndex(REELSTRIP, {"S", "W"}, [2, 1, 2])
+    accepted = [
+        positions
+        for positions in itertools.product(*[range(length) for length in index.reel_lengths])
+        if index.count_on_board(positions) < max_count
+    ]
+    assert index.get_count_table(max_count)[0][max_count] == len(accepted)
+    assert index.get_below_probability(max_count) == len(accepted) / np.prod(index.reel_lengths)
+
+    rng = make_rng("stream", base_seed=2)
+    samples = [tuple(index.sample_below(max_count, rng)) for _ in range(40 * len(accepted))]
+    assert set(samples) == set(accepted)
+
+
+def test_sample_forced_layout():
+    index = ReelStopIndex(REELSTRIP, {"S", "W"}, [2, 1, 2])
+    rng = make_rng("stream", base_seed=2)
+    for _ in range(50):
+        reel_positions, force_stop_positions = index.sample_forced_layout((0, 2), rng)
+        assert index.count_on_board(reel_positions) == 2
+        assert sorted(force_stop_positions) == [0, 2]
+        for reel, stop in force_stop_positions.items():
+            assert REELSTRIP[reel][stop] in ("S", "W")
+            assert 0 <= stop - reel_positions[reel] < index.num_rows[reel]
+
+
+def test_attribute_mask(storage):
+    wild_bit, multiplier_bit = get_attribute_bit("wild"), get_attribute_bit("multiplier")
+    wild = storage.create_symbol("W")
+    plain = storage.create_symbol("H1")
+    assert wild.has_attributes(wild_bit) and not plain.has_attributes(wild_bit)
+    assert wild.check_attribute("scatter", "wild") and not plain.check_attribute("wild", "scatter")
+
+    plain.assign_attribute({"multiplier": 3})
+    assert plain.mask & multiplier_bit and plain.check_attribute("multiplier")
+    plain.assign_attribute({"multiplier": None})
+    assert not plain.mask & multiplier_bit and not plain.check_attribute("multiplier")
+    plain.multiplier = 2
+    assert plain.check_attribute("multiplier")
+    wild.assign_attribute({"wild": False})
+    assert wild.check_attribute("wild")
@@ -0,0 +1,43 @@
+"""Test compiled distribution samplers used by get_random_outcome."""
+
+import random
+from collections import Counter
+from src.calculations.rng import make_rng
+from src.calculations.statistics import get_random_outcome, get_sampler
+
+DISTRIBUTION = {2: 100, 3: 0, 5: 50.5, 10: 10, 50: 1, 100: 0.25}
+
+
+def linear_walk(distribution):
+    """Reference implementation: walk cumulative weights in order."""
+    roll = random.uniform(0, sum(distribution.values()))
+    cumulative = 0.0
+    for value, weight in distribution.items():
+        cumulative += weight
+        if cumulative >= roll:
+            return value
+
+
+def test_legacy_draws_match_linear_walk():
+    random.seed(42)
+    expected = [linear_walk(DISTRIBUTION) for _ in range(5000)]
+    rng = make_rng("legacy")
+    rng.seed(42)
+    assert [get_random_outcome(DISTRIBUTION, rng=rng) for _ in range(5000)] == expected
+
+
+def test_sampler_is_cached_per_dict():
+    assert get_sampler(DISTRIBUTION) is get_sampler(DISTRIBUTION)
+    assert get_sampler(dict(DISTRIBUTION)) is not get_sampler(DISTRIBUTION)
+
+
+def test_alias_frequencies():
+    rng = make_rng("stream")
+    rng.seed(1)
+    total = sum(DISTRIBUTION.values())
+    num_draws = 200000
+    counts = Counter(get_sampler(DISTRIBUTION).sample(num_draws, rng))
+    counts.update(get_random_outcome(DISTRIBUTION, rng=rng) for _ in range(num_draws))
+    assert counts[3] == 0
+    for value, weight in DISTRIBUTION.items():
+        assert abs(counts[value] / (2 * num_draws) - weight / total) < 0.005
@@ -1,8 +1,10 @@
 """Test basic cluster-calculation functionality."""
 
 import pytest
+import numpy as np
 from tests.win_calculations.game_test_config import GamestateTest, create_blank_board
 from src.calculations.cluster import Cluster
+from utils.cluster_benchmark import create_boards, recursive_get_clusters
 
 
 class GameClusterConfig:
@@ -99,3 +101,38 @@ def test_basic_cluster(gamestate):
         clusters=clusters,
     )
     assert total_win == gamestate.config.paytable[(9, "H1")]
+
+
+def test_clusters_match_recursive_search():
+    boards = create_boards(7, 7, 200, ["H1", "H2", "L1", "W"])
+    for board in boards:
+        assert dict(Cluster.get_clusters(board)) == recursive_get_clusters(board)
+
+
+def test_large_cluster_no_recursion_limit():
+    board = create_boards(40, 40, 1, ["H1"])[0]
+    clusters = Cluster.get_clusters(board)
+    assert len(clusters["H1"]) == 1
+    assert len(clusters["H1"][0]) == 1600
+
+
+def test_batch_clusters_match_single_board(gamestate):
+    storage = gamestate.symbol_storage
+    names = ["H1", "H1", "H2", "X", "WM"]
+    rng = np.random.default_rng(3)
+    boards = np.array([storage.get_symbol_id(name) for name in names])[rng.integers(0, len(names), (100, 6, 6))]
+    multipliers = np.where(boards == storage.get_symbol_id("WM"), rng.integers(1, 4, boards.shape), np.nan)
+    batch = Cluster.get_clusters_batch(gamestate.config, storage, boards, multipliers, global_multiplier=2)
+
+    for board_idx, board_ids in enumerate(boards):
+        board = [[storage.create_symbol_from_id(symbol_id) for symbol_id in reel] for reel in board_ids.tolist()]
+        for reel, row in zip(*np.nonzero(~np.isnan(multipliers[board_idx]))):
+            board[reel][row].assign_attribute({"multiplier": int(multipliers[board_idx, reel, row])})
+        clusters = Cluster.get_clusters(board)
+        _, _, total_win = Cluster.evaluate_clusters(
+            gamestate.config, board, clusters, global_multiplier=2, return_data={"totalWin": 0, "wins": []}
+        )
+        assert batch["total_win"][board_idx] == pytest.approx(total_win)
+        for symbol_idx, name in enumerate(batch["symbols"]):
+            sizes = np.bincount([len(cluster) for cluster in clusters.get(name, [])], minlength=37)
+            assert (batch["cluster_counts"][board_idx, symbol_idx] == sizes).all()
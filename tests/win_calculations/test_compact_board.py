@@ -0,0 +1,155 @@
+"""Test the array-backed board against the nested board in every win evaluator."""
+
+import numpy as np
+import pytest
+from src.calculations.compact_board import CompactBoard
+from src.calculations.lines import Lines
+from src.calculations.ways import Ways
+from src.calculations.cluster import Cluster
+from src.calculations.scatter import Scatter
+from src.calculations.symbol import get_attribute_bit
+from tests.win_calculations.test_linespay import create_test_lines_gamestate
+from tests.win_calculations.test_wayspay import create_test_ways_gamestate
+from tests.win_calculations.test_clusterpay import create_test_cluster_gamestate
+from tests.win_calculations.test_scatterpay import create_test_scatter_gamestate
+
+
+def fill_board(gamestate, names):
+    """Fill the board cycling through symbol names, so every evaluator finds some wins."""
+    for idx, _ in enumerate(gamestate.board):
+        for idy, _ in enumerate(gamestate.board[idx]):
+            name = names[(idx * idx + idy) % len(names)]
+            gamestate.board[idx][idy] = gamestate.create_symbol(name)
+
+
+def compact_copy(gamestate):
+    return CompactBoard.from_symbols(gamestate.board, gamestate.symbol_storage)
+
+
+def test_round_trip():
+    gamestate = create_test_scatter_gamestate()
+    fill_board(gamestate, ["H1", "WM", "H2", "W"])
+    gamestate.board[1][2].assign_attribute({"prize": 5})
+    compact = compact_copy(gamestate)
+
+    assert len(compact) == len(gamestate.board)
+    assert compact.ids.shape == (sum(gamestate.config.num_rows),)
+    for idx, reel in enumerate(gamestate.board):
+        for idy, sym in enumerate(reel):
+            view_sym = compact[idx][idy]
+            assert view_sym.name == sym.name
+            assert view_sym.multiplier == sym.multiplier
+            assert view_sym.prize == sym.prize
+            assert view_sym.check_attribute("wild") == sym.check_attribute("wild")
+    assert type(compact[1][2].prize) is int
+
+
+def test_arrays_follow_view():
+    gamestate = create_test_scatter_gamestate()
+    fill_board(gamestate, ["H1", "H2"])
+    compact = compact_copy(gamestate)
+    cell = compact.cell_index(2, 3)
+    assert np.isnan(compact.multiplier[cell])
+
+    compact[2][3] = compact[2][3].mutable()
+    compact[2][3].assign_attribute({"multiplier": 4, "explode": True})
+    assert compact.multiplier[cell] == 4
+    assert compact.explode[cell]
+    assert compact.get_mask()[cell] & get_attribute_bit("explode")
+    assert compact.get_positions([cell]) == [{"reel": 2, "row": 3}]
+
+
+def test_evaluators_accept_compact_board():
+    gamestate = create_test_lines_gamestate()
+    fill_board(gamestate, ["H1", "W", "H1", "WM", "X"])
+    compact = compact_copy(gamestate)
+    assert Lines.get_lines(compact, gamestate.config) == Lines.get_lines(gamestate.board, gamestate.config)
+    assert compact._view is None
+
+    gamestate = create_test_ways_gamestate()
+    fill_board(gamestate, ["H1", "H2", "W", "H1"])
+    compact = compact_copy(gamestate)
+    assert Ways.get_ways_data(gamestate.config, compact) == Ways.get_ways_data(gamestate.config, gamestate.board)
+    assert compact._view is None
+
+    gamestate = create_test_scatter_gamestate()
+    fill_board(gamestate, ["H1", "WM", "H2", "H1"])
+    compact = compact_copy(gamestate)
+    assert Scatter.get_scatterpay_wins(gamestate.config, compact) == Scatter.get_scatterpay_wins(
+        gamestate.config, gamestate.board
+    )
+    assert compact._view is None
+    assert compact.explode.sum() == sum(sym.explode for reel in gamestate.board for sym in reel) > 0
+
+    gamestate = create_test_cluster_gamestate()
+    fill_board(gamestate, ["H1", "H1", "WM", "X"])
+    compact = compact_copy(gamestate)
+    compact_clusters = Cluster.get_clusters(compact)
+    clusters = Cluster.get_clusters(gamestate.board)
+    assert compact_clusters == clusters
+    compact_wins = Cluster.evaluate_clusters(
+        gamestate.config, compact, compact_clusters, return_data={"totalWin": 0, "wins": []}
+    )
+    wins = Cluster.evaluate_clusters(
+        gamestate.config, gamestate.board, clusters, return_data={"totalWin": 0, "wins": []}
+    )
+    assert compact_wins[1:] == wins[1:] and wins[2] > 0
+    assert compact._view is None
+    assert [sym.explode for reel in compact for sym in reel] == [
+        sym.explode for reel in gamestate.board for sym in reel
+    ]
+
+
+def create_multiplier_wild_ways_gamestate():
+    """Ways gamestate where WM is a wild with the multiplier special flag."""
+    gamestate = create_test_ways_gamestate()
+    gamestate.config.special_symbols.update({"wild": ["W", "WM"], "multiplier": ["WM"]})
+    gamestate.create_symbol_map()
+    return gamestate
+
+
+def test_from_ids_default_multipliers():
+    "Boards drawn as ids give multiplier wilds their default multiplier, as the nested board does."
+    for gamestate, evaluate in [
+        (
+            create_test_scatter_gamestate(),
+            lambda gamestate, board: Scatter.get_scatterpay_wins(gamestate.config, board),
+        ),
+        (create_multiplier_wild_ways_gamestate(), lambda gamestate, board: Ways.get_ways_data(gamestate.config, board)),
+        (
+            create_multiplier_wild_ways_gamestate(),
+            lambda gamestate, board: Ways.get_ways_data(gamestate.config, board, multiplier_strategy="board"),
+        ),
+    ]:
+        storage = gamestate.symbol_storage
+        names = ["H1", "WM", "H1", "H2", "H2"]
+        num_rows = gamestate.config.num_rows
+        cell_names = [[names[(reel + row) % len(names)] for row in range(rows)] for reel, rows in enumerate(num_rows)]
+        board_ids = np.array([[storage.get_symbol_id(name) for name in reel] for reel in cell_names])
+        compact = CompactBoard.from_ids(board_ids, num_rows, storage)
+        nested = [[storage.get_shared_symbol(name) for name in reel] for reel in cell_names]
+
+        assert compact.multiplier[compact.cell_index(0, 1)] == 1
+        win_data = evaluate(gamestate, compact)
+        assert compact._view is None
+        assert win_data == evaluate(gamestate, nested)
+        assert win_data["totalWin"] > 0
+
+
+def test_explode_after_view():
+    gamestate = create_test_scatter_gamestate()
+    fill_board(gamestate, ["H1", "H2"])
+    compact = compact_copy(gamestate)
+    compact.as_nested()
+    compact.set_explode([compact.cell_index(1, 1)])
+    assert compact[1][1].explode
+    assert not gamestate.board[1][1].explode
+    assert compact.explode.sum() == 1
+
+
+def test_unregistered_symbol_id():
+    gamestate = create_test_scatter_gamestate()
+    storage = gamestate.symbol_storage
+    compact = CompactBoard(storage, [1], [storage.get_symbol_id("reel_only_symbol")])
+    with pytest.raises(ValueError, match="unregistered symbol id"):
+        compact.as_nested()
@@ -1,6 +1,7 @@
 """Test basic lines-calculation functionality."""
 
 import pytest
+import numpy as np
 from tests.win_calculations.game_test_config import GamestateTest, create_blank_board
 from src.calculations.lines import Lines
 
@@ -122,3 +123,39 @@ def test_linespay_mult(gamestate):
 
     windata = Lines.get_lines(gamestate.board, gamestate.config)
     assert windata["totalWin"] == (gamestate.config.paytable[(5, "WM")] * sum([3, 3, 3, 3, 3]))
+
+
+def test_lines_batch_matches_get_lines(gamestate):
+    storage = gamestate.symbol_storage
+    names = ["H1", "H1", "W", "WM", "X", "S"]
+    rng = np.random.default_rng(5)
+    boards = np.array([storage.get_symbol_id(name) for name in names])[rng.integers(0, len(names), (300, 5, 5))]
+    batch = Lines.get_lines_batch(gamestate.config, storage, boards, global_multiplier=2)
+    line_indexes, _ = Lines.get_payline_matrix(gamestate.config)
+
+    assert batch["total_win"].sum() > 0
+    for board_idx, board_ids in enumerate(boards):
+        board = [[storage.create_symbol_from_id(symbol_id) for symbol_id in reel] for reel in board_ids.tolist()]
+        windata = Lines.get_lines(board, gamestate.config, multiplier_method="global", global_multiplier=2)
+        line_wins = {win["meta"]["lineIndex"]: win for win in windata["wins"]}
+        for idx, line_index in enumerate(line_indexes):
+            win = line_wins.get(line_index)
+            assert batch["line_win"][board_idx, idx] == (0 if win is None else win["win"])
+            if win is not None and win["meta"]["winWithoutMult"] == batch["base_win"][board_idx, idx]:
+                assert batch["kind"][board_idx, idx] == win["kind"]
+        assert batch["total_win"][board_idx] == pytest.approx(windata["totalWin"])
+
+
+def test_directly_assigned_wild(gamestate):
+    "Wilds assigned directly on the symbol (not through assign_attribute) substitute on lines."
+    for idx, _ in enumerate(gamestate.board):
+        for idy, _ in enumerate(gamestate.board[idx]):
+            gamestate.board[idx][idy] = gamestate.create_symbol("H1" if idx != 2 else "X")
+    for idy, _ in enumerate(gamestate.board[2]):
+        gamestate.board[2][idy].wild = True
+
+    windata = Lines.get_lines(gamestate.board, gamestate.config)
+    assert windata["totalWin"] == (gamestate.config.paytable[(5, "H1")] * len(gamestate.config.paylines))
+
+    gamestate.board[2][0].wild = False
+    assert not gamestate.board[2][0].check_attribute("wild")
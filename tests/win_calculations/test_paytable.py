@@ -0,0 +1,38 @@
+"""Test the compiled paytable against the dictionary it is built from."""
+
+import numpy as np
+from src.config.config import Config
+from src.config.paytable import get_compiled_paytable
+
+
+def test_range_table_compiles_to_dense_rows():
+    config = Config()
+    config.paytable = config.convert_range_table({((5, 6), "H1"): 2, ((7, 49), "H1"): 10.5, ((5, 49), "L1"): 0.5})
+    config.special_symbols = {"wild": ["W"]}
+    paytable = config.get_compiled_paytable()
+
+    assert paytable.symbol_names == ["H1", "L1", "W"]
+    assert paytable.pays.shape == (3, 50)
+    assert paytable.pays[paytable.symbol_ids["H1"], 6] == 2
+    assert paytable.pays[paytable.symbol_ids["W"]].sum() == 0
+    for kind in range(60):
+        for name in ("H1", "L1", "W", "X"):
+            assert paytable.get(kind, name) == config.paytable.get((kind, name))
+    assert type(paytable.get(5, "H1")) is int
+    assert config.get_compiled_paytable() is paytable
+
+    config.paytable = {(3, "H1"): 1}
+    assert config.get_compiled_paytable() is not paytable
+    assert config.get_compiled_paytable().get(5, "H1") is None
+
+
+def test_non_integer_kinds_use_dictionary():
+    class PaytableConfig:
+        paytable = {("5+", "H1"): 3, (2, "H1"): 1}
+
+    paytable = get_compiled_paytable(PaytableConfig())
+    assert not paytable.dense
+    assert paytable.get("5+", "H1") == 3
+    assert paytable.get(2, "H1") == 1
+    assert paytable.get(3, "H1") is None
+    assert np.array_equal(paytable.get_pays(["H1"], 3), [[0, 0, 1, 0]])
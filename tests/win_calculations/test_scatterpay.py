@@ -3,6 +3,7 @@
 import pytest
 from tests.win_calculations.game_test_config import GamestateTest, create_blank_board
 from src.calculations.scatter import Scatter
+from src.calculations.board import Board
 
 
 class GameScatterConfig:
@@ -103,3 +104,29 @@ def test_scatterpay_wilds(gamestate):
             assert wd["win"] == 3
 
     assert windata["totalWin"] == 53
+
+
+def test_directly_assigned_scatter():
+    "Special symbols given the scatter attribute directly are found when scanning the board."
+
+    class ScanGamestate(GamestateTest, Board):
+        """Test gamestate with the board scanning functions."""
+
+    gamestate = ScanGamestate(GameScatterConfig())
+    gamestate.create_symbol_map()
+    gamestate.assign_special_sym_function()
+    gamestate.board = create_blank_board(gamestate.config.num_reels, gamestate.config.num_rows)
+    for idx, _ in enumerate(gamestate.board):
+        for idy, _ in enumerate(gamestate.board[idx]):
+            gamestate.board[idx][idy] = gamestate.create_symbol("H1")
+    gamestate.board[1][2] = gamestate.create_symbol("WM")
+    gamestate.board[1][2].scatter = True
+    gamestate.board[3][0] = gamestate.create_symbol("S")
+
+    gamestate.get_special_symbols_on_board()
+    assert gamestate.special_syms_on_board["scatter"] == [{"reel": 1, "row": 2}, {"reel": 3, "row": 0}]
+    assert gamestate.special_syms_on_board["wild"] == [{"reel": 1, "row": 2}]
+
+    gamestate.board[1][2].scatter = False
+    gamestate.get_special_symbols_on_board()
+    assert gamestate.special_syms_on_board["scatter"] == [{"reel": 3, "row": 0}]
@@ -0,0 +1,115 @@
+"""Test win entries with lazily built details."""
+
+from copy import deepcopy
+from src.calculations.cluster import Cluster
+from src.calculations.lines import Lines
+from src.calculations.scatter import Scatter
+from src.calculations.ways import Ways
+from src.wins.win_record import WinRecord, get_summary
+from tests.win_calculations.test_clusterpay import create_test_cluster_gamestate
+from tests.win_calculations.test_compact_board import fill_board
+from tests.win_calculations.test_linespay import create_test_lines_gamestate
+from tests.win_calculations.test_scatterpay import create_test_scatter_gamestate
+from tests.win_calculations.test_wayspay import create_test_ways_gamestate
+
+
+def test_details_built_on_first_read():
+    calls = []
+
+    def details(size):
+        calls.append(size)
+        return {"positions": [{"reel": 0, "row": row} for row in range(size)], "meta": {"size": size}}
+
+    win = WinRecord({"symbol": "H1", "win": 2.5}, details, 3)
+    assert win["symbol"] == "H1" and win["win"] == 2.5
+    assert calls == []
+
+    assert len(win["positions"]) == 3
+    assert win["meta"] == {"size": 3}
+    assert calls == [3]
+
+    copied = deepcopy([win])[0]
+    assert type(copied) is dict
+    assert list(copied) == ["symbol", "win", "positions", "meta"]
+    copied["meta"]["size"] = 0
+    assert win["meta"]["size"] == 3
+
+
+def test_cluster_win_details():
+    gamestate = create_test_cluster_gamestate()
+    for idx, _ in enumerate(gamestate.board):
+        for idy, _ in enumerate(gamestate.board[idx]):
+            name = "H1" if idx < 3 and idy < 3 else "X"
+            gamestate.board[idx][idy] = gamestate.create_symbol(name)
+
+    clusters = Cluster.get_clusters(gamestate.board)
+    _, win_data, total_win = Cluster.evaluate_clusters(
+        gamestate.config, gamestate.board, clusters, return_data={"totalWin": 0, "wins": []}
+    )
+    win = win_data["wins"][0]
+    assert win.details is not None
+    assert total_win == win["win"] == gamestate.config.paytable[(9, "H1")]
+    assert win.details is not None
+    assert sorted((pos["reel"], pos["row"]) for pos in win["positions"]) == [(r, c) for r in range(3) for c in range(3)]
+    assert win["meta"]["overlay"] == {"reel": 1, "row": 1}
+
+    clusters = Cluster.get_clusters(gamestate.board)
+    _, win_data, _ = Cluster.evaluate_clusters(
+        gamestate.config, gamestate.board, clusters, return_data={"totalWin": 0, "wins": []}
+    )
+    recorder = RecordingGamestate(win_data)
+    Cluster.record_cluster_wins(recorder)
+    assert win_data["wins"][0].details is not None
+    assert recorder.records[0] == {"kind": 9, "symbol": "H1", "mult": 2, "gametype": "basegame"}
+
+
+class RecordingGamestate:
+    """Collects force-file descriptions of the wins in win_data."""
+
+    def __init__(self, win_data: dict):
+        self.win_data = win_data
+        self.gametype = "basegame"
+        self.records = []
+
+    def record(self, description: dict) -> None:
+        self.records.append(description)
+
+
+def test_records_do_not_build_details():
+    gamestate = create_test_lines_gamestate()
+    fill_board(gamestate, ["H1", "W", "H1", "WM", "X"])
+    win_data = Lines.get_lines(gamestate.board, gamestate.config)
+    recorder = RecordingGamestate(win_data)
+    Lines.record_lines_wins(recorder)
+    assert win_data["wins"] and all(win.details is not None for win in win_data["wins"])
+    assert recorder.records == [
+        {
+            "kind": len(win["positions"]),
+            "symbol": win["symbol"],
+            "mult": win["meta"]["multiplier"],
+            "gametype": "basegame",
+        }
+        for win in deepcopy(win_data["wins"])
+    ]
+
+    gamestate = create_test_scatter_gamestate()
+    fill_board(gamestate, ["H1", "WM", "H2", "H1"])
+    win_data = Scatter.get_scatterpay_wins(gamestate.config, gamestate.board)
+    recorder = RecordingGamestate(win_data)
+    Scatter.record_scatter_wins(recorder)
+    assert win_data["wins"] and all(win.details is not None for win in win_data["wins"])
+    assert [record["kind"] for record in recorder.records] == [len(win["positions"]) for win in win_data["wins"]]
+
+    gamestate = create_test_ways_gamestate()
+    fill_board(gamestate, ["H1", "H2", "W", "H1"])
+    win_data = Ways.get_ways_data(gamestate.config, gamestate.board)
+    recorder = RecordingGamestate(win_data)
+    Ways.record_ways_wins(recorder)
+    assert win_data["wins"] and all(win.details is not None for win in win_data["wins"])
+    assert [record["kind"] for record in recorder.records] == [len(win["positions"]) for win in win_data["wins"]]
+
+
+def test_get_summary_of_plain_win():
+    win = {"symbol": "H1", "positions": [{"reel": 0, "row": 1}], "meta": {"globalMult": 2}}
+    assert get_summary(win, "positionCount") == 1
+    assert get_summary(win, "globalMult") == 2
@@ -0,0 +1,128 @@
+"""
+Compare Cluster.get_clusters against the original recursive cluster search on random boards.
+Checks that both return identical clusters (including position order) and reports the time per board.
+    Args:
+    [optional] -r number of reels, default 7
+    [optional] -w number of rows, default 7
+    [optional] -n number of boards, default 2000
+    [optional] -s symbol names drawn uniformly onto the board, default H1 H2 H3 L1 L2 W
+    Example:
+    python3 utils/cluster_benchmark.py -r 8 -w 8 -n 5000 -s H1 H2 W
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.calculations.cluster import Cluster
+from src.calculations.symbol import SymbolStorage
+
+
+class BenchmarkConfig:
+    """Minimal config for creating board symbols."""
+
+    def __init__(self, symbols: list):
+        self.paytable = {(5, name): 1 for name in symbols}
+        self.special_symbols = {"wild": ["W"]}
+
+
+def recursive_neighbours(board: list, reel: int, row: int, local_checked: list) -> list:
+    """All neighbouring positions within board range (original implementation)."""
+    neighbours = []
+    if reel > 0:
+        if (reel - 1, row) not in local_checked:
+            neighbours += [(reel - 1, row)]
+            local_checked += [(reel - 1, row)]
+    if reel < len(board) - 1:
+        if (reel + 1, row) not in local_checked:
+            neighbours += [(reel + 1, row)]
+            local_checked += [(reel + 1, row)]
+    if row > 0:
+        if (reel, row - 1) not in local_checked:
+            neighbours += [(reel, row - 1)]
+            local_checked += [(reel, row - 1)]
+    if row < len(board[reel]) - 1:
+        if (reel, row + 1) not in local_checked:
+            neighbours += [(reel, row + 1)]
+            local_checked += [(reel, row + 1)]
+    return neighbours
+
+
+def recursive_check_neighbours(
+    board: list, already_checked: list, local_checked: list, potential_cluster: list, reel, row, og_symbol, wild_key
+):
+    """Recursively check neighbours for like-symbols (original implementation)."""
+    for reel_, row_ in recursive_neighbours(board, reel, row, local_checked):
+        if Cluster.in_cluster(board, reel_, row_, og_symbol, wild_key):
+            potential_cluster += [(reel_, row_)]
+            already_checked += [(reel_, row_)]
+            recursive_check_neighbours(
+                board, already_checked, local_checked, potential_cluster, reel_, row_, og_symbol, wild_key
+            )
+
+
+def recursive_get_clusters(board: list, wild_key: str = "wild") -> dict:
+    """Return all symbol clusters of size >= 1 (original implementation)."""
+    already_checked = []
+    clusters = {}
+    for reel, _ in enumerate(board):
+        for row, _ in enumerate(board[reel]):
+            if (reel, row) not in already_checked and not board[reel][row].check_attribute(wild_key):
+                potential_cluster = [(reel, row)]
+                already_checked += [(reel, row)]
+                local_checked = [(reel, row)]
+                symbol = board[reel][row].name
+                recursive_check_neighbours(
+                    board, already_checked, local_checked, potential_cluster, reel, row, symbol, wild_key
+                )
+                clusters.setdefault(symbol, []).append(potential_cluster)
+    return clusters
+
+
+def create_boards(num_reels: int, num_rows: int, num_boards: int, symbols: list) -> list:
+    """Random boards of shared symbol instances."""
+    storage = SymbolStorage(BenchmarkConfig(symbols), symbols)
+    rng = random.Random(0)
+    return [
+        [[storage.get_shared_symbol(rng.choice(symbols)) for _ in range(num_rows)] for _ in range(num_reels)]
+        for _ in range(num_boards)
+    ]
+
+
+def time_function(function, boards: list) -> tuple:
+    """Clusters for every board and the time taken per board."""
+    start_time = time.perf_counter()
+    results = [function(board) for board in boards]
+    return results, (time.perf_counter() - start_time) / len(boards)
+
+
+def run_benchmark(num_reels: int = 7, num_rows: int = 7, num_boards: int = 2000, symbols: tuple = None) -> dict:
+    """Print the time per board of both implementations, raising if their clusters differ."""
+    symbols = list(symbols or ("H1", "H2", "H3", "L1", "L2", "W"))
+    boards = create_boards(num_reels, num_rows, num_boards, symbols)
+    recursive_results, recursive_time = time_function(recursive_get_clusters, boards)
+    iterative_results, iterative_time = time_function(Cluster.get_clusters, boards)
+    for board_idx, (expected, result) in enumerate(zip(recursive_results, iterative_results)):
+        if dict(result) != expected:
+            raise AssertionError(f"Cluster mismatch on board {board_idx}: {expected} != {dict(result)}")
+
+    print(f"{num_boards} boards, {num_reels}x{num_rows}, symbols {' '.join(symbols)}")
+    print(f"{'recursive':>10} {recursive_time * 1e6:>10.1f} us/board")
+    print(f"{'iterative':>10} {iterative_time * 1e6:>10.1f} us/board")
+    print(f"{'speedup':>10} {recursive_time / iterative_time:>10.2f}x")
+    return {"recursive": recursive_time, "iterative": iterative_time}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-r", dest="reels", default=7, type=int)
+    parser.add_argument("-w", dest="rows", default=7, type=int)
+    parser.add_argument("-n", dest="num_boards", default=2000, type=int)
+    parser.add_argument("-s", dest="symbols", nargs="+", default=None)
+    arguments = parser.parse_args()
+
+    run_benchmark(arguments.reels, arguments.rows, arguments.num_boards, arguments.symbols)
@@ -0,0 +1,116 @@
+"""
+Compare zstd compression settings on a sample of a game's books.
+Reports the compression ratio and compression/decompression throughput for each combination of
+level, thread count and long-distance matching, to help choose the Config compression settings.
+    Args:
+    -g game id
+    [optional] -m bet mode, default 'base'
+    [optional] -n number of books to sample, default 10000
+    [optional] -l compression levels to test, default 1 3 9 19
+    [optional] -t thread counts to test, default 0 -1
+    [optional] -w window log, default 0 (selected from level)
+    Example:
+    python3 utils/compression_benchmark.py -g 0_0_lines -m base -n 5000 -l 3 9
+"""
+
+import os
+import io
+import sys
+import time
+import argparse
+from itertools import product
+import zstandard as zstd
+
+PATH_TO_GAMES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "games")
+
+
+def load_book_sample(game_id: str, betmode: str, num_books: int) -> bytes:
+    """Read the first num_books lines from the published (compressed or uncompressed) books."""
+    books_path = os.path.join(PATH_TO_GAMES, game_id, "library", "publish_files", f"books_{betmode}.jsonl.zst")
+    if not os.path.isfile(books_path):
+        books_path = os.path.join(PATH_TO_GAMES, game_id, "library", "books", f"books_{betmode}.jsonl")
+    if not os.path.isfile(books_path):
+        raise FileNotFoundError(f"No books found for {game_id} in mode {betmode}, run create_books() first.")
+
+    lines = []
+    with open(books_path, "rb") as f:
+        if books_path.endswith(".zst"):
+            reader = io.BufferedReader(zstd.ZstdDecompressor().stream_reader(f, read_across_frames=True))
+        else:
+            reader = f
+        for line in reader:
+            if line.strip():
+                lines.append(line)
+            if len(lines) >= num_books:
+                break
+    return b"".join(lines)
+
+
+def benchmark_settings(data: bytes, level: int, threads: int, long_distance: bool, window_log: int) -> dict:
+    """Compress and decompress the sample with a single set of parameters."""
+    params = zstd.ZstdCompressionParameters.from_level(
+        level, threads=threads, enable_ldm=long_distance, window_log=window_log
+    )
+    compressor = zstd.ZstdCompressor(compression_params=params)
+    start_time = time.perf_counter()
+    compressed = compressor.compress(data)
+    compress_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    zstd.ZstdDecompressor(max_window_size=2**31).decompress(compressed, max_output_size=len(data))
+    decompress_time = time.perf_counter() - start_time
+
+    megabytes = len(data) / 1e6
+    return {
+        "ratio": len(data) / len(compressed),
+        "compress_speed": megabytes / max(compress_time, 1e-9),
+        "decompress_speed": megabytes / max(decompress_time, 1e-9),
+    }
+
+
+def run_benchmark(
+    game_id: str,
+    betmode: str = "base",
+    num_books: int = 10000,
+    levels: tuple = (1, 3, 9, 19),
+    threads: tuple = (0, -1),
+    window_log: int = 0,
+) -> list:
+    """Print a table of ratio vs throughput for each combination of settings."""
+    data = load_book_sample(game_id, betmode, num_books)
+    print(f"Sampled {round(len(data) / 1e6, 2)} MB of books from {game_id} ({betmode})\n")
+    print(f"{'level':>5} {'threads':>7} {'ldm':>5} {'ratio':>7} {'comp MB/s':>10} {'decomp MB/s':>12}")
+    results = []
+    for level, thread_count, long_distance in product(levels, threads, (False, True)):
+        result = benchmark_settings(data, level, thread_count, long_distance, window_log)
+        result.update({"level": level, "threads": thread_count, "long_distance": long_distance})
+        results.append(result)
+        print(
+            f"{level:>5} {thread_count:>7} {str(long_distance):>5} {result['ratio']:>7.2f} "
+            f"{result['compress_speed']:>10.1f} {result['decompress_speed']:>12.1f}"
+        )
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-g", dest="game", required=True)
+    parser.add_argument("-m", dest="mode", default="base")
+    parser.add_argument("-n", dest="num_books", default=10000, type=int)
+    parser.add_argument("-l", dest="levels", nargs="+", default=[1, 3, 9, 19], type=int)
+    parser.add_argument("-t", dest="threads", nargs="+", default=[0, -1], type=int)
+    parser.add_argument("-w", dest="window_log", default=0, type=int)
+    arguments = parser.parse_args()
+
+    try:
+        run_benchmark(
+            arguments.game,
+            arguments.mode,
+            arguments.num_books,
+            arguments.levels,
+            arguments.threads,
+            arguments.window_log,
+        )
+    except FileNotFoundError as err:
+        print(err)
+        sys.exit(1)
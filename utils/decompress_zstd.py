@@ -1,12 +1,16 @@
 """Test file decompression and validate data structure is valid JSON."""
 
+import os
 import json
 import io
 import zstandard as zstd
 
 
-def decompress(input_path: str, save_output: bool = False):
-    """Decompress zst files assuming newline char to indicate different sims."""
+def decompress(input_path: str, save_output: bool = False, dictionary_path: str = None):
+    """
+    Decompress zst files assuming newline char to indicate different sims.
+    Books compressed with a trained dictionary are read using books_<mode>.dict from the same folder.
+    """
 
     def json_validate(json_blob):
         """Validate each uncompressed result to ensure valid json format."""
@@ -16,9 +20,16 @@ def decompress(input_path: str, save_output: bool = False):
             print("Invalid JSON!")
             raise RuntimeError("Invalid JSON")
 
-    decompressor = zstd.ZstdDecompressor()
+    if dictionary_path is None:
+        dictionary_path = input_path.replace(".jsonl.zst", ".dict")
+    dictionary = None
+    if os.path.isfile(dictionary_path):
+        with open(dictionary_path, "rb") as f:
+            dictionary = zstd.ZstdCompressionDict(f.read())
+
+    decompressor = zstd.ZstdDecompressor(dict_data=dictionary)
     with open(input_path, "rb") as f:
-        with decompressor.stream_reader(f) as reader:
+        with decompressor.stream_reader(f, read_across_frames=True) as reader:
             txt_stream = io.TextIOWrapper(reader, encoding="utf-8")
             lines = []
             for line in txt_stream:
@@ -118,7 +118,17 @@ def verify_lookup_format(filename: str) -> list:
 
 
 # payout mult value match to lut + length match
-def verify_books_and_payout_mults(books_filename: str) -> list:
+def load_books_dictionary(books_filename: str, dictionary_filename: str = None) -> zst.ZstdCompressionDict:
+    """Load the dictionary published next to books_<mode>.jsonl.zst (books_<mode>.dict), if one exists."""
+    if dictionary_filename is None:
+        dictionary_filename = str(books_filename).replace(".jsonl.zstd", ".dict").replace(".jsonl.zst", ".dict")
+    if not os.path.isfile(dictionary_filename):
+        return None
+    with open(dictionary_filename, "rb") as f:
+        return zst.ZstdCompressionDict(f.read())
+
+
+def verify_books_and_payout_mults(books_filename: str, dictionary_filename: str = None) -> list:
     """Ensure the values written to the books match those in the lookup table exactly."""
     assert str(books_filename).endswith(".jsonl.zstd") or str(books_filename).endswith(
         "jsonl.zst"
@@ -127,8 +137,8 @@ def verify_books_and_payout_mults(books_filename: str) -> list:
     book_payout_ints = []
     total_num_events = 0
     with open(books_filename, "rb") as f:
-        decompressor = zst.ZstdDecompressor()
-        with decompressor.stream_reader(f) as reader:
+        decompressor = zst.ZstdDecompressor(dict_data=load_books_dictionary(books_filename, dictionary_filename))
+        with decompressor.stream_reader(f, read_across_frames=True) as reader:
             txt_stream = TextIOWrapper(reader, encoding="UTF-8")
             for line in txt_stream:
                 line = line.strip()